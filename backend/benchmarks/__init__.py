@@ -0,0 +1,2 @@
+# backend/benchmarks
+# Run from the backend directory, e.g. `python -m benchmarks.bench_ingest`.
@@ -0,0 +1,128 @@
+# backend/benchmarks/bench_ingest.py
+"""
+Rows per second for the results upload path, legacy row-by-row loop vs the
+vectorized ingest pipeline, against a throwaway SQLite database.
+
+    python -m benchmarks.bench_ingest --rows 20000 --students 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp(prefix="bench_ingest_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_db_dir, 'bench.db')}")
+
+import pandas as pd
+from database import Base, SessionLocal, engine
+import models
+from utils.ingest import ingest_results_frame
+
+SUBJECTS = ["Mathematics", "English", "Physics", "Chemistry", "Biology", "Arabic",
+            "Islamic Studies", "Civic Education", "Economics", "Geography", "Agric", "Computer"]
+
+
+def make_sheet(rows: int, students: int) -> pd.DataFrame:
+    rng = random.Random(42)
+    names = [f"Student {i:05d}" for i in range(students)]
+    data = []
+    for i in range(rows):
+        score = rng.uniform(0, 100)
+        data.append({
+            "Student Name": names[i % students],
+            "Class": f"JSS{i % 3 + 1}",
+            "Subject": SUBJECTS[(i // students) % len(SUBJECTS)],
+            # ~1% junk scores so the rejection path is exercised
+            "Percentage": "absent" if rng.random() < 0.01 else round(score, 1),
+        })
+    return pd.DataFrame(data)
+
+
+def seed_users(students: int):
+    db = SessionLocal()
+    db.bulk_insert_mappings(models.User, [
+        {"username": f"S{i:05d}", "full_name": f"Student {i:05d}", "password": "x", "role": "student"}
+        for i in range(students)
+    ])
+    db.commit()
+    db.close()
+
+
+def legacy_ingest(db, df, term, session):
+    """The pre-pipeline upload loop, kept verbatim for comparison."""
+    records_added = 0
+    for _, row in df.iterrows():
+        try:
+            name = str(row["Student Name"]).strip()
+            student_class = str(row["Class"]).strip()
+            subject = str(row["Subject"]).strip()
+            percentage = float(row["Percentage"])
+        except Exception:
+            continue
+
+        user = (
+            db.query(models.User)
+            .filter(
+                (models.User.username.ilike(name)) |
+                (models.User.full_name.ilike(name))
+            )
+            .first()
+        )
+
+        db.add(models.StudentResult(
+            name=name,
+            student_class=student_class,
+            subject=subject,
+            percentage=percentage,
+            student_id=user.id if user else None,
+            teacher_id=None,
+            term=term,
+            session=session,
+        ))
+        records_added += 1
+    db.commit()
+    return records_added
+
+
+def pipeline_ingest(db, df, term, session, batch_size=None):
+    added = ingest_results_frame(db, df, term, session, batch_size=batch_size)["records_added"]
+    db.commit()
+    return added
+
+
+def run(label, fn, df, **kwargs):
+    db = SessionLocal()
+    db.query(models.StudentResult).delete()
+    db.commit()
+    start = time.perf_counter()
+    added = fn(db, df, "First Term", "2024/2025", **kwargs)
+    elapsed = time.perf_counter() - start
+    db.close()
+    print(f"{label:<10} {added:>8} rows  {elapsed:8.2f}s  {added / elapsed:>10.0f} rows/s")
+    return added / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--skip-legacy", action="store_true", help="only time the new pipeline")
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    seed_users(args.students)
+    df = make_sheet(args.rows, args.students)
+
+    print(f"{args.rows} rows, {args.students} students, {engine.url}")
+    after = run("pipeline", pipeline_ingest, df, batch_size=args.batch_size)
+    if not args.skip_legacy:
+        before = run("legacy", legacy_ingest, df)
+        print(f"speedup    {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+# backend/benchmarks/bench_load.py
+"""
+Requests per second for DB_MODE=sync vs DB_MODE=async, side by side.
+
+Seeds a throwaway database (SQLite unless LOAD_DATABASE_URL is set; its tables
+are dropped) through the real upload path, then for each mode starts
+`uvicorn main:app` and sends --requests concurrent GETs drawn from a mix of
+/results/myResults, /results/stats/subjects, /results/all and /results/class.
+
+    python -m benchmarks.bench_load --students 500 --concurrency 32 --workers 1
+"""
+
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+_db_dir = tempfile.mkdtemp(prefix="bench_load_")
+# Never fall back to DATABASE_URL: this script drops every table it touches.
+os.environ["DATABASE_URL"] = os.getenv("LOAD_DATABASE_URL") or f"sqlite:///{os.path.join(_db_dir, 'load.db')}"
+os.environ["DB_MODE"] = "sync"
+
+from database import Base, SessionLocal, engine
+import models
+from utils.ingest import process_results_upload
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SUBJECTS = ["Mathematics", "English", "Physics", "Chemistry", "Biology", "Economics", "Geography"]
+CLASSES = ["JSS 1", "JSS 2", "JSS 3", "SS 1", "SS 2", "SS 3"]
+TERMS = ["First", "Second", "Third"]
+
+
+def seed(students: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(models.User, [
+            {"username": f"S{i:05d}", "full_name": f"Student {i:05d}", "password": "x", "role": "student"}
+            for i in range(students)
+        ])
+        db.commit()
+        rng = random.Random(7)
+        for term in TERMS:
+            name = f"{term}_Term_2024_2025.csv"
+            path = os.path.join(_db_dir, name)
+            with open(path, "w") as f:
+                f.write("Student Name,Class,Subject,Percentage\n")
+                for i in range(students):
+                    for subject in SUBJECTS:
+                        f.write(f"Student {i:05d},{CLASSES[i % len(CLASSES)]},{subject},{rng.randint(20, 100)}\n")
+            process_results_upload(db, path, name)
+    finally:
+        db.close()
+
+
+def request_mix(students: int, count: int, seed: int = 11):
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.4:
+            route, params = "/results/myResults", {"username": f"S{rng.randrange(students):05d}"}
+        elif kind < 0.6:
+            route, params = "/results/stats/subjects", {"term": f"{rng.choice(TERMS)} Term",
+                                                        "student_class": rng.choice(CLASSES)}
+        elif kind < 0.8:
+            route, params = "/results/all", {"limit": 100, "student_class": rng.choice(CLASSES)}
+        else:
+            route, params = f"/results/class/{rng.choice(CLASSES)}", {"limit": 100, "term": f"{rng.choice(TERMS)} Term"}
+        paths.append(f"{urllib.parse.quote(route)}?{urllib.parse.urlencode(params)}")
+    return paths
+
+
+def start_server(port: int, workers: int, mode: str) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env={**os.environ, "DB_MODE": mode},
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and server.poll() is None:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/status", timeout=1)
+            return server
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"server did not start with DB_MODE={mode}")
+
+
+def fetch(port: int, path: str) -> float:
+    started = time.perf_counter()
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=120) as response:
+        response.read()
+        assert response.status == 200, path
+    return time.perf_counter() - started
+
+
+def run_mode(mode: str, paths, args) -> dict:
+    server = start_server(args.port, args.workers, mode)
+    try:
+        for path in paths[:20]:  # warm up caches and the connection pool
+            fetch(args.port, path)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            latencies = sorted(pool.map(lambda path: fetch(args.port, path), paths))
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        "rps": len(paths) / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Requests per second, DB_MODE=sync vs async.")
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--modes", default="sync,async")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args(argv)
+
+    seed(args.students)
+    paths = request_mix(args.students, args.requests)
+    results = {mode: run_mode(mode, paths, args) for mode in args.modes.split(",")}
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.workers} worker(s), "
+          f"{os.cpu_count()} core(s), {engine.dialect.name}, {args.students} students")
+    print(f"{'mode':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<8}{r['rps']:>10.1f}{r['p50'] * 1000:>10.0f}{r['p95'] * 1000:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
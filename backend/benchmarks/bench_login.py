@@ -0,0 +1,154 @@
+# backend/benchmarks/bench_login.py
+"""
+Logins per second against a real uvicorn server on a throwaway SQLite database.
+
+Seeds --users students, starts `uvicorn main:app` with --workers processes and
+sends --requests concurrent POST /auth/login calls. BCRYPT_ROUNDS and
+AUTH_HASH_WORKERS from the environment are passed through to the server.
+Before timing, one student stored with another bcrypt cost logs in, to check
+rehash-on-login upgrades the hash and returns a working token.
+
+    BCRYPT_ROUNDS=10 python -m benchmarks.bench_login --workers 2 --concurrency 32
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+_db_dir = tempfile.mkdtemp(prefix="bench_login_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'bench.db')}"
+
+from database import Base, SessionLocal, engine
+import models
+from utils.passwords import BCRYPT_ROUNDS, iter_password_hashes
+
+# Stored with a cost other than BCRYPT_ROUNDS, so its first login rehashes
+REHASH_USER = "REHASH"
+REHASH_ROUNDS = 5 if BCRYPT_ROUNDS == 4 else 4
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed_users(users: int):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        hashes = iter_password_hashes([f"pw{i}" for i in range(users)])
+        db.bulk_insert_mappings(models.User, [
+            {"username": f"S{i:05d}", "full_name": f"Student {i:05d}", "password": hashed,
+             "role": "student", "is_active": True}
+            for i, hashed in enumerate(hashes)
+        ])
+        old_cost = bcrypt.hashpw(b"rehash-pw", bcrypt.gensalt(rounds=REHASH_ROUNDS)).decode("utf-8")
+        db.add(models.User(username=REHASH_USER, full_name="Rehash Check", password=old_cost,
+                           role="student", is_active=True))
+        db.commit()
+    finally:
+        db.close()
+
+
+def check_rehash_login(port: int):
+    """The first login with an outdated hash succeeds, upgrades it, and its token is accepted."""
+    for attempt in ("first", "second"):
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{port}/auth/login",
+            data=json.dumps({"username": REHASH_USER, "password": "rehash-pw"}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=120) as response:
+                token = json.load(response)["access_token"]
+        except urllib.error.HTTPError as e:
+            raise AssertionError(f"{attempt} login after a cost change returned {e.code}") from None
+
+    db = SessionLocal()
+    try:
+        stored = db.query(models.User.password).filter(models.User.username == REHASH_USER).scalar()
+    finally:
+        db.close()
+    assert int(stored.split("$")[2]) == BCRYPT_ROUNDS, "hash was not upgraded on login"
+
+    # A wrong old password is a 400 from the handler; a rejected token would be a 401
+    query = urllib.parse.urlencode({"old_password": "wrong", "new_password": "x"})
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/auth/change-password?{query}", data=b"",
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    try:
+        urllib.request.urlopen(request, timeout=120)
+    except urllib.error.HTTPError as e:
+        assert e.code == 400, f"token from a rehashing login was rejected ({e.code})"
+    print(f"rehash on login: cost {REHASH_ROUNDS} -> {BCRYPT_ROUNDS}, token accepted")
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=os.environ.copy(),
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and server.poll() is None:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/status", timeout=1)
+            return server
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("server did not start")
+
+
+def login(port: int, i: int, users: int) -> float:
+    body = json.dumps({"username": f"S{i % users:05d}", "password": f"pw{i % users}"}).encode()
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/auth/login", data=body,
+        headers={"Content-Type": "application/json"},
+    )
+    started = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=120) as response:
+        assert response.status == 200
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Logins per second against uvicorn.")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    seed_users(args.users)
+    server = start_server(args.port, args.workers)
+    try:
+        check_rehash_login(args.port)
+        login(args.port, 0, args.users)  # warm up
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            latencies = sorted(pool.map(lambda i: login(args.port, i, args.users), range(args.requests)))
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{args.requests} logins, concurrency {args.concurrency}, {args.workers} worker(s), "
+          f"{os.cpu_count()} core(s), bcrypt rounds {BCRYPT_ROUNDS}")
+    print(f"throughput {args.requests / elapsed:8.1f} logins/s")
+    print(f"latency    p50 {statistics.median(latencies) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# backend/benchmarks/bench_startup.py
+"""
+Import time of main and cold-start time of a uvicorn worker.
+
+Each run is a fresh interpreter, so nothing is cached in sys.modules:
+
+- import: `import main` timed inside a new process, plus which heavy optional
+  modules (pandas, openpyxl, groq) it pulled in and the slowest imports
+  from -X importtime
+- boot: `uvicorn main:app` started on a throwaway SQLite database until
+  /status first answers, including the startup migration when AUTO_MIGRATE is on
+
+GROQ_API_KEY is removed from the children's environment, so this also checks
+that the app boots offline. --max-import-ms / --max-boot-ms exit 1 when the
+median is over budget.
+
+    python -m benchmarks.bench_startup --runs 5 --max-import-ms 1500
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("pandas", "openpyxl", "groq", "numpy")
+
+_IMPORT_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def _child_env(db_dir: str, auto_migrate: bool) -> dict:
+    env = {k: v for k, v in os.environ.items() if k != "GROQ_API_KEY"}
+    env["DATABASE_URL"] = f"sqlite:///{os.path.join(db_dir, 'startup.db')}"
+    env["AUTO_MIGRATE"] = "true" if auto_migrate else "false"
+    env["PYTHONWARNINGS"] = "ignore"
+    return env
+
+
+def time_import(env: dict) -> dict:
+    out = subprocess.run([sys.executable, "-c", _IMPORT_PROBE], cwd=BACKEND_DIR, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(env: dict, top: int):
+    """(cumulative ms, module) for the top slowest imports in one -X importtime run."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=BACKEND_DIR,
+                         env=env, capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative) / 1000, module.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_boot(env: dict) -> float:
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline and server.poll() is None:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/status", timeout=1)
+                return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise RuntimeError("server did not start")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import and cold-start time of the API.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--no-migrate", action="store_true", help="boot with AUTO_MIGRATE=false")
+    parser.add_argument("--max-import-ms", type=float, help="fail if the median import is slower")
+    parser.add_argument("--max-boot-ms", type=float, help="fail if the median boot is slower")
+    args = parser.parse_args(argv)
+
+    db_dir = tempfile.mkdtemp(prefix="bench_startup_")
+    env = _child_env(db_dir, auto_migrate=not args.no_migrate)
+
+    imports = [time_import(env) for _ in range(args.runs)]
+    boots = [time_boot(env) for _ in range(args.runs)]
+    import_ms = statistics.median(run["seconds"] for run in imports) * 1000
+    boot_ms = statistics.median(boots) * 1000
+
+    print(f"{args.runs} runs, {os.cpu_count()} core(s), AUTO_MIGRATE={'false' if args.no_migrate else 'true'}")
+    print(f"import main   median {import_ms:7.0f} ms   (min {min(r['seconds'] for r in imports) * 1000:.0f} ms)")
+    print(f"worker boot   median {boot_ms:7.0f} ms   (min {min(boots) * 1000:.0f} ms), process start to first /status")
+    print(f"loaded at import: {', '.join(imports[0]['loaded']) or 'none'} of {', '.join(HEAVY_MODULES)}")
+    print("slowest imports (cumulative ms):")
+    for ms, module in slowest_imports(env, args.top):
+        print(f"  {ms:8.1f}  {module}")
+
+    failed = False
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"FAIL import {import_ms:.0f} ms > {args.max_import_ms:.0f} ms")
+        failed = True
+    if args.max_boot_ms is not None and boot_ms > args.max_boot_ms:
+        print(f"FAIL boot {boot_ms:.0f} ms > {args.max_boot_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
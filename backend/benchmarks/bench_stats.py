@@ -0,0 +1,135 @@
+# backend/benchmarks/bench_stats.py
+"""
+Class/term statistics for one synthetic term, the list-and-loop code path the
+results API used before utils.stats_engine vs the vectorized engine.
+No database is involved; both sides start from the same in-memory rows.
+
+Both sides produce the full pass class_term_statistics returns: per-subject
+mean, std and median, student averages with competition and dense positions,
+percentile ranks and z-scores, and a z-score and percentile rank for every row. The
+loop side takes the extras the cheapest way lists allow (statistics.pstdev,
+bisect over sorted lists); the answers are compared before the timings.
+
+    python -m benchmarks.bench_stats --students 5000 --subjects 12
+"""
+
+import argparse
+import random
+import statistics
+import time
+from bisect import bisect_left, bisect_right
+
+from utils.stats_engine import RANK_DECIMALS, class_term_statistics
+
+
+def make_term(students: int, subjects: int, seed: int = 42):
+    """Parallel (student_ids, subjects, scores) lists; ~5% of students skip a subject."""
+    rng = random.Random(seed)
+    student_ids, subject_names, scores = [], [], []
+    for sid in range(1, students + 1):
+        for subject in range(subjects):
+            if rng.random() < 0.05:
+                continue
+            student_ids.append(sid)
+            subject_names.append(f"Subject {subject}")
+            scores.append(round(rng.uniform(20, 100), 1))
+    return student_ids, subject_names, scores
+
+
+def _percentile(ascending, value) -> float:
+    below = bisect_left(ascending, value)
+    return (below + 0.5 * (bisect_right(ascending, value) - below)) / len(ascending) * 100
+
+
+def legacy_stats(student_ids, subjects, scores):
+    """The pre-engine approach: Python lists, sum/min/max and statistics.median per group."""
+    by_student, by_subject, taken = {}, {}, {}
+    for sid, subject, score in zip(student_ids, subjects, scores):
+        by_student.setdefault(sid, []).append(score)
+        by_subject.setdefault(subject, []).append(score)
+        taken.setdefault(sid, set()).add(subject)
+
+    max_subject_count = max(len(s) for s in taken.values())
+    averages = {sid: sum(values) / max_subject_count for sid, values in by_student.items()}
+
+    sorted_avgs = sorted(averages.values(), reverse=True)
+    positions = {
+        sid: next(i + 1 for i, a in enumerate(sorted_avgs) if abs(a - avg) < 0.0001)
+        for sid, avg in averages.items()
+    }
+    subject_stats = {
+        subject: {"min": min(values), "max": max(values), "median": statistics.median(values),
+                  "mean": statistics.fmean(values), "std": statistics.pstdev(values),
+                  "ascending": sorted(values)}
+        for subject, values in by_subject.items()
+    }
+
+    # The outputs the engine adds, in loops
+    distinct_totals = sorted({round(sum(values), RANK_DECIMALS) for values in by_student.values()}, reverse=True)
+    dense = {total: i + 1 for i, total in enumerate(distinct_totals)}
+    ascending_avgs = sorted_avgs[::-1]
+    class_mean, class_std = statistics.fmean(ascending_avgs), statistics.pstdev(ascending_avgs)
+    students = {
+        sid: {
+            "average": avg,
+            "position": positions[sid],
+            "dense_position": dense[round(sum(by_student[sid]), RANK_DECIMALS)],
+            "percentile_rank": _percentile(ascending_avgs, avg),
+            "z_score": (avg - class_mean) / class_std if class_std else 0.0,
+        }
+        for sid, avg in averages.items()
+    }
+    row_z_scores, row_percentile_ranks = [], []
+    for subject, score in zip(subjects, scores):
+        stats = subject_stats[subject]
+        row_z_scores.append((score - stats["mean"]) / stats["std"] if stats["std"] else 0.0)
+        row_percentile_ranks.append(_percentile(stats["ascending"], score))
+    return students, subject_stats, row_z_scores, row_percentile_ranks
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--subjects", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=5, help="best of this many runs is reported")
+    args = parser.parse_args(argv)
+
+    rows = make_term(args.students, args.subjects)
+    print(f"{len(rows[0])} result rows, {args.students} students, {args.subjects} subjects")
+
+    legacy_time, legacy = timed(lambda: legacy_stats(*rows), args.repeat)
+    engine_time, stats = timed(lambda: class_term_statistics(*rows), args.repeat)
+
+    # Same answers before comparing speed
+    students, subject_stats, row_z_scores, row_percentile_ranks = legacy
+    for sid, expected in students.items():
+        student = stats["students"][sid]
+        assert abs(student["average"] - expected["average"]) < 1e-9, sid
+        assert abs(student["percentile_rank"] - expected["percentile_rank"]) < 1e-9, sid
+        assert abs(student["z_score"] - expected["z_score"]) < 1e-9, sid
+        assert (student["position"], student["dense_position"]) == \
+            (expected["position"], expected["dense_position"]), sid
+    for subject, expected in subject_stats.items():
+        got = stats["subjects"][subject]
+        assert (got["min"], got["max"]) == (expected["min"], expected["max"]), subject
+        for field in ("median", "mean", "std"):
+            assert abs(got[field] - expected[field]) < 1e-9, (subject, field)
+    for row, (z, pct) in enumerate(zip(row_z_scores, row_percentile_ranks)):
+        assert abs(stats["row_z_scores"][row] - z) < 1e-9, row
+        assert abs(stats["row_percentile_ranks"][row] - pct) < 1e-9, row
+
+    print(f"legacy loops:  {legacy_time * 1000:9.1f} ms")
+    print(f"stats engine:  {engine_time * 1000:9.1f} ms  ({legacy_time / engine_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# backend/benchmarks/check_query_plans.py
+"""
+Query-plan regression check for the results endpoints and the upload path.
+
+Seeds a scratch database, runs the same code the routers run while recording
+every statement sent, then EXPLAINs each one and exits 1 if any reads a checked
+table with a full scan:
+
+- SQLite (default, throwaway file): EXPLAIN QUERY PLAN, "SCAN <table>" fails
+  unless it is a covering-index scan.
+- PostgreSQL: EXPLAIN (FORMAT JSON) with enable_seqscan off, any "Seq Scan"
+  fails. Set PLAN_CHECK_DATABASE_URL to a scratch database; its tables are dropped.
+
+    python -m benchmarks.check_query_plans --students 300
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="check_plans_")
+# Never fall back to DATABASE_URL: this script drops every table it touches.
+os.environ["DATABASE_URL"] = os.getenv("PLAN_CHECK_DATABASE_URL") or f"sqlite:///{os.path.join(_db_dir, 'plans.db')}"
+# Statements are captured on the sync engine; the plans are the same in async mode
+os.environ["DB_MODE"] = "sync"
+
+from sqlalchemy import event
+from starlette.requests import Request
+from starlette.responses import Response
+from database import AsyncDB, Base, SessionLocal, engine
+import models
+from routers.results import get_all_results, get_archived_results, get_class_results
+from utils.aggregates import filter_options, score_histogram, subject_summaries, top_scorers
+from utils.ingest import process_results_upload
+from utils.name_matching import get_name_index
+from utils.report_cache import get_cached_report, report_input_hash
+from utils.report_export import load_report_cards
+from utils.student_results import load_student_results
+
+CHECKED_TABLES = {"results", "results_archive", "class_term_stats", "student_term_summaries", "report_cache"}
+
+SUBJECTS = ["Mathematics", "English", "Physics", "Chemistry", "Biology", "Arabic",
+            "Islamic Studies", "Civic Education", "Economics", "Geography"]
+CLASSES = ["JSS 1", "JSS 2", "JSS 3", "SS 1", "SS 2", "SS 3"]
+
+
+def write_sheet(directory: str, filename: str, students: int, seed: int) -> str:
+    path = os.path.join(directory, filename)
+    with open(path, "w") as f:
+        f.write("Student Name,Class,Subject,Percentage\n")
+        for i in range(students):
+            for j, subject in enumerate(SUBJECTS):
+                score = (i * 37 + j * 11 + seed * 7) % 101
+                f.write(f"Student {i:05d},{CLASSES[i % len(CLASSES)]},{subject},{score}\n")
+    return path
+
+
+def seed(students: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(models.User, [
+            {"username": f"S{i:05d}", "full_name": f"Student {i:05d}", "password": "x", "role": "student"}
+            for i in range(students)
+        ])
+        db.commit()
+        # An older session that the 2024/2025 uploads clear out, then two terms of the
+        # current one so the checked upload only touches part of the table
+        for offset, name in enumerate(("First_Term_2023_2024.csv", "First_Term_2024_2025.csv",
+                                       "Second_Term_2024_2025.csv")):
+            process_results_upload(db, write_sheet(_db_dir, name, students, offset), name)
+    finally:
+        db.close()
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+
+def _request(path: str) -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"",
+                    "headers": [], "scheme": "http", "server": ("plan-check", 80)})
+
+
+def exercise(students: int):
+    """The queries behind upload, /myResults, /all, /class, /archive, /stats and the export, with realistic arguments."""
+    db = SessionLocal()
+    try:
+        name = "Third_Term_2024_2025.csv"
+        process_results_upload(db, write_sheet(_db_dir, name, students, 3), name)
+        get_name_index(db)
+
+        for username in ("S00000", f"S{students // 2:05d}"):
+            user = db.query(models.User).filter(models.User.username == username).first()
+            payload = load_student_results(db, user)
+            get_cached_report(db, user.id, report_input_hash(payload["results"]))
+
+        filters = {"session": "2024/2025", "term": "First Term", "student_class": "JSS 1", "subject": "Mathematics"}
+        subject_summaries(db, **filters)
+        top_scorers(db, 3, **filters)
+        score_histogram(db, 10, **filters)
+        filter_options(db)
+
+        # Class exports; a whole-session export reads the whole live table by design
+        load_report_cards(db, student_class="JSS 1", term="First Term")
+        load_report_cards(db, student_class="JSS 2", analysis="none")
+
+        page = dict(cursor=None, limit=50, session=None, term=None, student_class=None,
+                    subject=None, student_id=None, db=AsyncDB(db))
+        first = asyncio.run(get_all_results(_request("/results/all"), Response(), **page))
+        asyncio.run(get_all_results(_request("/results/all"), Response(), **{**page, "cursor": first[-1]["id"]}))
+        asyncio.run(get_all_results(_request("/results/all"), Response(), **{**page, **filters}))
+        asyncio.run(get_all_results(_request("/results/all"), Response(), **{**page, "student_id": 1}))
+        class_page = {k: v for k, v in page.items() if k != "student_class"}
+        asyncio.run(get_class_results("JSS 2", _request("/results/class/JSS 2"), Response(), **class_page))
+        asyncio.run(get_class_results("JSS 2", _request("/results/class/JSS 2"), Response(),
+                                      **{**class_page, "term": "First Term", "subject": "English"}))
+
+        archive = {**page, "session": "2023/2024"}
+        asyncio.run(get_archived_results(_request("/results/archive"), Response(), **archive))
+        asyncio.run(get_archived_results(_request("/results/archive"), Response(),
+                                         **{**archive, "term": "First Term", "student_class": "JSS 1"}))
+        asyncio.run(get_archived_results(_request("/results/archive"), Response(), **{**archive, "student_id": 1}))
+    finally:
+        db.close()
+
+
+def capture(fn, *args):
+    statements = {}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "DELETE", "UPDATE")):
+            statements.setdefault(statement, parameters)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        fn(*args)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+def _bounded_by_primary_key(statement: str) -> bool:
+    # Keyset pages walk the primary key in order and stop after LIMIT rows
+    return re.search(r"ORDER BY results(_archive)?\.id\s+LIMIT", statement) is not None
+
+
+def sqlite_scans(conn, statement, parameters):
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    plan = [row[-1] for row in rows]
+    scans = []
+    for detail in plan:
+        match = re.match(r"SCAN (\w+)", detail)
+        if match and match.group(1) in CHECKED_TABLES and "COVERING INDEX" not in detail:
+            scans.append(detail)
+    return scans, plan
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def postgres_scans(conn, statement, parameters):
+    conn.exec_driver_sql("SET enable_seqscan = off")
+    raw = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+    root = (raw if isinstance(raw, list) else json.loads(raw))[0]["Plan"]
+    scans = [
+        f"Seq Scan on {node['Relation Name']}"
+        for node in _plan_nodes(root)
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in CHECKED_TABLES
+    ]
+    return scans, [f"{node['Node Type']} {node.get('Relation Name', '')}".strip() for node in _plan_nodes(root)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fail if a results query plans a full table scan.")
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--verbose", action="store_true", help="print every plan, not just failures")
+    args = parser.parse_args(argv)
+
+    seed(args.students)
+    statements = capture(exercise, args.students)
+    explain = postgres_scans if engine.dialect.name == "postgresql" else sqlite_scans
+
+    failures = 0
+    with engine.connect() as conn:
+        for statement, parameters in statements.items():
+            scans, plan = explain(conn, statement, parameters)
+            if scans and engine.dialect.name != "postgresql" and _bounded_by_primary_key(statement):
+                scans = []
+            summary = " ".join(statement.split())[:110]
+            if scans:
+                failures += 1
+                print(f"FAIL  {summary}\n      {'; '.join(scans)}")
+            elif args.verbose:
+                print(f"ok    {summary}\n      {'; '.join(plan)}")
+
+    print(f"{len(statements)} statements checked on {engine.dialect.name}, {failures} with full scans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
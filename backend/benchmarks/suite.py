@@ -0,0 +1,258 @@
+# backend/benchmarks/suite.py
+"""
+End-to-end performance suite: a synthetic school pushed through the real API.
+
+Runs in-process against a throwaway SQLite database with the offline
+StubLLMClient standing in for Groq. Students are registered through
+/auth/bulk-register-csv, then these scenarios run in order:
+
+- upload     one /results/upload per term, timed until its background job finishes
+- myresults  /results/myResults for random students
+- analysis   /results/myResults/analysis (stub LLM) for random students
+- all        /results/all, following the cursor through every page
+- login      a concurrent burst of /auth/login
+- export     /results/export/report-cards once per class, as an admin
+
+Each reports p50/p95/p99 latency, throughput and SQL queries per request.
+--save-baseline writes the numbers to a JSON file; --baseline compares against
+one and exits 1 when a scenario's p95 or queries per request regressed beyond
+the tolerances. Baselines are only comparable on the same machine.
+
+    python -m benchmarks.suite --classes 6 --students-per-class 40 --save-baseline /tmp/perf.json
+    python -m benchmarks.suite --classes 6 --students-per-class 40 --baseline /tmp/perf.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List
+
+_db_dir = tempfile.mkdtemp(prefix="bench_suite_")
+# Never fall back to DATABASE_URL: the suite writes thousands of rows.
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'suite.db')}"
+# Login burst measures the handler path, not bcrypt's work factor, unless overridden
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from fastapi.testclient import TestClient
+from main import app
+from utils import groq_agent
+from utils.metrics import SQL_QUERIES_TOTAL
+from benchmarks.synthetic import generate_school, write_result_sheets, write_students_csv
+
+SCENARIOS = ("upload", "myresults", "analysis", "all", "login", "export")
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def measure(calls: Iterable[Callable[[], Any]], concurrency: int = 1) -> Dict[str, float]:
+    """
+    Runs calls (each one request) and summarizes latency, throughput and queries.
+    With concurrency 1, calls is consumed lazily, so a generator may depend on earlier calls.
+    """
+    def timed(call):
+        started = time.perf_counter()
+        call()
+        return time.perf_counter() - started
+
+    queries_before = SQL_QUERIES_TOTAL.value()
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(timed, calls))
+    else:
+        latencies = [timed(call) for call in calls]
+    elapsed = time.perf_counter() - started
+    queries = SQL_QUERIES_TOTAL.value() - queries_before
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "queries_per_request": round(queries / len(latencies), 2),
+    }
+
+
+def _ok(response, expected: int = 200):
+    if response.status_code != expected:
+        raise RuntimeError(f"{response.request.method} {response.request.url} -> "
+                           f"{response.status_code}: {response.text[:200]}")
+    return response
+
+
+def upload_and_wait(client: TestClient, path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        queued = _ok(client.post("/results/upload", files={"file": (os.path.basename(path), f)}), 202).json()
+    while True:
+        job = _ok(client.get(queued["status_url"])).json()
+        if job["status"] == "succeeded":
+            return job["result"]
+        if job["status"] == "failed":
+            raise RuntimeError(f"upload of {path} failed: {job['error']}")
+        time.sleep(0.05)
+
+
+def run_suite(args) -> Dict[str, Dict[str, float]]:
+    school = generate_school(args.classes, args.students_per_class, args.subjects, args.terms, seed=args.seed)
+    sheets = write_result_sheets(school, _db_dir, fmt=args.format, noise=args.noise, seed=args.seed)
+    roster = write_students_csv(school, os.path.join(_db_dir, "students.csv"))
+    groq_agent.client = groq_agent.StubLLMClient(delay=args.llm_delay)
+    rng = random.Random(args.seed)
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    report = {}
+
+    print(f"{len(school.students)} students, {len(school.subjects)} subjects, {len(school.terms)} terms, "
+          f"{sum(len(rows) for rows in school.scores.values())} result rows ({args.format}, "
+          f"{args.noise:.0%} noisy names)")
+
+    with TestClient(app) as client:
+        with open(roster, "rb") as f:
+            created = _ok(client.post("/auth/bulk-register-csv", files={"file": ("students.csv", f)})).json()
+        print(f"registered {created['created']} students through /auth/bulk-register-csv")
+
+        if "upload" in scenarios:
+            results = []
+            report["upload"] = measure([lambda path=path: results.append(upload_and_wait(client, path))
+                                        for path in sheets])
+            print(f"upload: {sum(r['records_added'] for r in results)} rows, "
+                  f"{sum(r['rejected_rows']['count'] for r in results)} rejected, "
+                  f"{sum(len(r['fuzzy_matches']) for r in results)} fuzzy name matches, "
+                  f"{sum(r['unmatched_students'] for r in results)} unmatched")
+        else:
+            for path in sheets:
+                upload_and_wait(client, path)
+
+        students = [rng.choice(school.students) for _ in range(args.requests)]
+
+        if "myresults" in scenarios:
+            report["myresults"] = measure(
+                [lambda s=s: _ok(client.get("/results/myResults", params={"username": s.username}))
+                 for s in students],
+                args.concurrency,
+            )
+
+        if "analysis" in scenarios:
+            report["analysis"] = measure(
+                [lambda s=s: _ok(client.get("/results/myResults/analysis", params={"username": s.username}))
+                 for s in students],
+                args.concurrency,
+            )
+
+        if "all" in scenarios:
+            # Each page needs the previous page's cursor, so this scenario is sequential
+            def all_pages():
+                cursor = None
+                while True:
+                    page = {}
+
+                    def fetch(cursor=cursor):
+                        params = {"limit": args.page_size, **({"cursor": cursor} if cursor else {})}
+                        page["next"] = _ok(client.get("/results/all", params=params)).headers.get("X-Next-Cursor")
+
+                    yield fetch
+                    cursor = page["next"]
+                    if not cursor:
+                        return
+
+            report["all"] = measure(all_pages())
+
+        if "login" in scenarios:
+            report["login"] = measure(
+                [lambda s=s: _ok(client.post("/auth/login", json={"username": s.username, "password": s.password}))
+                 for s in students],
+                args.concurrency,
+            )
+
+        if "export" in scenarios:
+            admin = {"username": "bench_admin", "password": "bench-admin-password"}
+            _ok(client.post("/auth/register", json={**admin, "role": "admin"}))
+            headers = {"Authorization": f"Bearer {_ok(client.post('/auth/login', json=admin)).json()['access_token']}"}
+            exported = []
+
+            def export(student_class):
+                response = _ok(client.get("/results/export/report-cards", headers=headers, params={
+                    "student_class": student_class, "format": args.export_format, "analysis": "template",
+                }))
+                exported.append((int(response.headers["X-Report-Cards"]), len(response.content)))
+
+            classes = sorted({student.student_class for student in school.students})
+            report["export"] = measure([lambda c=c: export(c) for c in classes])
+            print(f"export: {sum(n for n, _ in exported)} report cards ({args.export_format}) in "
+                  f"{len(classes)} archives, {sum(size for _, size in exported) / 1024:.0f} KiB")
+
+    return report
+
+
+def compare(report, baseline, latency_tolerance: float, query_tolerance: float) -> List[str]:
+    """Regressions of report against baseline, as printable lines."""
+    failures = []
+    for name, current in report.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + latency_tolerance):
+            failures.append(f"{name}: p95 {current['p95_ms']} ms vs baseline {previous['p95_ms']} ms")
+        if current["queries_per_request"] > previous["queries_per_request"] * (1 + query_tolerance):
+            failures.append(f"{name}: {current['queries_per_request']} queries/request "
+                            f"vs baseline {previous['queries_per_request']}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end performance suite on a synthetic school.")
+    parser.add_argument("--classes", type=int, default=6)
+    parser.add_argument("--students-per-class", type=int, default=40)
+    parser.add_argument("--subjects", type=int, default=10)
+    parser.add_argument("--terms", type=int, default=3)
+    parser.add_argument("--format", choices=("csv", "xlsx"), default="csv")
+    parser.add_argument("--noise", type=float, default=0.1, help="share of misspelled names per sheet")
+    parser.add_argument("--requests", type=int, default=200, help="requests per per-student scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--llm-delay", type=float, default=0.0, help="stub LLM seconds per completion")
+    parser.add_argument("--export-format", choices=("html", "pdf"), default="html")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", help="JSON from --save-baseline to compare against")
+    parser.add_argument("--save-baseline", help="write this run's numbers here")
+    parser.add_argument("--latency-tolerance", type=float, default=0.25, help="allowed p95 increase, 0.25 = 25%%")
+    parser.add_argument("--query-tolerance", type=float, default=0.0, help="allowed queries/request increase")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args)
+
+    print(f"\n{'scenario':<11}{'requests':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'queries':>9}")
+    for name, r in report.items():
+        print(f"{name:<11}{r['requests']:>9}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}"
+              f"{r['throughput_rps']:>10.1f}{r['queries_per_request']:>9.1f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nbaseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(report, json.load(f), args.latency_tolerance, args.query_tolerance)
+        if failures:
+            print("\nREGRESSIONS")
+            for line in failures:
+                print(f"  {line}")
+            return 1
+        print("\nno regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
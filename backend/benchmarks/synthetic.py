@@ -0,0 +1,182 @@
+# backend/benchmarks/synthetic.py
+"""
+Synthetic school data for benchmarks: classes x students x subjects x terms.
+
+generate_school builds the roster and every score; write_students_csv and
+write_result_sheets produce the files /auth/bulk-register-csv and
+/results/upload accept. Result sheets spell some names the way teachers do
+(case, spacing, word order, typos, a dropped middle name) so the exact and
+fuzzy name-matching paths both get work.
+"""
+
+import csv
+import os
+import random
+from typing import Dict, List, NamedTuple, Tuple
+
+FIRST_NAMES = [
+    "Abdullahi", "Aisha", "Amina", "Bello", "Chidi", "Chioma", "David", "Emeka", "Esther", "Fatima",
+    "Grace", "Hassan", "Ibrahim", "Ifeoma", "Joseph", "Kemi", "Lawal", "Maryam", "Musa", "Ngozi",
+    "Obinna", "Olu", "Peace", "Rukayya", "Samuel", "Sade", "Tunde", "Umar", "Victoria", "Yusuf",
+]
+MIDDLE_NAMES = [
+    "Ade", "Bisi", "Danjuma", "Eze", "Femi", "Garba", "Halima", "Idris", "Jumoke", "Kabiru",
+    "Lami", "Muktar", "Nneka", "Ola", "Patience", "Rasheed", "Sani", "Titi", "Uche", "Zainab",
+]
+LAST_NAMES = [
+    "Abubakar", "Adeyemi", "Afolabi", "Akande", "Bakare", "Danladi", "Eze", "Ibekwe", "Lawal", "Mohammed",
+    "Musa", "Nwosu", "Obi", "Ogunleye", "Okafor", "Okeke", "Olawale", "Onyeka", "Salisu", "Yakubu",
+]
+SUBJECTS = [
+    "Mathematics", "English", "Physics", "Chemistry", "Biology", "Arabic", "Islamic Studies",
+    "Civic Education", "Economics", "Geography", "Agric", "Computer", "Literature", "Government",
+]
+CLASSES = ["JSS 1", "JSS 2", "JSS 3", "SS 1", "SS 2", "SS 3", "SS 3B", "JSS 1B"]
+TERMS = ["First Term", "Second Term", "Third Term"]
+
+NOISE_KINDS = ("case", "spacing", "order", "typo", "no_middle")
+
+
+class Student(NamedTuple):
+    username: str
+    full_name: str
+    password: str
+    student_class: str
+
+
+class School(NamedTuple):
+    students: List[Student]
+    subjects: List[str]
+    terms: List[str]
+    session: str
+    # term -> (student index, subject, percentage); a few percentages are junk strings
+    scores: Dict[str, List[Tuple[int, str, object]]]
+
+
+def generate_school(
+    classes: int = 6,
+    students_per_class: int = 40,
+    subjects: int = 10,
+    terms: int = 3,
+    session: str = "2024/2025",
+    seed: int = 42,
+    junk_rate: float = 0.005,
+) -> School:
+    """A deterministic school; the same arguments always give the same data."""
+    if classes > len(CLASSES) or subjects > len(SUBJECTS) or terms > len(TERMS):
+        raise ValueError(f"At most {len(CLASSES)} classes, {len(SUBJECTS)} subjects and {len(TERMS)} terms.")
+    total = classes * students_per_class
+    capacity = len(FIRST_NAMES) * len(MIDDLE_NAMES) * len(LAST_NAMES)
+    if total > capacity:
+        raise ValueError(f"At most {capacity} students.")
+
+    rng = random.Random(seed)
+    # Distinct names: a random sample of positions in first x middle x last
+    students = []
+    for i, position in enumerate(rng.sample(range(capacity), total)):
+        first = FIRST_NAMES[position % len(FIRST_NAMES)]
+        middle = MIDDLE_NAMES[position // len(FIRST_NAMES) % len(MIDDLE_NAMES)]
+        last = LAST_NAMES[position // (len(FIRST_NAMES) * len(MIDDLE_NAMES))]
+        students.append(Student(
+            username=f"STU{i:05d}",
+            full_name=f"{first} {middle} {last}",
+            password=f"pw{i:05d}",
+            student_class=CLASSES[i % classes],
+        ))
+
+    subject_names = SUBJECTS[:subjects]
+    term_names = TERMS[:terms]
+    # Each student has an ability level so averages and positions are spread out
+    ability = [rng.gauss(62, 12) for _ in students]
+    scores = {}
+    for term in term_names:
+        rows = []
+        for index in range(total):
+            for subject in subject_names:
+                if rng.random() < junk_rate:
+                    rows.append((index, subject, rng.choice(["absent", "", "N/A"])))
+                else:
+                    rows.append((index, subject, round(min(100, max(0, rng.gauss(ability[index], 10))), 1)))
+        scores[term] = rows
+
+    return School(students, subject_names, term_names, session, scores)
+
+
+def noisy_name(name: str, rng: random.Random) -> str:
+    """name as a teacher might type it, using one of NOISE_KINDS."""
+    kind = rng.choice(NOISE_KINDS)
+    parts = name.split()
+    if kind == "case":
+        return name.upper() if rng.random() < 0.5 else name.lower()
+    if kind == "spacing":
+        return "  ".join(parts) + " "
+    if kind == "order":
+        return " ".join([parts[-1]] + parts[:-1])
+    if kind == "no_middle" and len(parts) > 2:
+        return f"{parts[0]} {parts[-1]}"
+    # typo: drop, double or swap one letter of the longest word
+    word = max(range(len(parts)), key=lambda i: len(parts[i]))
+    letters = list(parts[word])
+    at = rng.randrange(1, len(letters) - 1)
+    edit = rng.choice(("drop", "double", "swap"))
+    if edit == "drop":
+        del letters[at]
+    elif edit == "double":
+        letters.insert(at, letters[at])
+    else:
+        letters[at], letters[at + 1] = letters[at + 1], letters[at]
+    parts[word] = "".join(letters)
+    return " ".join(parts)
+
+
+def write_students_csv(school: School, path: str) -> str:
+    """The roster in the columns /auth/bulk-register-csv expects."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["full_name", "username", "password", "role"])
+        for student in school.students:
+            writer.writerow([student.full_name, student.username, student.password, "student"])
+    return path
+
+
+def result_sheet_name(term: str, session: str, fmt: str = "csv") -> str:
+    """A filename parse_term_session understands, e.g. First_Term_2024_2025.csv."""
+    return f"{term.replace(' ', '_')}_{session.replace('/', '_')}.{fmt}"
+
+
+def write_result_sheets(
+    school: School,
+    directory: str,
+    fmt: str = "csv",
+    noise: float = 0.1,
+    seed: int = 7,
+) -> List[str]:
+    """
+    One upload file per term. noise is the share of students whose name is
+    misspelled (consistently across their rows in a sheet).
+    """
+    if fmt not in ("csv", "xlsx"):
+        raise ValueError("fmt must be csv or xlsx")
+    rng = random.Random(seed)
+    paths = []
+    for term in school.terms:
+        names = [
+            noisy_name(student.full_name, rng) if rng.random() < noise else student.full_name
+            for student in school.students
+        ]
+        rows = [
+            (names[index], school.students[index].student_class, subject, percentage)
+            for index, subject, percentage in school.scores[term]
+        ]
+        path = os.path.join(directory, result_sheet_name(term, school.session, fmt))
+        if fmt == "csv":
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["Student Name", "Class", "Subject", "Percentage"])
+                writer.writerows(rows)
+        else:
+            import pandas as pd
+
+            pd.DataFrame(rows, columns=["Student Name", "Class", "Subject", "Percentage"]).to_excel(path, index=False)
+        paths.append(path)
+    return paths
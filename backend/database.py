@@ -1,9 +1,13 @@
 # backend/database.py
 import os
+from typing import Any, Callable
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
+from utils.metrics import instrument_engine
 
 load_dotenv()
 
@@ -24,10 +28,51 @@ engine = create_engine(
     pool_size=10,
     max_overflow=20
 )
+# Per-request query counts and SQL time for /metrics and Server-Timing
+instrument_engine(engine)
 
 # Create a session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# "sync" (default) or "async". With async, request handlers talk to the database
+# through an AsyncEngine (asyncpg on PostgreSQL, aiosqlite on SQLite) instead of
+# the threadpool. Background jobs and streaming responses keep using the sync
+# engine in both modes. benchmarks/bench_load.py compares the two.
+DB_MODE = os.getenv("DB_MODE", "sync").lower()
+
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_url(url: str):
+    """The async-driver form of a sync database URL."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"DB_MODE=async is not supported for {backend} databases.")
+    query = dict(url.query)
+    # asyncpg takes ssl=..., not libpq's sslmode=...
+    if backend == "postgresql" and "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    return url.set(drivername=_ASYNC_DRIVERS[backend], query=query)
+
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_MODE == "async":
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        async_database_url(DATABASE_URL),
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20
+    )
+    instrument_engine(async_engine.sync_engine)
+    # expire_on_commit=False: attributes must not lazy-load after the handler's run() returns
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+elif DB_MODE != "sync":
+    raise ValueError(f"DB_MODE must be 'sync' or 'async', not {DB_MODE!r}.")
+
 # Base class for models
 Base = declarative_base()
 
@@ -38,3 +83,36 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+
+class AsyncDB:
+    """
+    What async handlers get from get_async_db.
+
+    run(fn, *args) calls a sync ORM helper as fn(session, *args) without blocking
+    the event loop: on an AsyncSession via run_sync when DB_MODE=async, otherwise
+    on a regular Session in the threadpool. Helpers are written once, for Session,
+    and work in both modes.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        if isinstance(self.session, Session):
+            return await run_in_threadpool(fn, self.session, *args, **kwargs)
+        return await self.session.run_sync(fn, *args, **kwargs)
+
+
+# Dependency for async FastAPI routes
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        db = SessionLocal()
+        try:
+            yield AsyncDB(db)
+        finally:
+            await run_in_threadpool(db.close)
+    else:
+        async with AsyncSessionLocal() as session:
+            yield AsyncDB(session)
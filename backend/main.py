@@ -1,24 +1,42 @@
 # backend/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from routers import auth, results  
-from database import Base, engine
+from database import async_engine
+from migrate import AUTO_MIGRATE, migrate
+from utils.jobs import resume_pending_jobs
+from utils.metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, render_metrics
+from utils.report_export import shutdown_export_pools
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create missing tables here rather than at import (see migrate.py)
+    if AUTO_MIGRATE:
+        migrate()
+    # Pick up uploads that were queued or running when the last process stopped
+    resume_pending_jobs()
+    yield
+    shutdown_export_pools()
+    if async_engine is not None:
+        await async_engine.dispose()
 
-app = FastAPI(title="School Result Management System")
+
+app = FastAPI(title="School Result Management System", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "Server-Timing", "Content-Disposition", "X-Report-Cards"]
 )
+# Outermost, so its timings include CORS handling
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/")
 def home():
@@ -29,5 +47,10 @@ def home():
 async def status():
     return Response(status_code=200)
 
+@app.get("/metrics")
+def metrics():
+    """Request latency, SQL and LLM histograms per route, in the Prometheus text format."""
+    return Response(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 app.include_router(auth.router)
 app.include_router(results.router)
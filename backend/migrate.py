@@ -0,0 +1,79 @@
+# backend/migrate.py
+"""
+Schema management, as an explicit step instead of a side effect of importing main.
+
+    python -m migrate
+
+creates missing tables, then brings existing tables up to the models: new
+nullable columns are added and missing indexes created. Nothing is dropped or
+altered; a change beyond that needs a hand-written migration. The app also runs
+it at startup while AUTO_MIGRATE is on (the default), which keeps
+single-instance deployments working; with several workers or replicas, run it
+once per deploy and set AUTO_MIGRATE=false so each one boots without touching
+the schema.
+"""
+
+import os
+from typing import List
+from sqlalchemy import inspect, text
+from database import Base, engine
+import models  # noqa: F401  (registers every table on Base.metadata)
+
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "true").lower() in ("1", "true", "yes")
+
+
+def _create_missing_tables(conn) -> List[str]:
+    inspector = inspect(conn)
+    missing = [table for table in Base.metadata.sorted_tables if not inspector.has_table(table.name)]
+    Base.metadata.create_all(bind=conn, tables=missing)
+    return [f"created table {table.name}" for table in missing]
+
+
+def _add_missing_columns(conn) -> List[str]:
+    """
+    create_all leaves existing tables alone, so columns added to a model later are
+    added here. Only nullable columns without a server default can be added this way.
+    """
+    inspector = inspect(conn)
+    quote = conn.dialect.identifier_preparer.quote
+    changes = []
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable or column.server_default is not None:
+                raise RuntimeError(f"Cannot add column {table.name}.{column.name} automatically")
+            conn.execute(text(
+                f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} "
+                f"{column.type.compile(dialect=conn.dialect)}"
+            ))
+            changes.append(f"added column {table.name}.{column.name}")
+    return changes
+
+
+def _create_missing_indexes(conn) -> List[str]:
+    """create_all only indexes the tables it creates; indexes added to a model later are created here."""
+    inspector = inspect(conn)
+    changes = []
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=conn)
+                changes.append(f"created index {index.name}")
+    return changes
+
+
+def migrate() -> List[str]:
+    """Brings the schema up to the models in one transaction; returns what was changed."""
+    with engine.begin() as conn:
+        return _create_missing_tables(conn) + _add_missing_columns(conn) + _create_missing_indexes(conn)
+
+
+if __name__ == "__main__":
+    url = engine.url.render_as_string(hide_password=True)
+    changes = migrate()
+    for change in changes:
+        print(change)
+    print(f"Schema is up to date on {url}" if not changes else f"{len(changes)} change(s) applied on {url}")
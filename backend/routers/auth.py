@@ -1,155 +1,352 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 import models, schemas
-from database import get_db
-import bcrypt
+from database import AsyncDB, SessionLocal, get_async_db, get_db
+import codecs
 import csv
+import hmac
+import json
+from typing import Any, Dict, Iterator, List
+from utils.auth_tokens import (
+    ALLOW_USER_ID_HEADER, Principal, cache_principal, cached_principal, fetch_principal, invalidate_principal,
+    issue_token, password_stamp, principal_from_user, read_token,
+)
+from utils.name_matching import invalidate_name_index
+from utils.passwords import (
+    hash_password_async, iter_password_hashes, password_needs_rehash, verify_password_async,
+)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+# Hashes between progress lines when bulk registration streams its progress
+BULK_PROGRESS_EVERY = 50
 
-# password hashing
-def get_password_hash(password: str) -> str:
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+# Bad rows named in a rejected bulk registration; the count covers all of them
+BULK_REPORTED_ERRORS = 10
 
-
-# password verification
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(
-        plain_password.encode("utf-8"),
-        hashed_password.encode("utf-8")
-    )
+BULK_REQUIRED_FIELDS = ("username", "full_name", "password")
 
 
-# get current user using header
-def get_current_user(
+# get current user from a session token (Authorization: Bearer). The X-User-Id
+# header of older clients is only honoured with ALLOW_USER_ID_HEADER. Identity comes from the principal cache, so a
+# request normally costs no database round-trip.
+async def get_current_user(
+    authorization: str = Header(None),
     x_user_id: int = Header(None, alias="X-User-Id"),
-    db: Session = Depends(get_db)
-):
-    if x_user_id is None:
-        raise HTTPException(status_code=401, detail="Missing X-User-Id header")
-
-    user = db.query(models.User).filter(models.User.id == x_user_id).first()
+    db: AsyncDB = Depends(get_async_db)
+) -> Principal:
+    stamp = None
+    if authorization and authorization.lower().startswith("bearer "):
+        token = read_token(authorization[7:].strip())
+        if token is None:
+            raise HTTPException(status_code=401, detail="Invalid or expired session token")
+        user_id, stamp = token
+    elif x_user_id is not None and ALLOW_USER_ID_HEADER:
+        user_id = x_user_id
+    else:
+        raise HTTPException(status_code=401, detail="Missing session token")
+
+    user = cached_principal(user_id) or await db.run(fetch_principal, user_id)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
+    if not user.is_active:
+        raise HTTPException(status_code=401, detail="User is deactivated")
+    if stamp is not None and not hmac.compare_digest(stamp, user.password_stamp):
+        raise HTTPException(status_code=401, detail="Session ended by a password change")
 
     return user
 
 
+# The register/login/change-password handlers are async so bcrypt runs on its own
+# bounded executor (utils/passwords.py). Their database work goes through
+# AsyncDB.run, and read transactions are closed before hashing so a login
+# burst does not hold pool connections while it waits for bcrypt.
+def _username_taken(db: Session, username: str) -> bool:
+    try:
+        return db.query(models.User.id).filter(models.User.username == username).first() is not None
+    finally:
+        db.rollback()
+
+
+def _add_user(db: Session, **fields) -> int:
+    new_user = models.User(**fields)
+    db.add(new_user)
+    db.flush()
+    user_id = new_user.id
+    db.commit()
+    return user_id
+
+
+def _active_login(db: Session, username: str):
+    try:
+        return db.query(
+            models.User.id,
+            models.User.username,
+            models.User.password,
+            models.User.role,
+            models.User.is_active,
+            models.User.must_change_password,
+        ).filter(
+            models.User.username == username,
+            models.User.is_active == True
+        ).first()
+    finally:
+        db.rollback()
+
+
+def _password_hash(db: Session, user_id: int) -> str:
+    try:
+        return db.query(models.User.password).filter(models.User.id == user_id).scalar()
+    finally:
+        db.rollback()
+
+
+def _set_password(db: Session, user_id: int, hashed_password: str, **fields):
+    db.query(models.User).filter(models.User.id == user_id).update(
+        {"password": hashed_password, **fields}, synchronize_session=False
+    )
+    db.commit()
+    invalidate_principal(user_id)
+
+
 # admin register single user
 @router.post("/register")
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(models.User).filter(
-        models.User.username == user.username
-    ).first()
-
-    if existing:
+async def register_user(user: schemas.UserCreate, db: AsyncDB = Depends(get_async_db)):
+    if await db.run(_username_taken, user.username):
         raise HTTPException(status_code=400, detail="Username already exists")
 
-    new_user = models.User(
+    hashed_password = await hash_password_async(user.password)
+    user_id = await db.run(
+        _add_user,
         username=user.username,
         full_name=user.full_name,
-        password=get_password_hash(user.password),
+        password=hashed_password,
         role=user.role,
         must_change_password=True,
         is_active=True
     )
-
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    invalidate_name_index()
 
     return {
         "message": "User registered successfully",
-        "user_id": new_user.id
+        "user_id": user_id
     }
 
 
 # bulk register students from csv
-@router.post("/bulk-register-csv")
-def bulk_register_from_csv(db: Session = Depends(get_db)):
-    created_users = []
-
+def _read_students_csv(file: UploadFile = None) -> List[Dict[str, str]]:
+    """Rows of an uploaded students CSV, or of ./students.csv when none is uploaded."""
+    if file is not None:
+        reader = csv.DictReader(codecs.iterdecode(file.file, "utf-8-sig"))
+        return list(reader)
+    with open("./students.csv", newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def _invalid_student_rows(rows: List[Dict[str, str]]) -> List[str]:
+    """One message per row missing a required field or left blank there (short rows read as None)."""
+    errors = []
+    for line, row in enumerate(rows, start=2):
+        blank = [field for field in BULK_REQUIRED_FIELDS if not (row.get(field) or "").strip()]
+        if blank:
+            errors.append(f"row {line}: missing {', '.join(blank)}")
+    return errors
+
+
+def _new_students(db: Session, rows: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Rows whose username is not taken, checked with one IN query; repeats in the file keep the first."""
+    by_username = {}
+    for row in rows:
+        username = (row.get("username") or "").strip()
+        if username and username not in by_username:
+            by_username[username] = row
+
+    existing = {
+        username for (username,) in
+        db.query(models.User.username).filter(models.User.username.in_(list(by_username))).all()
+    } if by_username else set()
+
+    return [
+        {**row, "username": username}
+        for username, row in by_username.items()
+        if username not in existing
+    ]
+
+
+def _register_students(rows: List[Dict[str, str]]) -> Iterator[Dict[str, Any]]:
+    """
+    Hashes the passwords across the process pool and inserts the users in bulk,
+    yielding progress events and finally {"status": "done", "created", "usernames"}.
+    Uses its own session since it may run while the response is streaming.
+    """
+    total = len(rows)
+    yield {"status": "hashing", "done": 0, "total": total}
+
+    users = []
+    hashes = iter_password_hashes([row["password"] for row in rows])
+    for done, (row, password) in enumerate(zip(rows, hashes), start=1):
+        users.append({
+            "username": row["username"],
+            "full_name": row["full_name"].strip(),
+            "password": password,
+            "role": row.get("role") or "student",
+            "must_change_password": True,
+            "is_active": True,
+        })
+        if done % BULK_PROGRESS_EVERY == 0 and done < total:
+            yield {"status": "hashing", "done": done, "total": total}
+
+    yield {"status": "inserting", "done": total, "total": total}
+    db = SessionLocal()
     try:
-        with open("./students.csv", newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-
-            for row in reader:
-                username = row["username"].strip()
-
-                exists = db.query(models.User).filter(
-                    models.User.username == username
-                ).first()
-
-                if exists:
-                    continue
-
-                new_user = models.User(
-                    username=username,
-                    full_name=row["full_name"].strip(),
-                    password=get_password_hash(row["password"]),
-                    role=row.get("role", "student"),
-                    must_change_password=True,
-                    is_active=True
-                )
+        db.bulk_insert_mappings(models.User, users)
+        db.commit()
+    finally:
+        db.close()
+    invalidate_name_index()
 
-                db.add(new_user)
-                created_users.append(username)
+    usernames = [user["username"] for user in users]
+    yield {"status": "done", "created": len(usernames), "usernames": usernames}
 
-        db.commit()
 
+@router.post("/bulk-register-csv")
+def bulk_register_from_csv(
+    file: UploadFile = File(None),
+    stream: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Registers students from an uploaded CSV (full_name, username, password, role),
+    falling back to ./students.csv. Existing usernames are skipped. A file with rows
+    missing a username, full_name or password is rejected (400) naming those rows.
+    With ?stream=true the response is NDJSON progress lines ending with the summary.
+    """
+    try:
+        rows = _read_students_csv(file)
     except FileNotFoundError:
         raise HTTPException(
             status_code=500,
             detail="students.csv file not found"
         )
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read CSV: {e}")
 
+    missing = set(BULK_REQUIRED_FIELDS) - set(rows[0]) if rows else set()
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing columns: {', '.join(sorted(missing))}")
+
+    # Nothing is registered from a file with bad rows, so it can be fixed and sent again as a whole
+    errors = _invalid_student_rows(rows)
+    if errors:
+        more = len(errors) - BULK_REPORTED_ERRORS
+        raise HTTPException(
+            status_code=400,
+            detail=f"{len(errors)} invalid row(s): " + "; ".join(errors[:BULK_REPORTED_ERRORS])
+            + (f"; and {more} more" if more > 0 else ""),
+        )
+
+    new_rows = _new_students(db, rows)
+    events = _register_students(new_rows)
+
+    if stream:
+        return StreamingResponse(
+            (json.dumps(event) + "\n" for event in events),
+            media_type="application/x-ndjson",
+        )
+
+    *_, summary = events
     return {
-        "created": len(created_users),
-        "usernames": created_users
+        "created": summary["created"],
+        "usernames": summary["usernames"]
     }
 
 
 # login
 @router.post("/login")
-def login_user(user: schemas.UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(
-        models.User.username == user.username,
-        models.User.is_active == True
-    ).first()
+async def login_user(user: schemas.UserLogin, db: AsyncDB = Depends(get_async_db)):
+    db_user = await db.run(_active_login, user.username)
 
     if not db_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    if not verify_password(user.password, db_user.password):
+    if not await verify_password_async(user.password, db_user.password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    principal = principal_from_user(db_user)
+
+    # Upgrade hashes made with an older work factor while we have the plain password
+    if password_needs_rehash(db_user.password):
+        rehashed = await hash_password_async(user.password)
+        await db.run(_set_password, db_user.id, rehashed)
+        principal = principal._replace(password_stamp=password_stamp(rehashed))
+
+    # Warm the principal cache so the client's next authenticated call skips the database
+    cache_principal(principal)
+
     return {
         "message": "Login successful",
         "user_id": db_user.id,
         "username": db_user.username,
         "role": db_user.role,
-        "must_change_password": db_user.must_change_password
+        "must_change_password": db_user.must_change_password,
+        "access_token": issue_token(principal),
+        "token_type": "bearer"
     }
 
 
 # change password (student)
 @router.post("/change-password")
-def change_password(
+async def change_password(
     old_password: str,
     new_password: str,
-    current_user=Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncDB = Depends(get_async_db)
 ):
-    if not verify_password(old_password, current_user.password):
+    hashed_password = await db.run(_password_hash, current_user.id)
+
+    if not await verify_password_async(old_password, hashed_password):
         raise HTTPException(status_code=400, detail="Old password is incorrect")
 
-    current_user.password = get_password_hash(new_password)
-    current_user.must_change_password = False
+    new_hash = await hash_password_async(new_password)
+    await db.run(_set_password, current_user.id, new_hash, must_change_password=False)
+
+    # Tokens issued against the old password stop working; hand out a fresh one
+    principal = current_user._replace(must_change_password=False, password_stamp=password_stamp(new_hash))
+    cache_principal(principal)
+
+    return {
+        "message": "Password changed successfully",
+        "access_token": issue_token(principal),
+        "token_type": "bearer"
+    }
+
 
+def _deactivate(db: Session, user_id: int) -> bool:
+    updated = db.query(models.User).filter(models.User.id == user_id).update(
+        {"is_active": False}, synchronize_session=False
+    )
     db.commit()
+    return updated > 0
+
+
+# deactivate a user (admin)
+@router.post("/users/{user_id}/deactivate")
+async def deactivate_user(
+    user_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncDB = Depends(get_async_db)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can deactivate users")
+
+    if not await db.run(_deactivate, user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    invalidate_principal(user_id)
+    invalidate_name_index()
 
     return {
-        "message": "Password changed successfully"
+        "message": "User deactivated",
+        "user_id": user_id
     }
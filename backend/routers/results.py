@@ -1,132 +1,119 @@
 # backend/routers/results.py
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from sqlalchemy import func
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-import pandas as pd
-from io import BytesIO
-from database import get_db
+from database import AsyncDB, get_async_db, get_db
 import models
-import statistics
-import re
-from utils.groq_agent import generate_student_report
+import json
+import logging
+import os
+from typing import Optional
+from urllib.parse import urlencode
+from utils.ingest import (
+    REQUIRED_COLUMNS, BATCH_SIZE, CHUNK_ROWS,
+    parse_term_session, spool_upload, read_upload_columns, process_results_upload,
+)
+from utils.jobs import UPLOAD_DIR, create_job, submit_job, job_status, register_job_handler
+from utils.student_results import load_student_results
+from utils.aggregates import PASS_MARK, filter_options, score_histogram, subject_summaries, top_scorers
+from utils.archive import archived_sessions
+from utils.report_cache import cache_stats, get_cached_report, report_input_hash, stream_and_cache_report
+from utils.report_pregen import PREGENERATE_REPORTS
+from utils.report_cards import FORMATS, pdf_available
+from utils.report_export import ANALYSIS_MODES, export_filename, load_report_cards, report_cards_zip
+from utils.auth_tokens import Principal
+from routers.auth import get_current_user
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/results", tags=["Results"])
 
-@router.post("/upload")
+@register_job_handler("upload")
+def run_upload_job(db: Session, job: models.BackgroundJob, progress):
+    result = process_results_upload(
+        db, job.file_path, job.filename,
+        batch_size=job.params.get("batch_size"),
+        chunk_rows=job.params.get("chunk_rows"),
+        progress=progress,
+    )
+
+    # --- Optionally queue report pre-generation for every affected student ---
+    if job.params.get("pregenerate"):
+        report_job = create_job(db, "report_pregen", params={"class_terms": result["class_terms"]})
+        submit_job(report_job.id)
+        result["report_job_id"] = report_job.id
+
+    return result
+
+
+@router.post("/upload", status_code=202)
 async def upload_results(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    batch_size: int = Query(BATCH_SIZE, ge=1, le=50000),
+    chunk_rows: int = Query(CHUNK_ROWS, ge=100, le=100000),
+    pregenerate: bool = Query(PREGENERATE_REPORTS),
+    db: AsyncDB = Depends(get_async_db),
 ):
     """
     Upload CSV/XLSX of results.
-    Deletes results from previous sessions before inserting new session.
+    The file is spooled to disk and queued; poll /results/jobs/{job_id} for progress
+    and the final report. The job moves results from previous sessions to the
+    archive (see /results/archive) before inserting the new session, and processes
+    chunk_rows rows at a time.
+    With pregenerate, a follow-up job generates every affected student's report.
     """
-    try:
-        contents = await file.read()
-        filename = file.filename.lower()
-        buf = BytesIO(contents)
-
-        # --- Extract term and session from filename ---
-        term_match = re.search(r"(first|second|third)[_\s-]*term", filename, re.IGNORECASE)
-        session_match = re.search(r"(\d{4})[_\s-]*(\d{4})", filename)
-
-        term = term_match.group(1).capitalize() + " Term" if term_match else "Unknown Term"
-        session = f"{session_match.group(1)}/{session_match.group(2)}" if session_match else "Unknown Session"
-
-        # --- Load file content ---
-        if filename.endswith(".csv"):
-            df = pd.read_csv(buf)
-        elif filename.endswith((".xlsx", ".xls")):
-            df = pd.read_excel(buf)
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file format. Use CSV or Excel (.xlsx/.xls)")
-
-        # --- Check for required columns ---
-        required_cols = {"Student Name", "Class", "Subject", "Percentage"}
-        missing = required_cols - set(df.columns)
-        if missing:
-            raise HTTPException(status_code=400, detail=f"Missing columns: {', '.join(missing)}")
-
-        # --- Delete old session before adding new session results ---
-        if session != "Unknown Session":
-            db.query(models.StudentResult).filter(models.StudentResult.session != session).delete()
-            db.commit()
-
-        records_added = 0
-        mismatched_students = []
-        teacher_id = None
-
-        # --- Handle term ---
-        if term_match:
-            term_text = term_match.group(1).lower()
-            term_map = {"1st": "First Term", "first": "First Term",
-                        "2nd": "Second Term", "second": "Second Term",
-                        "3rd": "Third Term", "third": "Third Term"}
-            term = term_map.get(term_text, "Unknown Term")
-        else:
-            term = "Unknown Term"
-
-        # --- Handle session ---
-        if session_match:
-            yr1, yr2 = session_match.groups()
-            if len(yr2) == 2:
-                yr2 = "20" + yr2
-            session = f"{yr1}/{yr2}"
-        else:
-            session = "Unknown Session"
-
-        # --- Insert results into database ---
-        for _, row in df.iterrows():
-            try:
-                name = str(row["Student Name"]).strip()
-                student_class = str(row["Class"]).strip()
-                subject = str(row["Subject"]).strip()
-                percentage = float(row["Percentage"])
-            except Exception:
-                continue
-
-            user = (
-                db.query(models.User)
-                .filter(
-                    (models.User.username.ilike(name)) |
-                    (models.User.full_name.ilike(name))
-                )
-                .first()
-            )
-
-            student_id = user.id if user else None
-            if not user:
-                mismatched_students.append(name)
-
-            new_result = models.StudentResult(
-                name=name,
-                student_class=student_class,
-                subject=subject,
-                percentage=percentage,
-                student_id=student_id,
-                teacher_id=teacher_id,
-                term=term,
-                session=session,
-            )
-
-            db.add(new_result)
-            records_added += 1
-
-        db.commit()
-        db.close()
-
-        msg = f"{records_added} results uploaded successfully for {term} ({session})."
-        if mismatched_students:
-            msg += f" {len(mismatched_students)} names not matched: {', '.join(mismatched_students[:5])}..."
-
-        return {"message": msg, "term": term, "session": session, "records_added": records_added}
+    filename = file.filename.lower()
+    if not filename.endswith((".csv", ".xlsx", ".xls")):
+        raise HTTPException(status_code=400, detail="Unsupported file format. Use CSV or Excel (.xlsx/.xls)")
+
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    path = await spool_upload(file, suffix=os.path.splitext(filename)[1], directory=UPLOAD_DIR)
 
+    # --- Check for required columns before queueing ---
+    try:
+        missing = REQUIRED_COLUMNS - await run_in_threadpool(read_upload_columns, path, filename)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        os.unlink(path)
+        raise HTTPException(status_code=400, detail=f"Could not read file: {e}")
+    if missing:
+        os.unlink(path)
+        raise HTTPException(status_code=400, detail=f"Missing columns: {', '.join(missing)}")
+
+    term, session = parse_term_session(filename)
+    job = await db.run(
+        create_job, "upload", filename=file.filename, file_path=path,
+        params={"batch_size": batch_size, "chunk_rows": chunk_rows, "pregenerate": pregenerate,
+                "term": term, "session": session},
+    )
+    submit_job(job.id)
+
+    return {
+        "message": f"Upload queued for {term} ({session}).",
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/results/jobs/{job.id}",
+        "term": term,
+        "session": session,
+    }
+
+
+def _job_status(db: Session, job_id: str):
+    job = db.query(models.BackgroundJob).filter(models.BackgroundJob.id == job_id).first()
+    return job_status(job) if job else None
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, db: AsyncDB = Depends(get_async_db)):
+    """Status, progress, timing and (once finished) the result or error of a background job."""
+    status = await db.run(_job_status, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
 
 
 @router.get("/myResults")
-def get_student_result(username: str = None, db: Session = Depends(get_db)):
+async def get_student_result(username: str = None, db: AsyncDB = Depends(get_async_db)):
     """
     Returns results for a student by username.
     Includes all terms, min/max/median per subject per term.
@@ -134,164 +121,213 @@ def get_student_result(username: str = None, db: Session = Depends(get_db)):
     if not username:
         raise HTTPException(status_code=400, detail="username query parameter is required")
 
+    return await db.run(_student_result, username)
+
+
+def _student_result(db: Session, username: str):
     user = db.query(models.User).filter(models.User.username == username).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Fetch all results for this student
-    results = db.query(models.StudentResult).filter(models.StudentResult.student_id == user.id).all()
-
-    # Name fallback
-    if not results:
-        results = db.query(models.StudentResult).filter(
-            models.StudentResult.name.ilike(f"%{user.username}%")
-        ).all()
-        if not results and user.full_name:
-            results = db.query(models.StudentResult).filter(
-                models.StudentResult.name.ilike(f"%{user.full_name}%")
-            ).all()
-        for r in results:
-            if r.student_id is None:
-                r.student_id = user.id
-        db.commit()
-
-    if not results:
+    student = load_student_results(db, user)
+    if student is None:
         return {"results": [], "academic_analysis": None}
+    results_data = student["results"]
 
-    # Group results per term for position
-    term_positions = {}
-    results_data = []
-
-    # Determine latest term for default selection
-    term_order = {"First Term": 1, "Second Term": 2, "Third Term": 3}
-    available_terms = list(set([r.term for r in results]))
-    latest_term = max(available_terms, key=lambda t: term_order.get(t, 0))
-
-    for term in available_terms:
-        # all student results in this term
-        term_results = [r for r in results if r.term == term]
-
-        if not term_results:
-            continue
-
-        # Compute ranking
-        student_class = term_results[0].student_class
-
-        class_students = (
-            db.query(models.StudentResult.student_id)
-            .filter(models.StudentResult.student_class == student_class,
-                    models.StudentResult.term == term)
-            .distinct()
-            .all()
-        )
-        
-        # Get max number of subjects taken by any student in this class/term
-        max_subjects = (
-            db.query(func.count(func.distinct(models.StudentResult.subject)))
-            .filter(
-            models.StudentResult.student_class == student_class,
-            models.StudentResult.term == term)
-            .group_by(models.StudentResult.student_id)
-            .all()
-)
-        max_subject_count = max([count for (count,) in max_subjects]) if max_subjects else 1
-
-        class_average_map = {}
-        for (sid,) in class_students:
-            if sid is None:
-                continue
-            scores = db.query(models.StudentResult).filter(
-            models.StudentResult.student_id == sid,
-            models.StudentResult.student_class == student_class,
-            models.StudentResult.term == term
-            ).all()
-            if scores:
-                total = sum([s.percentage for s in scores])
-                avg = total / max_subject_count  # Divide by max, not student's count
-                class_average_map[sid] = avg
-        
-        sorted_avgs = sorted(class_average_map.values(), reverse=True)
-        student_avg = class_average_map.get(user.id)
-        position = next(
-        (i + 1 for i, avg in enumerate(sorted_avgs) if abs(avg - student_avg) < 0.0001),
-        None
-)       if student_avg is not None else None
-
-        def ordinal(n):
-            return "%d%s" % (
-                n,
-                "tsnrhtdd"[(n // 10 % 10 != 1) * (n % 10 < 4) * n % 10::4]
-            ) if n else ""
-
-        term_positions[term] = {
-            "position": position,
-            "position_label": ordinal(position),
-            "average_score": student_avg,
-            "subjects_taken": len(term_results),
-            "total_subjects": max_subject_count,
-            "total_students": len(class_average_map)
-        }
-
-        # Class subject stats
-        subjects_in_class = db.query(models.StudentResult.subject).filter(
-            models.StudentResult.student_class == student_class,
-            models.StudentResult.term == term
-        ).distinct().all()
-
-        class_subject_stats = {}
-        for (subject,) in subjects_in_class:
-            subject_scores = [
-                r.percentage
-                for r in db.query(models.StudentResult)
-                .filter(models.StudentResult.student_class == student_class,
-                        models.StudentResult.subject == subject,
-                        models.StudentResult.term == term)
-                .all()
-            ]
-            if subject_scores:
-                class_subject_stats[subject] = {
-                    "min": min(subject_scores),
-                    "max": max(subject_scores),
-                    "median": statistics.median(subject_scores)
-                }
-
-        for r in term_results:
-            results_data.append({
-                "name": r.name,
-                "student_class": r.student_class,
-                "subject": r.subject,
-                "percentage": r.percentage,
-                "term": r.term,
-                "session": r.session,
-                "total_subjects": max_subject_count,
-                "subjects_taken": len(term_results),
-                "min_score_in_class": class_subject_stats.get(r.subject, {}).get("min", 0),
-                "max_score_in_class": class_subject_stats.get(r.subject, {}).get("max", 0),
-                "median_score_in_class": class_subject_stats.get(r.subject, {}).get("median", 0)
-            })
-
-    # Academic analysis (latest term)
+    # Academic analysis only if already generated for these scores; otherwise the
+    # client streams it from /results/myResults/analysis
     academic_analysis = None
     try:
-                academic_analysis = generate_student_report(results_data)
-    except Exception as e:
-            print(f"Report generation error: {e}")  # check terminal
-            academic_analysis = None
+        academic_analysis = get_cached_report(db, user.id, report_input_hash(results_data))
+    except Exception:
+        logger.warning("Report cache read failed for student %s", user.id, exc_info=True)
+        academic_analysis = None
 
     return {
         "results": results_data,
         "academic_analysis": academic_analysis,
         "student_name": user.full_name or user.username,
-        "term_positions": term_positions,
-        "latest_term": latest_term
+        "term_positions": student["term_positions"],
+        "latest_term": student["latest_term"],
+        "analysis_url": f"/results/myResults/analysis?{urlencode({'username': username})}"
     }
 
 
+def _sse(data: dict, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@router.get("/myResults/analysis")
+def stream_student_analysis(username: str = None, db: Session = Depends(get_db)):
+    """
+    Streams a student's academic analysis as Server-Sent Events.
+    Each "message" event carries {"token": text}; concatenated they form the same
+    report /myResults returns in academic_analysis. Ends with a "done" event
+    ({"cached": bool}) or an "error" event.
+    """
+    if not username:
+        raise HTTPException(status_code=400, detail="username query parameter is required")
+
+    user = db.query(models.User).filter(models.User.username == username).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    student = load_student_results(db, user)
+    if student is None:
+        raise HTTPException(status_code=404, detail="No results found")
+
+    results_data = student["results"]
+    cached = get_cached_report(db, user.id, report_input_hash(results_data))
+
+    def events():
+        if cached is not None:
+            yield _sse({"token": cached})
+            yield _sse({"cached": True}, "done")
+            return
+        try:
+            for piece in stream_and_cache_report(user.id, results_data):
+                yield _sse({"token": piece})
+        except Exception as e:
+            logger.exception("Report generation failed for student %s", user.id)
+            yield _sse({"error": str(e)}, "error")
+            return
+        yield _sse({"cached": False}, "done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/report-cache/stats")
+def get_report_cache_stats():
+    """Hit/miss counters for the in-memory and database report cache tiers."""
+    return cache_stats()
+
+
+# ---------- Dashboard aggregates ----------
+# Summary rows computed in the database so the admin dashboard never downloads
+# the results table. All take optional session/term/student_class/subject filters.
+
+@router.get("/stats/options")
+async def get_stats_options(db: AsyncDB = Depends(get_async_db)):
+    """Distinct session/term/class/subject combinations that have results."""
+    return await db.run(filter_options)
+
+
+@router.get("/stats/subjects")
+async def get_subject_stats(
+    session: Optional[str] = None,
+    term: Optional[str] = None,
+    student_class: Optional[str] = None,
+    subject: Optional[str] = None,
+    pass_mark: float = Query(PASS_MARK, ge=0, le=100),
+    db: AsyncDB = Depends(get_async_db),
+):
+    """Count, mean, median, min, max and pass rate per class/term/subject."""
+    return await db.run(
+        subject_summaries, pass_mark,
+        session=session, term=term, student_class=student_class, subject=subject,
+    )
+
+
+@router.get("/stats/top")
+async def get_top_scorers(
+    session: Optional[str] = None,
+    term: Optional[str] = None,
+    student_class: Optional[str] = None,
+    subject: Optional[str] = None,
+    n: int = Query(1, ge=1, le=50),
+    db: AsyncDB = Depends(get_async_db),
+):
+    """Top n scorers per class/term/subject (ties included)."""
+    return await db.run(
+        top_scorers, n,
+        session=session, term=term, student_class=student_class, subject=subject,
+    )
+
+
+@router.get("/stats/histogram")
+async def get_score_histogram(
+    session: Optional[str] = None,
+    term: Optional[str] = None,
+    student_class: Optional[str] = None,
+    subject: Optional[str] = None,
+    bin_width: int = Query(10, ge=1, le=50),
+    db: AsyncDB = Depends(get_async_db),
+):
+    """Score distribution per class/term/subject in bin_width-point bins."""
+    return await db.run(
+        score_histogram, bin_width,
+        session=session, term=term, student_class=student_class, subject=subject,
+    )
+
+
+# Default and maximum rows per page for the admin listing endpoints
+RESULTS_PAGE_SIZE = int(os.getenv("RESULTS_PAGE_SIZE", "500"))
+MAX_RESULTS_PAGE_SIZE = 5000
+
+
+def _results_page(
+    db: Session,
+    response: Response,
+    request: Request,
+    columns,
+    cursor: Optional[int],
+    limit: int,
+    model=models.StudentResult,
+    **filters,
+):
+    """
+    One keyset page of model rows ordered by id, after the given cursor id.
+    Only filters that are set are applied. When more rows follow, the next cursor
+    is returned in the X-Next-Cursor header and as a Link rel="next" URL.
+    """
+    R = model
+    query = db.query(*columns)
+    for column, value in filters.items():
+        if value is not None:
+            query = query.filter(getattr(R, column) == value)
+    if cursor is not None:
+        query = query.filter(R.id > cursor)
+
+    rows = query.order_by(R.id).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+    return rows
+
+
 @router.get("/all")
-def get_all_results(db: Session = Depends(get_db)):
-    """Returns all uploaded results for admin analytics."""
-    results = db.query(models.StudentResult).all()
-    if not results:
+async def get_all_results(
+    request: Request,
+    response: Response,
+    cursor: Optional[int] = Query(None, description="id of the last row of the previous page"),
+    limit: int = Query(RESULTS_PAGE_SIZE, ge=1, le=MAX_RESULTS_PAGE_SIZE),
+    session: Optional[str] = None,
+    term: Optional[str] = None,
+    student_class: Optional[str] = None,
+    subject: Optional[str] = None,
+    student_id: Optional[int] = None,
+    db: AsyncDB = Depends(get_async_db),
+):
+    """
+    Returns uploaded results for admin analytics, one page at a time.
+    Follow X-Next-Cursor (or the Link header) until it is absent to read everything.
+    """
+    R = models.StudentResult
+    results = await db.run(
+        _results_page, response, request,
+        (R.id, R.name, R.student_class, R.subject, R.percentage, R.term, R.session),
+        cursor, limit,
+        session=session, term=term, student_class=student_class,
+        subject=subject, student_id=student_id,
+    )
+    if not results and cursor is None:
         raise HTTPException(status_code=404, detail="No results found")
 
     return [
@@ -309,8 +345,26 @@ def get_all_results(db: Session = Depends(get_db)):
 
 
 @router.get("/class/{class_name}")
-def get_class_results(class_name: str, db: Session = Depends(get_db)):
-    results = db.query(models.StudentResult).filter(models.StudentResult.student_class == class_name).all()
+async def get_class_results(
+    class_name: str,
+    request: Request,
+    response: Response,
+    cursor: Optional[int] = Query(None, description="id of the last row of the previous page"),
+    limit: int = Query(RESULTS_PAGE_SIZE, ge=1, le=MAX_RESULTS_PAGE_SIZE),
+    session: Optional[str] = None,
+    term: Optional[str] = None,
+    subject: Optional[str] = None,
+    student_id: Optional[int] = None,
+    db: AsyncDB = Depends(get_async_db),
+):
+    R = models.StudentResult
+    results = await db.run(
+        _results_page, response, request,
+        (R.id, R.name, R.student_class, R.subject, R.percentage),
+        cursor, limit,
+        student_class=class_name, session=session, term=term,
+        subject=subject, student_id=student_id,
+    )
     if not results:
         return []
 
@@ -323,4 +377,92 @@ def get_class_results(class_name: str, db: Session = Depends(get_db)):
             "subject": r.subject,
             "percentage": r.percentage
         })
-    return out
\ No newline at end of file
+    return out
+
+
+@router.get("/export/report-cards")
+async def export_report_cards(
+    student_class: Optional[str] = None,
+    term: Optional[str] = None,
+    session: Optional[str] = None,
+    fmt: str = Query("html", alias="format", description="html or pdf"),
+    analysis: str = Query("cached", description="cached, template or none"),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncDB = Depends(get_async_db),
+):
+    """
+    Report cards for every student in a class, term or session, streamed as a ZIP
+    archive: summary.csv plus one HTML or PDF card per student, in a folder per class.
+    analysis=cached includes stored academic analyses (upload with ?pregenerate=true
+    to have them ready), template writes the missing ones with the local template
+    provider, none leaves them out. The LLM is never called.
+    """
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can export report cards")
+    if not (student_class or term or session):
+        raise HTTPException(status_code=400, detail="Give a student_class, term or session to export")
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format. Use {' or '.join(FORMATS)}")
+    if fmt == "pdf" and not pdf_available():
+        raise HTTPException(status_code=400, detail="PDF export is not available on this server. Use format=html")
+    if analysis not in ANALYSIS_MODES:
+        raise HTTPException(status_code=400, detail=f"analysis must be one of {', '.join(ANALYSIS_MODES)}")
+
+    cards = await db.run(load_report_cards, student_class, term, session, analysis)
+    if not cards:
+        raise HTTPException(status_code=404, detail="No results found")
+
+    return StreamingResponse(
+        report_cards_zip(cards, fmt),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{export_filename(student_class, term, session)}"',
+            "X-Report-Cards": str(len(cards)),
+        },
+    )
+
+
+@router.get("/archive/sessions")
+async def get_archived_sessions(db: AsyncDB = Depends(get_async_db)):
+    """Sessions moved out of the live results table by later uploads."""
+    return await db.run(archived_sessions)
+
+
+@router.get("/archive")
+async def get_archived_results(
+    request: Request,
+    response: Response,
+    session: str = Query(..., description="archived session, e.g. 2023/2024"),
+    cursor: Optional[int] = Query(None, description="id of the last row of the previous page"),
+    limit: int = Query(RESULTS_PAGE_SIZE, ge=1, le=MAX_RESULTS_PAGE_SIZE),
+    term: Optional[str] = None,
+    student_class: Optional[str] = None,
+    subject: Optional[str] = None,
+    student_id: Optional[int] = None,
+    db: AsyncDB = Depends(get_async_db),
+):
+    """Historical results of one archived session, paged like /results/all."""
+    A = models.ArchivedResult
+    results = await db.run(
+        _results_page, response, request,
+        (A.id, A.name, A.student_class, A.subject, A.percentage, A.term, A.session, A.archived_at),
+        cursor, limit, model=A,
+        session=session, term=term, student_class=student_class,
+        subject=subject, student_id=student_id,
+    )
+    if not results and cursor is None:
+        raise HTTPException(status_code=404, detail="No archived results found")
+
+    return [
+        {
+            "id": r.id,
+            "name": r.name,
+            "student_class": r.student_class,
+            "subject": r.subject,
+            "percentage": r.percentage,
+            "term": r.term,
+            "session": r.session,
+            "archived_at": r.archived_at,
+        }
+        for r in results
+    ]
@@ -0,0 +1,154 @@
+# backend/utils/aggregates.py
+
+import os
+from typing import Any, Dict, List, Optional
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+import models
+from utils.stats_engine import factorize, group_stats
+
+# Score counted as a pass in pass-rate summaries (the analysis prompts use 50% too).
+PASS_MARK = float(os.getenv("PASS_MARK", "50"))
+
+_GROUP_COLUMNS = ("session", "term", "student_class", "subject")
+
+
+def _apply_filters(query, filters: Dict[str, Optional[str]]):
+    R = models.StudentResult
+    for column, value in filters.items():
+        if value is not None:
+            query = query.filter(getattr(R, column) == value)
+    return query
+
+
+def _group_columns():
+    R = models.StudentResult
+    return [getattr(R, column) for column in _GROUP_COLUMNS]
+
+
+def subject_summaries(db: Session, pass_mark: float = PASS_MARK, **filters) -> List[Dict[str, Any]]:
+    """
+    One row per (session, term, student_class, subject) matching filters with
+    count, mean, median, min, max and pass rate.
+    The median is percentile_cont on PostgreSQL and computed by utils.stats_engine elsewhere.
+    """
+    R = models.StudentResult
+    groups = _group_columns()
+    passed = func.sum(case((R.percentage >= pass_mark, 1), else_=0))
+    aggregates = [
+        func.count(R.percentage),
+        func.avg(R.percentage),
+        func.min(R.percentage),
+        func.max(R.percentage),
+        passed,
+    ]
+    postgres = db.bind.dialect.name == "postgresql"
+    if postgres:
+        aggregates.append(func.percentile_cont(0.5).within_group(R.percentage))
+
+    rows = (
+        _apply_filters(db.query(*groups, *aggregates), filters)
+        .filter(R.percentage.isnot(None))
+        .group_by(*groups)
+        .order_by(*groups)
+        .all()
+    )
+
+    medians = {}
+    if not postgres and rows:
+        # SQLite has no percentile_cont; pull the scores once and take the medians in one vectorized pass.
+        score_rows = (
+            _apply_filters(db.query(*groups, R.percentage), filters)
+            .filter(R.percentage.isnot(None))
+            .all()
+        )
+        keys, codes = factorize(tuple(row[:4]) for row in score_rows)
+        summary = group_stats(codes, [row[4] for row in score_rows], len(keys), quantiles=(0.5,))
+        medians = dict(zip(keys, summary["quantiles"][0.5].tolist()))
+
+    summaries = []
+    for row in rows:
+        key = tuple(row[:4])
+        count, mean, low, high, pass_count = row[4:9]
+        summaries.append({
+            **dict(zip(_GROUP_COLUMNS, key)),
+            "count": count,
+            "mean": round(mean, 2),
+            "median": row[9] if postgres else medians[key],
+            "min": low,
+            "max": high,
+            "pass_count": pass_count,
+            "pass_rate": round(pass_count / count, 4),
+        })
+    return summaries
+
+
+def top_scorers(db: Session, n: int = 1, **filters) -> List[Dict[str, Any]]:
+    """
+    The n best scores in every (session, term, student_class, subject) matching filters.
+    Ties share a rank, so a group can return more than n rows.
+    """
+    R = models.StudentResult
+    groups = _group_columns()
+    rank = func.rank().over(partition_by=groups, order_by=R.percentage.desc()).label("rank")
+    ranked = (
+        _apply_filters(db.query(*groups, R.name, R.student_id, R.percentage, rank), filters)
+        .filter(R.percentage.isnot(None))
+        .subquery()
+    )
+    group_columns = [ranked.c[column] for column in _GROUP_COLUMNS]
+    rows = (
+        db.query(*group_columns, ranked.c.name, ranked.c.student_id, ranked.c.percentage, ranked.c.rank)
+        .filter(ranked.c.rank <= n)
+        .order_by(*group_columns, ranked.c.rank, ranked.c.name)
+        .all()
+    )
+    return [
+        {
+            **dict(zip(_GROUP_COLUMNS, row[:4])),
+            "name": row.name,
+            "student_id": row.student_id,
+            "percentage": row.percentage,
+            "rank": row.rank,
+        }
+        for row in rows
+    ]
+
+
+def score_histogram(db: Session, bin_width: int = 10, **filters) -> List[Dict[str, Any]]:
+    """
+    Counts of scores in bin_width-wide bins from 0 to 100, per (session, term,
+    student_class, subject) matching filters. Scores of 100 fall in the last bin;
+    empty bins are left out.
+    """
+    R = models.StudentResult
+    groups = _group_columns()
+    edges = list(range(bin_width, 100, bin_width))
+    # CASE rather than floor() so the bins work on SQLite builds without math functions
+    bucket = case(
+        *[(R.percentage < edge, index) for index, edge in enumerate(edges)],
+        else_=len(edges),
+    ).label("bucket")
+    rows = (
+        _apply_filters(db.query(*groups, bucket, func.count()), filters)
+        .filter(R.percentage.isnot(None))
+        .group_by(*groups, bucket)
+        .order_by(*groups, bucket)
+        .all()
+    )
+    return [
+        {
+            **dict(zip(_GROUP_COLUMNS, row[:4])),
+            "bin_start": row.bucket * bin_width,
+            "bin_end": min(100, (row.bucket + 1) * bin_width),
+            "count": row[5],
+        }
+        for row in rows
+    ]
+
+
+def filter_options(db: Session) -> List[Dict[str, Any]]:
+    """Distinct (session, term, student_class, subject) combinations, for dashboard selectors."""
+    groups = _group_columns()
+    rows = db.query(*groups).distinct().order_by(*groups).all()
+    return [dict(zip(_GROUP_COLUMNS, row)) for row in rows]
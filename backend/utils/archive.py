@@ -0,0 +1,70 @@
+# backend/utils/archive.py
+
+from datetime import datetime
+from typing import Any, Dict, List
+from sqlalchemy import func, insert, literal, or_, select, text
+from sqlalchemy.orm import Session
+import models
+
+# Columns copied from results into results_archive, in order
+_ARCHIVED_COLUMNS = ["name", "student_class", "subject", "percentage",
+                     "teacher_id", "student_id", "term", "session"]
+
+
+def _other_sessions(model, session: str):
+    # Two ranges rather than != so the planner can use the session indexes
+    return or_(model.session < session, model.session > session)
+
+
+def archive_other_sessions(db: Session, session: str) -> int:
+    """
+    Moves every results row not in session to results_archive and returns the count.
+
+    One INSERT ... SELECT plus one DELETE, both set-based; on PostgreSQL a single
+    DELETE ... RETURNING feeds the INSERT so the rows are read once. The derived
+    class/term statistics of those sessions are dropped, not archived: they can
+    be recomputed from the archived rows. Runs inside the session's transaction;
+    the caller commits.
+    """
+    R, A = models.StudentResult, models.ArchivedResult
+    archived_at = datetime.utcnow()
+
+    if db.bind.dialect.name == "postgresql":
+        columns = ", ".join(_ARCHIVED_COLUMNS)
+        moved = db.execute(
+            text(
+                f"WITH moved AS ("
+                f" DELETE FROM {R.__tablename__} WHERE session < :session OR session > :session"
+                f" RETURNING {columns})"
+                f" INSERT INTO {A.__tablename__} ({columns}, archived_at)"
+                f" SELECT {columns}, :archived_at FROM moved"
+            ),
+            {"session": session, "archived_at": archived_at},
+        ).rowcount
+    else:
+        source = select(
+            *(getattr(R, column) for column in _ARCHIVED_COLUMNS),
+            literal(archived_at, A.archived_at.type),
+        ).where(_other_sessions(R, session))
+        db.execute(insert(A).from_select([*_ARCHIVED_COLUMNS, "archived_at"], source))
+        moved = db.query(R).filter(_other_sessions(R, session)).delete(synchronize_session=False)
+
+    for model in (models.ClassTermStats, models.StudentTermSummary):
+        db.query(model).filter(_other_sessions(model, session)).delete(synchronize_session=False)
+
+    return moved
+
+
+def archived_sessions(db: Session) -> List[Dict[str, Any]]:
+    """Each archived session with its row count and when it was archived, newest first."""
+    A = models.ArchivedResult
+    rows = (
+        db.query(A.session, func.count(A.id), func.max(A.archived_at))
+        .group_by(A.session)
+        .order_by(A.session.desc())
+        .all()
+    )
+    return [
+        {"session": session, "results": count, "archived_at": archived_at}
+        for session, count, archived_at in rows
+    ]
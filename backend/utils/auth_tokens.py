@@ -0,0 +1,175 @@
+# backend/utils/auth_tokens.py
+"""
+Signed session tokens and the in-process principal cache behind get_current_user.
+
+A token is "<user_id>.<expires>.<password stamp>.<signature>", HMAC-SHA256 signed
+with SESSION_SECRET, so checking one needs no database. The password stamp ties
+it to the password hash it was issued against: changing the password retires
+every older token once the cached principal is refreshed.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+import models
+
+# Set this in production. Without it every process signs with its own random key,
+# so tokens stop working on restart and are not shared between workers.
+SESSION_SECRET = (os.getenv("SESSION_SECRET") or secrets.token_urlsafe(32)).encode("utf-8")
+
+# Token lifetime, and how long a worker trusts its cached copy of a user. A change
+# made through another worker (deactivation, new password) is seen within the TTL.
+SESSION_TTL = int(os.getenv("SESSION_TTL", str(12 * 3600)))
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "300"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "50000"))
+
+# Accept the unsigned X-User-Id header of older clients. It lets anyone act as any
+# user, so leave it off outside local development.
+ALLOW_USER_ID_HEADER = os.getenv("ALLOW_USER_ID_HEADER", "false").lower() in ("1", "true", "yes")
+
+
+class Principal(NamedTuple):
+    """The fields authentication needs, without the password hash."""
+    id: int
+    username: str
+    role: str
+    is_active: bool
+    must_change_password: bool
+    password_stamp: str
+
+
+class TTLCache:
+    """Thread-safe LRU map whose entries also expire ttl seconds after they were stored."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+            }
+
+
+_principals = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+
+
+def password_stamp(hashed_password: str) -> str:
+    return hmac.new(SESSION_SECRET, hashed_password.encode("utf-8"), hashlib.sha256).hexdigest()[:16]
+
+
+def _signature(payload: str) -> str:
+    digest = hmac.new(SESSION_SECRET, payload.encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def issue_token(principal: Principal, ttl: int = None) -> str:
+    expires = int(time.time()) + (ttl or SESSION_TTL)
+    payload = f"{principal.id}.{expires}.{principal.password_stamp}"
+    return f"{payload}.{_signature(payload)}"
+
+
+def read_token(token: str) -> Optional[Tuple[int, str]]:
+    """Returns (user_id, password stamp) for a valid, unexpired token, else None."""
+    try:
+        payload, signature = token.rsplit(".", 1)
+        user_id, expires, stamp = payload.split(".")
+        if not hmac.compare_digest(signature, _signature(payload)) or int(expires) < time.time():
+            return None
+        return int(user_id), stamp
+    except ValueError:
+        return None
+
+
+def principal_from_user(user) -> Principal:
+    return Principal(
+        id=user.id,
+        username=user.username,
+        role=user.role,
+        is_active=bool(user.is_active),
+        must_change_password=bool(user.must_change_password),
+        password_stamp=password_stamp(user.password),
+    )
+
+
+def cache_principal(principal: Principal):
+    _principals.put(principal.id, principal)
+
+
+def cached_principal(user_id: int) -> Optional[Principal]:
+    return _principals.get(user_id)
+
+
+def fetch_principal(db: Session, user_id: int) -> Optional[Principal]:
+    """Reads user_id's principal from the users table and caches it."""
+    user = db.query(
+        models.User.id,
+        models.User.username,
+        models.User.role,
+        models.User.is_active,
+        models.User.must_change_password,
+        models.User.password,
+    ).filter(models.User.id == user_id).first()
+    if user is None:
+        return None
+
+    principal = principal_from_user(user)
+    cache_principal(principal)
+    return principal
+
+
+def load_principal(db: Session, user_id: int) -> Optional[Principal]:
+    """The cached principal for user_id, read from the users table on a miss."""
+    return cached_principal(user_id) or fetch_principal(db, user_id)
+
+
+def invalidate_principal(user_id: int):
+    """Call after deactivating a user or changing their password or role."""
+    _principals.discard(user_id)
+
+
+def principal_cache_stats() -> Dict[str, Any]:
+    return _principals.stats()
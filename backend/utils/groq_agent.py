@@ -1,23 +1,248 @@
 # backend/utils/groq_agent.py
 
+import contextvars
+import itertools
+import logging
 import os
-from typing import List, Union, Dict, Any
-from groq import Groq
+import queue
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Callable, List, Optional, Union, Dict, Any, Iterator, Tuple
 from dotenv import load_dotenv
+from utils.metrics import track_llm
+from utils.stats_engine import factorize, group_stats
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Read here, checked on first use: the app boots (and serves cached reports) without it
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-if not GROQ_API_KEY:
-    raise ValueError("GROQ_API_KEY is missing. Set it in your .env file or environment variables.")
 
-client = Groq(api_key=GROQ_API_KEY)
+MODEL = "llama-3.1-8b-instant"
 
+# Bump when the prompts change so cached reports (utils/report_cache.py) are regenerated
+PROMPT_VERSION = "2"
 
-def generate_student_report(results: List[Union[Dict[str, Any], Any]]) -> str:
-    if not results:
-        return "No results available to generate a report."
+# Ask for the whole report (every term plus the comparison) in one completion
+# instead of one per section; sections missing from the answer are requested separately.
+REPORT_BATCHED = os.getenv("REPORT_BATCHED", "true").lower() in ("1", "true", "yes")
+
+# Per-call timeout (seconds), extra attempts after a transient failure, and the
+# number of completions in flight at once across all requests in this worker.
+LLM_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "20"))
+LLM_RETRIES = int(os.getenv("GROQ_RETRIES", "2"))
+LLM_CONCURRENCY = int(os.getenv("GROQ_CONCURRENCY", "8"))
+
+# The Groq client, built on first use by get_client(). Assign a client (e.g. a
+# StubLLMClient) here to replace it for the whole process.
+client = None
+_client_lock = threading.Lock()
+
+_executor = ThreadPoolExecutor(max_workers=LLM_CONCURRENCY, thread_name_prefix="llm")
+
+# Called before every completion request, retries included, and the pool those
+# requests run on when not _executor (see on_llm_request)
+_request_hook: contextvars.ContextVar[Optional[Callable[[], None]]] = contextvars.ContextVar(
+    "llm_request_hook", default=None
+)
+_request_executor: contextvars.ContextVar[Optional[ThreadPoolExecutor]] = contextvars.ContextVar(
+    "llm_request_executor", default=None
+)
+
+
+@contextmanager
+def on_llm_request(hook: Callable[[], None], executor: ThreadPoolExecutor = None) -> Iterator[None]:
+    """
+    Calls hook before each completion request made by reports built inside the
+    block, on whichever thread sends it, e.g. to count calls or to wait for a
+    rate limiter. The hook may block; an exception from it fails the request.
+    A hook that blocks should come with its own executor: the requests then wait
+    on its threads instead of holding slots of the pool interactive reports share.
+    """
+    hook_token = _request_hook.set(hook)
+    executor_token = _request_executor.set(executor)
+    try:
+        yield
+    finally:
+        _request_executor.reset(executor_token)
+        _request_hook.reset(hook_token)
+
+
+def _before_request():
+    hook = _request_hook.get()
+    if hook is not None:
+        hook()
+
+
+def _submit(fn, *args) -> Future:
+    """
+    Runs fn on _executor (or the block's own, see on_llm_request), carrying the
+    caller's context, and so its request hook, to the thread.
+    """
+    executor = _request_executor.get() or _executor
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+def get_client():
+    """The module client, creating the Groq client (and importing its SDK) on first call."""
+    global client
+    with _client_lock:
+        if client is None:
+            if not GROQ_API_KEY:
+                raise ValueError("GROQ_API_KEY is missing. Set it in your .env file or environment variables.")
+            from groq import Groq
+
+            # Retries are handled here (with jitter) rather than by the SDK
+            client = Groq(api_key=GROQ_API_KEY, max_retries=0)
+        return client
+
+
+def _retryable_errors() -> tuple:
+    from groq import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+    return (APIConnectionError, APITimeoutError, RateLimitError, InternalServerError)
+
+
+class StubLLMClient:
+    """
+    Offline stand-in for the Groq client: answers every prompt with canned text,
+    once per section marker when the prompt is a batched report.
+    """
+
+    def __init__(self, text: str = "This is a placeholder academic analysis generated offline.", delay: float = 0.0):
+        self.text = text
+        self.delay = delay
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, messages=(), stream: bool = False, **kwargs):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        markers = _MARKER_LINE.findall(messages[-1]["content"]) if messages else []
+        text = "\n\n".join(f"{marker}\n{self.text}" for marker in markers) or self.text
+        if stream:
+            words = text.split(" ")
+            pieces = [word + " " for word in words[:-1]] + words[-1:]
+            return iter([
+                SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+                for piece in pieces
+            ])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+def _complete(messages: List[Dict[str, str]], max_tokens: int, llm_client=None) -> str:
+    """One chat completion with a per-call timeout and jittered exponential backoff."""
+    llm_client = llm_client or get_client()
+    for attempt in range(LLM_RETRIES + 1):
+        _before_request()
+        try:
+            response = llm_client.chat.completions.create(
+                model=MODEL,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=0.6,
+                top_p=0.9,
+                timeout=LLM_TIMEOUT,
+            )
+            return response.choices[0].message.content.strip()
+        except _retryable_errors():
+            if attempt == LLM_RETRIES:
+                raise
+            time.sleep(0.5 * 2 ** attempt + random.uniform(0, 0.5))
+
+
+def _stream_complete(messages: List[Dict[str, str]], max_tokens: int, llm_client=None) -> Iterator[str]:
+    """
+    Streams one chat completion token by token, stripped like _complete.
+    Transient failures are retried only until the first token has been received.
+    """
+    llm_client = llm_client or get_client()
+    for attempt in range(LLM_RETRIES + 1):
+        _before_request()
+        try:
+            stream = llm_client.chat.completions.create(
+                model=MODEL,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=0.6,
+                top_p=0.9,
+                timeout=LLM_TIMEOUT,
+                stream=True,
+            )
+            chunks = iter(stream)
+            first = next(chunks, None)
+            break
+        except _retryable_errors():
+            if attempt == LLM_RETRIES:
+                raise
+            time.sleep(0.5 * 2 ** attempt + random.uniform(0, 0.5))
+
+    started = False
+    pending = ""  # whitespace held back until more text follows, so the tail is stripped
+    for chunk in itertools.chain([first] if first is not None else [], chunks):
+        if not chunk.choices:
+            continue
+        text = chunk.choices[0].delta.content or ""
+        if not started:
+            text = text.lstrip()
+            if not text:
+                continue
+            started = True
+        stripped = text.rstrip()
+        if stripped:
+            yield pending + stripped
+            pending = text[len(stripped):]
+        else:
+            pending += text
+
+
+def _section(title: str, body: str) -> str:
+    return (
+        f"{'=' * 50}\n"
+        f"{title}\n"
+        f"{'=' * 50}\n\n"
+        f"{body}"
+    )
 
+
+_SYSTEM_PROMPT = """You are an experienced academic advisor with expertise in educational psychology, Arabic and Islamic studies (PhD) and student development.
+Provide insightful, honest, encouraging, and practical academic performance analyses.
+STRICT RULES:
+- Plain text only. No markdown, no asterisks, no bold, no bullet points, no symbols.
+- Write in full professional paragraphs only.
+- Never start a line with *, **, #, or -.
+- Reference actual subject names and scores in your analysis."""
+
+_TERM_POINTS = """1. Overall performance and general academic standing for this term.
+2. Subject strengths — subjects where the student scored 70% and above.
+3. Areas needing improvement — subjects below 50%.
+4. Two or three specific practical recommendations for weaker subjects.
+5. A short encouraging closing sentence."""
+
+_COMPARISON_POINTS = """1. Overall trend — is the student improving, declining, or consistent across terms?
+2. Notable changes in specific subjects or areas between terms.
+3. The overall academic trajectory and what it means for the student.
+4. A strong motivating closing statement."""
+
+_PLAIN_TEXT = "Do not use bullet points, markdown, asterisks, dashes, or bold text. Write everything in plain paragraphs."
+
+
+def _report_sections(results: List[Union[Dict[str, Any], Any]]) -> List[Dict[str, Any]]:
+    """
+    Builds the prompts for a student's report: one section per term in term order,
+    then a cross-term comparison when there is more than one term.
+    Each section is {"title", "messages", "max_tokens", "required", "facts"}; a
+    required section that fails still appears with an error note, others are left
+    out. facts holds the numbers behind the prompt for providers that write the
+    section without an LLM (utils/report_providers.py).
+    """
     terms_data = {}
     student_name = None
     term_order = {"First Term": 1, "Second Term": 2, "Third Term": 3}
@@ -34,84 +259,81 @@ def generate_student_report(results: List[Union[Dict[str, Any], Any]]) -> str:
             student_name = name
 
         if term not in terms_data:
-            terms_data[term] = {"subjects": [], "scores": [], "total_subjects": total_subjects, "session": session}
+            terms_data[term] = {"subjects": [], "scores": [], "pairs": [],
+                                "total_subjects": total_subjects, "session": session}
 
         if subject and percentage is not None:
             terms_data[term]["subjects"].append(f"{subject}: {percentage}%")
             terms_data[term]["scores"].append(percentage)
+            terms_data[term]["pairs"].append((subject, percentage))
 
     sorted_terms = sorted(terms_data.keys(), key=lambda t: term_order.get(t, 0))
-    full_report = []
+    sections = []
 
-    system_prompt = """You are an experienced academic advisor with expertise in educational psychology, Arabic and Islamic studies (PhD) and student development.
-Provide insightful, honest, encouraging, and practical academic performance analyses.
-STRICT RULES:
-- Plain text only. No markdown, no asterisks, no bold, no bullet points, no symbols.
-- Write in full professional paragraphs only.
-- Never start a line with *, **, #, or -.
-- Reference actual subject names and scores in your analysis."""
+    # Average / highest / lowest for every term in one pass, shared by the term and comparison prompts
+    for data in terms_data.values():
+        data.update(average=0, highest=0, lowest=0)
+    term_keys, term_codes = factorize(term for term, data in terms_data.items() for _ in data["scores"])
+    term_stats = group_stats(
+        term_codes,
+        [score for data in terms_data.values() for score in data["scores"]],
+        len(term_keys),
+        quantiles=(),
+    )
+    for code, term in enumerate(term_keys):
+        data = terms_data[term]
+        total_subj = data["total_subjects"] or int(term_stats["count"][code])
+        data["average"] = float(term_stats["sum"][code]) / total_subj
+        data["highest"] = float(term_stats["max"][code])
+        data["lowest"] = float(term_stats["min"][code])
 
     # --- Per-term individual reports ---
     for term in sorted_terms:
         data = terms_data[term]
-        scores = data["scores"]
-        total_subj = data["total_subjects"] or len(scores)
-        avg = sum(scores) / total_subj if total_subj else 0
-        highest = max(scores) if scores else 0
-        lowest = min(scores) if scores else 0
         session = data["session"] or ""
 
         prompt = f"""Write a detailed academic performance report for {student_name or 'the student'} for {term} ({session}).
 
 Performance Summary:
-Average Score: {avg:.1f}%
-Highest Score: {highest}%
-Lowest Score: {lowest}%
+Average Score: {data['average']:.1f}%
+Highest Score: {data['highest']}%
+Lowest Score: {data['lowest']}%
 
 Subject Scores:
 {chr(10).join(data['subjects'])}
 
 Cover the following in flowing paragraphs:
-1. Overall performance and general academic standing for this term.
-2. Subject strengths — subjects where the student scored 70% and above.
-3. Areas needing improvement — subjects below 50%.
-4. Two or three specific practical recommendations for weaker subjects.
-5. A short encouraging closing sentence.
-
-Do not use bullet points, markdown, asterisks, dashes, or bold text. Write everything in plain paragraphs."""
+{_TERM_POINTS}
 
-        try:
-            response = client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=600,
-                temperature=0.6,
-                top_p=0.9
-            )
-            term_report = response.choices[0].message.content.strip()
-        except Exception as e:
-            term_report = f"Unable to generate report for this term. Error: {str(e)}"
+{_PLAIN_TEXT}"""
 
-        full_report.append(
-            f"{'=' * 50}\n"
-            f"{term.upper()} - {session}\n"
-            f"{'=' * 50}\n\n"
-            f"{term_report}"
-        )
+        sections.append({
+            "title": f"{term.upper()} - {session}",
+            "messages": [
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": 600,
+            "required": True,
+            "facts": {
+                "kind": "term",
+                "student": student_name,
+                "term": term,
+                "session": session,
+                "average": data["average"],
+                "highest": data["highest"],
+                "lowest": data["lowest"],
+                "scores": data["pairs"],
+            },
+        })
 
     # --- Cross-term comparison (only if more than one term) ---
     if len(sorted_terms) > 1:
         comparison_lines = []
         for term in sorted_terms:
             data = terms_data[term]
-            scores = data["scores"]
-            total_subj = data["total_subjects"] or len(scores)
-            avg = sum(scores) / total_subj if total_subj else 0
             comparison_lines.append(
-                f"{term}: Average {avg:.1f}%, Highest {max(scores)}%, Lowest {min(scores)}%"
+                f"{term}: Average {data['average']:.1f}%, Highest {data['highest']}%, Lowest {data['lowest']}%"
             )
 
         comparison_prompt = f"""Compare the academic performance of {student_name or 'the student'} across the following terms:
@@ -119,32 +341,393 @@ Do not use bullet points, markdown, asterisks, dashes, or bold text. Write every
 {chr(10).join(comparison_lines)}
 
 Cover the following in flowing paragraphs:
-1. Overall trend — is the student improving, declining, or consistent across terms?
-2. Notable changes in specific subjects or areas between terms.
-3. The overall academic trajectory and what it means for the student.
-4. A strong motivating closing statement.
+{_COMPARISON_POINTS}
 
-Do not use bullet points, markdown, asterisks, dashes, or bold text. Write everything in plain paragraphs."""
+{_PLAIN_TEXT}"""
 
-        try:
-            response = client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[
-                    {"role": "system", "content": "You are an experienced academic advisor providing cross-term performance comparison. Plain text only, no markdown, no bold, no bullet points."},
-                    {"role": "user", "content": comparison_prompt}
+        sections.append({
+            "title": "CROSS-TERM COMPARISON",
+            "messages": [
+                {"role": "system", "content": "You are an experienced academic advisor providing cross-term performance comparison. Plain text only, no markdown, no bold, no bullet points."},
+                {"role": "user", "content": comparison_prompt}
+            ],
+            "max_tokens": 500,
+            "required": False,
+            "facts": {
+                "kind": "comparison",
+                "student": student_name,
+                "terms": [
+                    {"term": term, "average": terms_data[term]["average"],
+                     "highest": terms_data[term]["highest"], "lowest": terms_data[term]["lowest"]}
+                    for term in sorted_terms
                 ],
-                max_tokens=500,
-                temperature=0.6,
-                top_p=0.9
-            )
-            comparison_report = response.choices[0].message.content.strip()
-            full_report.append(
-                f"{'=' * 50}\n"
-                f"CROSS-TERM COMPARISON\n"
-                f"{'=' * 50}\n\n"
-                f"{comparison_report}"
+            },
+        })
+
+    return sections
+
+
+# ---------- Batched reports: every section in one completion ----------
+
+_MARKER = "@@SECTION {}@@"
+_MARKER_LINE = re.compile(r"^@@SECTION \d+@@", re.M)
+_MARKER_PARSE = re.compile(r"@@\s*SECTION\s+(\d+)\s*@@", re.I)
+
+
+def _batched_request(sections: List[Dict[str, Any]]) -> Tuple[List[Dict[str, str]], int]:
+    """
+    (messages, max_tokens) asking for every section in one answer, each starting
+    with its marker line. Built from the sections' facts, so the system prompt and
+    instructions are sent once rather than once per section.
+    """
+    student = sections[0]["facts"]["student"] or "the student"
+    blocks = []
+    for number, section in enumerate(sections, start=1):
+        facts = section["facts"]
+        if facts["kind"] == "term":
+            scores = "\n".join(f"{subject}: {percentage}%" for subject, percentage in facts["scores"])
+            blocks.append(f"""{_MARKER.format(number)} {facts['term']} ({facts['session']})
+Average Score: {facts['average']:.1f}%
+Highest Score: {facts['highest']}%
+Lowest Score: {facts['lowest']}%
+Subject Scores:
+{scores}""")
+        else:
+            lines = "\n".join(
+                f"{t['term']}: Average {t['average']:.1f}%, Highest {t['highest']}%, Lowest {t['lowest']}%"
+                for t in facts["terms"]
             )
+            blocks.append(f"{_MARKER.format(number)} Cross-term comparison\n{lines}")
+
+    data = "\n\n".join(blocks)
+    prompt = f"""Write the academic performance report for {student}. It has {len(sections)} sections, listed below with their data.
+Begin each section with its marker on a line by itself, exactly as shown (for example {_MARKER.format(1)}), followed by that section's paragraphs. Write nothing before the first marker.
+
+{data}
+
+Each term section covers the following in flowing paragraphs:
+{_TERM_POINTS}
+
+The cross-term comparison covers the following in flowing paragraphs:
+{_COMPARISON_POINTS}
+
+{_PLAIN_TEXT}"""
+
+    messages = [{"role": "system", "content": _SYSTEM_PROMPT}, {"role": "user", "content": prompt}]
+    return messages, sum(section["max_tokens"] for section in sections)
+
+
+class _SectionSplitter:
+    """
+    Splits a batched answer, fed in pieces as it arrives, into (section index, text)
+    pieces. Sections begin at marker lines numbered 1, 2, ... in order, and each
+    section's text is stripped like _complete's. Text before the first marker is
+    dropped; parsing stops at a marker out of sequence or after an empty section,
+    so the sections read are always a prefix of the report.
+    """
+
+    def __init__(self, count: int):
+        self.count = count
+        self.section = -1
+        self.stopped = False
+        self._line = ""  # start of the current line, held while it could be a marker
+        self._in_body_line = False
+        self._started = False
+        self._pending = ""
+
+    def feed(self, text: str) -> List[Tuple[int, str]]:
+        pieces = []
+        while text and not self.stopped:
+            end = text.find("\n") + 1 or len(text)
+            chunk, text = text[:end], text[end:]
+            complete = chunk.endswith("\n")
+            if self._in_body_line:
+                self._body(chunk, pieces)
+                self._in_body_line = not complete
+                continue
+            line = self._line + chunk
+            head = line.lstrip(" \t")
+            if not complete and (head.startswith("@@") or "@@".startswith(head)):
+                self._line = line
+                continue
+            self._line = ""
+            if complete and self._marker(head):
+                continue
+            self._body(line, pieces)
+            self._in_body_line = not complete
+        return pieces
+
+    def close(self) -> List[Tuple[int, str]]:
+        pieces = []
+        if self._line and not self.stopped and not self._marker(self._line.lstrip(" \t")):
+            self._body(self._line, pieces)
+        self._line = ""
+        self.stopped = True
+        return pieces
+
+    def _marker(self, head: str) -> bool:
+        match = _MARKER_PARSE.match(head)
+        if not match:
+            return False
+        number = int(match.group(1))
+        if number != self.section + 2 or number > self.count or (self.section >= 0 and not self._started):
+            self.stopped = True
+        else:
+            self.section += 1
+            self._started = False
+            self._pending = ""
+        return True
+
+    def _body(self, text: str, pieces: List[Tuple[int, str]]):
+        if self.section < 0:
+            return
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return
+            self._started = True
+        stripped = text.rstrip()
+        if stripped:
+            pieces.append((self.section, self._pending + stripped))
+            self._pending = text[len(stripped):]
+        else:
+            self._pending += text
+
+
+def _batchable(provider, sections: List[Dict[str, Any]]) -> bool:
+    return REPORT_BATCHED and len(sections) > 1 and getattr(provider, "batched", False)
+
+
+def generate_student_report(results: List[Union[Dict[str, Any], Any]]) -> str:
+    return build_student_report(results)[0]
+
+
+def _resolve_provider(llm_client, provider):
+    if provider is not None:
+        return provider
+    from utils.report_providers import GroqProvider, get_report_provider
+
+    return GroqProvider(llm_client) if llm_client is not None else get_report_provider()
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def build_student_report(
+    results: List[Union[Dict[str, Any], Any]],
+    llm_client=None,
+    provider=None,
+    fallback=None,
+    budget: float = None,
+) -> Tuple[str, bool]:
+    """
+    Returns (report, complete); complete is False if any section could not be generated.
+
+    provider writes each section (default: REPORT_PROVIDER, see utils/report_providers.py);
+    llm_client instead runs the Groq provider on that client, e.g. a StubLLMClient.
+    With REPORT_BATCHED and a provider that supports it, all sections are asked for
+    in one completion; any the answer does not cover are then requested one by one.
+    With budget (seconds) and a fallback provider, sections not written by the
+    deadline, or that fail, are written by fallback instead; the report then
+    counts as incomplete so it is not cached in place of the real one.
+    """
+    if not results:
+        return "No results available to generate a report.", False
+
+    provider = _resolve_provider(llm_client, provider)
+    with track_llm():
+        return _build_student_report(results, provider, fallback, budget)
+
+
+def _write_batched(sections: List[Dict[str, Any]], provider, deadline: Optional[float], budget) -> Dict[int, str]:
+    """Section index -> body for the sections one batched completion answered."""
+    call = _submit(provider.write_batch, sections)
+    try:
+        answer = call.result(timeout=_remaining(deadline))
+    except FutureTimeoutError:
+        call.cancel()
+        raise TimeoutError(f"no response within {budget:g}s")
+    splitter = _SectionSplitter(len(sections))
+    bodies = {}
+    for index, piece in splitter.feed(answer) + splitter.close():
+        bodies[index] = bodies.get(index, "") + piece
+    return bodies
+
+
+def _note_batch_gap(written: int, count: int):
+    if written < count:
+        logger.warning("Batched report covered %d of %d sections; requesting the rest separately", written, count)
+
+
+def _build_student_report(results, provider, fallback, budget) -> Tuple[str, bool]:
+    sections = _report_sections(results)
+    deadline = time.monotonic() + budget if budget and fallback is not None else None
+
+    bodies = {}
+    if _batchable(provider, sections):
+        try:
+            bodies = _write_batched(sections, provider, deadline, budget)
         except Exception as e:
-            pass
+            logger.warning("Batched report failed: %s", e)
+        _note_batch_gap(len(bodies), len(sections))
+
+    # Every remaining section only needs the numeric summaries, so all calls go out together.
+    # Local providers answer in microseconds and skip the thread hop, and once the
+    # budget is spent remote ones are not called at all.
+    calls = {
+        i: _submit(provider.write, section)
+        for i, section in enumerate(sections)
+        if i not in bodies and provider.remote and _remaining(deadline) != 0
+    }
+
+    full_report = []
+    complete = True
+    for i, section in enumerate(sections):
+        call = calls.get(i)
+        try:
+            if i in bodies:
+                body = bodies[i]
+            elif call:
+                body = call.result(timeout=_remaining(deadline))
+            elif provider.remote:
+                raise TimeoutError(f"no response within {budget:g}s")
+            else:
+                body = provider.write(section)
+        except Exception as e:
+            complete = False
+            if call:
+                call.cancel()
+            if fallback is not None:
+                body = fallback.write(section)
+            elif not section["required"]:
+                continue
+            else:
+                body = f"Unable to generate report for this term. Error: {str(e)}"
+        full_report.append(_section(section["title"], body))
+
+    return "\n\n".join(full_report), complete
+
+
+_DONE = object()
+
+
+def _pump(out: "queue.Queue", tokens, *args):
+    try:
+        for token in tokens(*args):
+            out.put(token)
+    except Exception as e:
+        out.put(e)
+    out.put(_DONE)
+
+
+def stream_student_report(
+    results: List[Union[Dict[str, Any], Any]],
+    llm_client=None,
+    provider=None,
+    fallback=None,
+    budget: float = None,
+) -> Iterator[str]:
+    """
+    Yields the report as it is generated. Joined together the pieces are exactly what
+    build_student_report returns. A batched answer is relayed live section by section;
+    otherwise every section streams concurrently, the first relayed live and later
+    ones buffered until their turn.
+    provider, fallback and budget are as for build_student_report; the budget
+    applies until a section starts streaming, which it then does to the end.
+    The generator's return value (StopIteration.value) is the complete flag.
+    """
+    if not results:
+        yield "No results available to generate a report."
+        return False
+
+    provider = _resolve_provider(llm_client, provider)
+    with track_llm():
+        return (yield from _stream_student_report(results, provider, fallback, budget))
+
+
+def _stream_student_report(results, provider, fallback, budget) -> Iterator[str]:
+    sections = _report_sections(results)
+    deadline = time.monotonic() + budget if budget and fallback is not None else None
+
+    written, complete = 0, True
+    if _batchable(provider, sections):
+        written, complete = yield from _stream_batched(sections, provider, deadline, budget)
+        _note_batch_gap(written, len(sections))
+
+    rest_complete = yield from _stream_sections(sections[written:], provider, fallback, deadline, budget,
+                                                first_section=written == 0)
+    return complete and rest_complete
+
+
+def _stream_batched(sections, provider, deadline, budget) -> Iterator[str]:
+    """
+    Relays the sections one batched completion answers, each live as it arrives.
+    Returns (sections written, complete); complete is False if the answer broke
+    off inside a section, which is then left as it is.
+    """
+    out = queue.Queue()
+    _submit(_pump, out, provider.stream_batch, sections)
+    splitter = _SectionSplitter(len(sections))
+    current = -1
+    while not splitter.stopped:
+        try:
+            item = out.get(timeout=None if current >= 0 else _remaining(deadline))
+        except queue.Empty:
+            item = TimeoutError(f"no response within {budget:g}s")
+        if isinstance(item, Exception):
+            logger.warning("Batched report failed: %s", item)
+            return current + 1, current < 0
+        for index, piece in splitter.close() if item is _DONE else splitter.feed(item):
+            if index != current:
+                current = index
+                yield ("" if index == 0 else "\n\n") + _section(sections[index]["title"], "")
+            yield piece
+    return current + 1, True
+
+
+def _stream_sections(sections, provider, fallback, deadline, budget, first_section: bool) -> Iterator[str]:
+    queues = []
+    for section in sections:
+        out = queue.Queue()
+        if provider.remote and _remaining(deadline) == 0:
+            # Budget already spent (e.g. on a batched answer that never came)
+            out.put(TimeoutError(f"no response within {budget:g}s"))
+        else:
+            _submit(_pump, out, provider.stream, section)
+        queues.append(out)
+
+    complete = True
+    for section, out in zip(sections, queues):
+        header = ("" if first_section else "\n\n") + _section(section["title"], "")
+        if section["required"]:
+            yield header
+            first_section = False
+        body_started = False
+        while True:
+            try:
+                item = out.get(timeout=None if body_started else _remaining(deadline))
+            except queue.Empty:
+                item = TimeoutError(f"no response within {budget:g}s")
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                complete = False
+                if body_started:
+                    continue
+                if fallback is not None:
+                    if not section["required"]:
+                        yield header
+                        first_section = False
+                    yield fallback.write(section)
+                elif section["required"]:
+                    yield f"Unable to generate report for this term. Error: {str(item)}"
+                break
+            if not section["required"] and not body_started:
+                # Optional sections are only shown once they have produced something
+                yield header
+                first_section = False
+            body_started = True
+            yield item
 
-    return "\n\n".join(full_report)
\ No newline at end of file
+    return complete
@@ -0,0 +1,413 @@
+# backend/utils/ingest.py
+
+import csv
+import os
+import re
+import tempfile
+from io import StringIO
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Any, Optional, Tuple
+from sqlalchemy.orm import Session
+import models
+from utils.archive import archive_other_sessions
+from utils.name_matching import StudentNameIndex, get_name_index, match_student_names
+from utils.ranking import rebuild_class_term_stats
+from utils.report_cache import invalidate_reports
+
+# pandas (and openpyxl) are imported inside the functions that parse uploads, so
+# importing this module, and with it the app, does not pay for them.
+if TYPE_CHECKING:
+    import pandas as pd
+
+UPLOAD_COLUMNS = ["Student Name", "Class", "Subject", "Percentage"]
+REQUIRED_COLUMNS = set(UPLOAD_COLUMNS)
+
+# Rows written per INSERT batch / COPY call. Tune with UPLOAD_BATCH_SIZE.
+BATCH_SIZE = int(os.getenv("UPLOAD_BATCH_SIZE", "1000"))
+
+# Rows parsed into memory at a time. Tune with UPLOAD_CHUNK_ROWS.
+CHUNK_ROWS = int(os.getenv("UPLOAD_CHUNK_ROWS", "5000"))
+
+# Bytes read from the request per write when spooling an upload to disk.
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+# Rejected rows listed in the response; the count always covers all of them.
+MAX_REPORTED_ERRORS = 100
+
+_TEXT_COLUMNS = {
+    "Student Name": "name",
+    "Class": "student_class",
+    "Subject": "subject",
+}
+
+
+def clean_results_frame(df: "pd.DataFrame") -> Tuple["pd.DataFrame", List[Dict[str, Any]]]:
+    """
+    Cleans and types a whole upload sheet at once.
+
+    Returns (clean, rejected) where clean has columns name, student_class, subject,
+    percentage and rejected lists {"row", "reason", "values"} for every dropped row.
+    Row numbers match the spreadsheet (header is row 1), assuming df is indexed
+    from 0 at the first data row as read_csv chunks and iter_upload_frames are.
+    """
+    import pandas as pd
+
+    clean = pd.DataFrame(index=df.index)
+    reasons = pd.Series("", index=df.index, dtype="object")
+
+    for source, target in _TEXT_COLUMNS.items():
+        values = df[source].astype("string").str.strip()
+        missing = values.isna() | (values == "")
+        reasons = reasons.mask(missing & (reasons == ""), f"missing {source}")
+        clean[target] = values
+
+    percentage = pd.to_numeric(df["Percentage"], errors="coerce")
+    invalid = percentage.isna()
+    reasons = reasons.mask(invalid & (reasons == ""), "invalid Percentage")
+    clean["percentage"] = percentage.astype("float64")
+
+    bad = reasons != ""
+    rejected = [
+        {
+            "row": int(df.index[position]) + 2,
+            "reason": reasons.iat[position],
+            "values": {col: _json_value(df[col].iat[position]) for col in UPLOAD_COLUMNS},
+        }
+        for position in bad.to_numpy().nonzero()[0]
+    ]
+
+    clean = clean[~bad]
+    clean = clean.astype({"name": object, "student_class": object, "subject": object})
+    return clean, rejected
+
+
+def _json_value(value):
+    import pandas as pd
+
+    if pd.isna(value):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def error_report(rejected: List[Dict[str, Any]], count: int = None) -> Dict[str, Any]:
+    count = len(rejected) if count is None else count
+    return {
+        "count": count,
+        "rows": rejected[:MAX_REPORTED_ERRORS],
+        "truncated": count > MAX_REPORTED_ERRORS,
+    }
+
+
+_RESULT_COLUMNS = ["name", "student_class", "subject", "percentage",
+                   "student_id", "teacher_id", "term", "session"]
+
+
+def insert_results(db: Session, records: List[Dict[str, Any]], batch_size: int = None) -> int:
+    """
+    Writes result rows in batches: COPY on PostgreSQL, executemany elsewhere.
+    Runs inside the session's transaction; the caller commits.
+    """
+    batch_size = batch_size or BATCH_SIZE
+
+    if db.bind.dialect.name == "postgresql":
+        raw = db.connection().connection
+        with raw.cursor() as cursor:
+            for start in range(0, len(records), batch_size):
+                buf = StringIO()
+                writer = csv.writer(buf)
+                for record in records[start:start + batch_size]:
+                    writer.writerow(["" if record[col] is None else record[col] for col in _RESULT_COLUMNS])
+                buf.seek(0)
+                cursor.copy_expert(
+                    f"COPY {models.StudentResult.__tablename__} ({', '.join(_RESULT_COLUMNS)}) "
+                    "FROM STDIN WITH (FORMAT csv)",
+                    buf,
+                )
+    else:
+        for start in range(0, len(records), batch_size):
+            db.bulk_insert_mappings(models.StudentResult, records[start:start + batch_size])
+
+    return len(records)
+
+
+def ingest_results_frame(
+    db: Session,
+    df: "pd.DataFrame",
+    term: str,
+    session: str,
+    teacher_id: int = None,
+    batch_size: int = None,
+    name_index: Optional[StudentNameIndex] = None,
+) -> Dict[str, Any]:
+    """
+    Cleans, matches and inserts one upload sheet (or one chunk of it).
+
+    Returns {"records_added", "mismatched_students", "fuzzy_matches", "uploaded_keys", "rejected"}.
+    """
+    import pandas as pd
+
+    clean, rejected = clean_results_frame(df)
+
+    matches = match_student_names(name_index or get_name_index(db), clean["name"].unique())
+    clean["student_id"] = clean["name"].map({name: m["student_id"] for name, m in matches.items()})
+    mismatched_students = sorted(name for name, m in matches.items() if m["student_id"] is None)
+    fuzzy_matches = sorted(
+        ({"name": name, "student_id": m["student_id"], "confidence": m["confidence"]}
+         for name, m in matches.items() if m["method"] == "fuzzy"),
+        key=lambda m: m["confidence"],
+    )
+
+    clean["teacher_id"] = teacher_id
+    clean["term"] = term
+    clean["session"] = session
+
+    records = [
+        {**record, "student_id": None if pd.isna(record["student_id"]) else int(record["student_id"])}
+        for record in clean[_RESULT_COLUMNS].to_dict("records")
+    ]
+    records_added = insert_results(db, records, batch_size)
+
+    uploaded_keys = set(zip(clean["student_class"], clean["term"]))
+
+    return {
+        "records_added": records_added,
+        "mismatched_students": mismatched_students,
+        "fuzzy_matches": fuzzy_matches,
+        "uploaded_keys": uploaded_keys,
+        "rejected": rejected,
+    }
+
+
+def parse_term_session(filename: str) -> Tuple[str, str]:
+    """Extracts term and session from an upload filename, e.g. First_Term_2024_2025.xlsx."""
+    term_match = re.search(r"(first|second|third)[_\s-]*term", filename, re.IGNORECASE)
+    session_match = re.search(r"(\d{4})[_\s-]*(\d{4})", filename)
+
+    # --- Handle term ---
+    if term_match:
+        term_text = term_match.group(1).lower()
+        term_map = {"1st": "First Term", "first": "First Term",
+                    "2nd": "Second Term", "second": "Second Term",
+                    "3rd": "Third Term", "third": "Third Term"}
+        term = term_map.get(term_text, "Unknown Term")
+    else:
+        term = "Unknown Term"
+
+    # --- Handle session ---
+    if session_match:
+        yr1, yr2 = session_match.groups()
+        if len(yr2) == 2:
+            yr2 = "20" + yr2
+        session = f"{yr1}/{yr2}"
+    else:
+        session = "Unknown Session"
+
+    return term, session
+
+
+async def spool_upload(file, suffix: str = "", directory: str = None) -> str:
+    """Copies an UploadFile to a temporary file in fixed-size chunks and returns its path."""
+    spooled = tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=directory)
+    try:
+        with spooled:
+            while True:
+                chunk = await file.read(SPOOL_CHUNK_BYTES)
+                if not chunk:
+                    break
+                spooled.write(chunk)
+    except Exception:
+        os.unlink(spooled.name)
+        raise
+    return spooled.name
+
+
+def iter_upload_frames(path: str, filename: str, chunk_rows: int = None) -> Iterator["pd.DataFrame"]:
+    """
+    Yields an upload file as DataFrames of at most chunk_rows rows.
+
+    CSV is read with read_csv(chunksize=...), XLSX with openpyxl's read-only row
+    iterator. Legacy .xls has no streaming reader and is loaded whole, then sliced.
+    """
+    import pandas as pd
+
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    filename = filename.lower()
+
+    if filename.endswith(".csv"):
+        with pd.read_csv(path, chunksize=chunk_rows) as reader:
+            yield from reader
+
+    elif filename.endswith(".xlsx"):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            header = [str(col).strip() if col is not None else None for col in header]
+
+            start, buffer = 0, []
+            for row in rows:
+                if all(value is None for value in row):
+                    continue
+                buffer.append(row[:len(header)])
+                if len(buffer) >= chunk_rows:
+                    yield pd.DataFrame(buffer, columns=header, index=range(start, start + len(buffer)))
+                    start, buffer = start + len(buffer), []
+            if buffer:
+                yield pd.DataFrame(buffer, columns=header, index=range(start, start + len(buffer)))
+        finally:
+            workbook.close()
+
+    elif filename.endswith(".xls"):
+        df = pd.read_excel(path)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+
+    else:
+        raise ValueError("Unsupported file format. Use CSV or Excel (.xlsx/.xls)")
+
+
+def read_upload_columns(path: str, filename: str) -> set:
+    """Reads only the header row of an upload file."""
+    import pandas as pd
+
+    filename = filename.lower()
+    if filename.endswith(".csv"):
+        return set(pd.read_csv(path, nrows=0).columns)
+    if filename.endswith(".xls"):
+        return set(pd.read_excel(path, nrows=0).columns)
+    if filename.endswith(".xlsx"):
+        from openpyxl import load_workbook
+
+        # The header row itself, so a sheet with no data rows still reports its columns
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            header = next(workbook.active.iter_rows(max_row=1, values_only=True), ())
+        finally:
+            workbook.close()
+        return {str(col).strip() for col in header if col is not None}
+    raise ValueError("Unsupported file format. Use CSV or Excel (.xlsx/.xls)")
+
+
+def ingest_frames(
+    db: Session,
+    frames,
+    term: str,
+    session: str,
+    teacher_id: int = None,
+    batch_size: int = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Pushes each chunk through validation, name matching and batched inserts.
+
+    Only one chunk is held in memory at a time; the name index is built once for
+    the whole upload. progress, if given, is called with (rows_done, rows_rejected)
+    after every chunk. Returns the ingest_results_frame keys summed over all chunks,
+    plus "chunks" with per-chunk row counts.
+    """
+    name_index = get_name_index(db)
+
+    records_added = 0
+    mismatched_students = set()
+    fuzzy_matches = {}
+    uploaded_keys = set()
+    rejected = []
+    rejected_count = 0
+    chunks = []
+
+    for number, df in enumerate(frames, start=1):
+        ingested = ingest_results_frame(
+            db, df, term, session,
+            teacher_id=teacher_id, batch_size=batch_size, name_index=name_index,
+        )
+        records_added += ingested["records_added"]
+        mismatched_students.update(ingested["mismatched_students"])
+        fuzzy_matches.update({m["name"]: m for m in ingested["fuzzy_matches"]})
+        uploaded_keys |= ingested["uploaded_keys"]
+        rejected_count += len(ingested["rejected"])
+        rejected.extend(ingested["rejected"][:MAX_REPORTED_ERRORS - len(rejected)])
+        chunks.append({
+            "chunk": number,
+            "rows": len(df),
+            "inserted": ingested["records_added"],
+            "rejected": len(ingested["rejected"]),
+        })
+        if progress:
+            progress(sum(chunk["rows"] for chunk in chunks), rejected_count)
+
+    return {
+        "records_added": records_added,
+        "mismatched_students": sorted(mismatched_students),
+        "fuzzy_matches": sorted(fuzzy_matches.values(), key=lambda m: m["confidence"]),
+        "uploaded_keys": uploaded_keys,
+        "rejected": rejected,
+        "rejected_count": rejected_count,
+        "chunks": chunks,
+    }
+
+
+def process_results_upload(
+    db: Session,
+    path: str,
+    filename: str,
+    batch_size: int = None,
+    chunk_rows: int = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Runs a whole results upload from a spooled file and returns the response payload.
+
+    Moves results from other sessions to results_archive before inserting the new session.
+    The archive move, the new results and their class/term statistics are committed
+    together at the end, so a run that dies halfway leaves nothing behind and can
+    simply be repeated.
+    Raises ValueError for files that cannot be ingested.
+    """
+    term, session = parse_term_session(filename)
+
+    missing = REQUIRED_COLUMNS - read_upload_columns(path, filename)
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    # --- Move earlier sessions to the archive before adding new session results ---
+    archived = 0
+    if session != "Unknown Session":
+        archived = archive_other_sessions(db, session)
+
+    teacher_id = None
+
+    # --- Insert results into database, one chunk at a time ---
+    ingested = ingest_frames(
+        db, iter_upload_frames(path, filename, chunk_rows), term, session,
+        teacher_id=teacher_id, batch_size=batch_size, progress=progress,
+    )
+    records_added = ingested["records_added"]
+    mismatched_students = ingested["mismatched_students"]
+
+    # --- Refresh materialized class/term statistics ---
+    stats = rebuild_class_term_stats(db, ingested["uploaded_keys"])
+
+    # --- Drop stored reports for every student in the affected class/terms ---
+    invalidate_reports(db, {sid for entry in stats.values() for sid in entry["averages"]})
+
+    db.commit()
+
+    msg = f"{records_added} results uploaded successfully for {term} ({session})."
+    if mismatched_students:
+        msg += f" {len(mismatched_students)} names not matched: {', '.join(mismatched_students[:5])}..."
+
+    return {
+        "message": msg,
+        "term": term,
+        "session": session,
+        "records_added": records_added,
+        "records_archived": archived,
+        "unmatched_students": len(mismatched_students),
+        "rejected_rows": error_report(ingested["rejected"], ingested["rejected_count"]),
+        "fuzzy_matches": ingested["fuzzy_matches"],
+        "chunks": ingested["chunks"],
+        "class_terms": sorted([list(key) for key in ingested["uploaded_keys"]]),
+    }
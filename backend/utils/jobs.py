@@ -0,0 +1,233 @@
+# backend/utils/jobs.py
+
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from database import SessionLocal
+import models
+
+# Jobs run in this many background threads per API worker. Tune with JOB_WORKERS.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+# Where uploads are spooled while they wait for a worker.
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+
+# A running job's heartbeat is refreshed every JOB_HEARTBEAT seconds; one silent for
+# JOB_STALE_AFTER seconds belonged to a process that died and is run again.
+JOB_HEARTBEAT = float(os.getenv("JOB_HEARTBEAT", "30"))
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "300"))
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+
+# Live counters for jobs running in this process; the table is updated when a job
+# starts and finishes, this covers the progress in between.
+_progress: Dict[str, Dict[str, Any]] = {}
+_progress_lock = threading.Lock()
+
+# Jobs waiting in this process's pool, and those running in it, whose heartbeats
+# the monitor thread refreshes
+_submitted = set()
+_running = set()
+_monitor_started = threading.Event()
+
+# kind -> handler(db, job, progress) returning the job result payload
+JOB_HANDLERS: Dict[str, Callable[[Session, models.BackgroundJob, Callable[[int, int], None]], Dict[str, Any]]] = {}
+
+
+def register_job_handler(kind: str):
+    def decorator(fn):
+        JOB_HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+def create_job(db: Session, kind: str, filename: str = None, file_path: str = None,
+               params: Dict[str, Any] = None) -> models.BackgroundJob:
+    job = models.BackgroundJob(
+        id=uuid.uuid4().hex,
+        kind=kind,
+        status="queued",
+        filename=filename,
+        file_path=file_path,
+        params=params or {},
+        rows_done=0,
+        rows_rejected=0,
+        created_at=datetime.utcnow(),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def submit_job(job_id: str):
+    with _progress_lock:
+        _submitted.add(job_id)
+    _executor.submit(_run_job, job_id)
+
+
+def _claim_job(db: Session, job_id: str) -> bool:
+    """Moves a queued job to running. Only one worker's claim succeeds, whichever process it is in."""
+    now = datetime.utcnow()
+    claimed = (
+        db.query(models.BackgroundJob)
+        .filter(models.BackgroundJob.id == job_id, models.BackgroundJob.status == "queued")
+        .update(
+            {"status": "running", "started_at": now, "heartbeat_at": now, "rows_done": 0, "rows_rejected": 0},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return claimed == 1
+
+
+def _run_job(job_id: str):
+    with _progress_lock:
+        _submitted.discard(job_id)
+    db = SessionLocal()
+    try:
+        if not _claim_job(db, job_id):
+            return
+        with _progress_lock:
+            _running.add(job_id)
+        job = db.query(models.BackgroundJob).filter(models.BackgroundJob.id == job_id).first()
+
+        def progress(rows_done: int, rows_rejected: int):
+            with _progress_lock:
+                _progress[job_id] = {"rows_done": rows_done, "rows_rejected": rows_rejected}
+
+        try:
+            handler = JOB_HANDLERS[job.kind]
+            result = handler(db, job, progress)
+        except Exception as e:
+            db.rollback()
+            job = db.query(models.BackgroundJob).filter(models.BackgroundJob.id == job_id).first()
+            job.status = "failed"
+            job.error = str(e) or e.__class__.__name__
+            traceback.print_exc()
+        else:
+            job.status = "succeeded"
+            job.result = result
+
+        live = _progress.get(job_id, {})
+        job.rows_done = live.get("rows_done", job.rows_done)
+        job.rows_rejected = live.get("rows_rejected", job.rows_rejected)
+        job.finished_at = datetime.utcnow()
+        _remove_file(job.file_path)
+        db.commit()
+    finally:
+        with _progress_lock:
+            _progress.pop(job_id, None)
+            _running.discard(job_id)
+        db.close()
+
+
+def _remove_file(path: Optional[str]):
+    if path and os.path.exists(path):
+        os.unlink(path)
+
+
+def job_status(job: models.BackgroundJob) -> Dict[str, Any]:
+    live = _progress.get(job.id, {})
+    end = job.finished_at or datetime.utcnow()
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "filename": job.filename,
+        "rows_done": live.get("rows_done", job.rows_done),
+        "rows_rejected": live.get("rows_rejected", job.rows_rejected),
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "queued_seconds": round(((job.started_at or end) - job.created_at).total_seconds(), 3),
+        "run_seconds": round((end - job.started_at).total_seconds(), 3) if job.started_at else None,
+        "result": job.result,
+        "error": job.error,
+    }
+
+
+def _requeue_stale_jobs(db: Session, all_queued: bool = False):
+    """
+    Hands jobs whose process died back to the queue: running jobs with no heartbeat
+    for JOB_STALE_AFTER seconds, and queued ones (all of them with all_queued,
+    otherwise those waiting longer than that). Each reset is conditional, so when
+    several workers look at the same time only one of them re-queues a job; a job
+    submitted twice still runs once, see _claim_job.
+    """
+    Job = models.BackgroundJob
+    cutoff = datetime.utcnow() - timedelta(seconds=JOB_STALE_AFTER)
+    queued = Job.status == "queued"
+    if not all_queued:
+        queued = queued & (Job.created_at < cutoff)
+    stale = (
+        db.query(Job.id, Job.status, Job.file_path)
+        .filter(Job.status.in_(["queued", "running"]))
+        .filter(queued | (func.coalesce(Job.heartbeat_at, Job.started_at) < cutoff))
+        .order_by(Job.created_at)
+        .all()
+    )
+    resubmit = []
+    for job_id, status, file_path in stale:
+        unchanged = db.query(Job).filter(Job.id == job_id, Job.status == status)
+        if status == "running":
+            unchanged = unchanged.filter(func.coalesce(Job.heartbeat_at, Job.started_at) < cutoff)
+        if file_path and not os.path.exists(file_path):
+            unchanged.update(
+                {"status": "failed", "error": "Upload file was lost before the job could run.",
+                 "finished_at": datetime.utcnow()},
+                synchronize_session=False,
+            )
+        elif status == "queued" or unchanged.update({"status": "queued"}, synchronize_session=False) == 1:
+            resubmit.append(job_id)
+    db.commit()
+    with _progress_lock:
+        resubmit = [job_id for job_id in resubmit if job_id not in _submitted]
+    for job_id in resubmit:
+        submit_job(job_id)
+
+
+def _monitor_jobs():
+    while True:
+        time.sleep(JOB_HEARTBEAT)
+        db = SessionLocal()
+        try:
+            with _progress_lock:
+                running = list(_running)
+            if running:
+                (
+                    db.query(models.BackgroundJob)
+                    .filter(models.BackgroundJob.id.in_(running), models.BackgroundJob.status == "running")
+                    .update({"heartbeat_at": datetime.utcnow()}, synchronize_session=False)
+                )
+                db.commit()
+            _requeue_stale_jobs(db)
+        except Exception:
+            db.rollback()
+            traceback.print_exc()
+        finally:
+            db.close()
+
+
+def resume_pending_jobs():
+    """
+    Re-queues jobs left behind by a previous process (see _requeue_stale_jobs) and
+    starts the thread that keeps this process's running jobs alive and picks up
+    jobs that go stale later. Uploads only commit their results at the end, so
+    re-running one is safe.
+    """
+    db = SessionLocal()
+    try:
+        _requeue_stale_jobs(db, all_queued=True)
+    finally:
+        db.close()
+    if not _monitor_started.is_set():
+        _monitor_started.set()
+        threading.Thread(target=_monitor_jobs, name="job-monitor", daemon=True).start()
@@ -0,0 +1,241 @@
+# backend/utils/metrics.py
+"""
+Per-request SQL, LLM and latency instrumentation.
+
+MetricsMiddleware gives each HTTP request a RequestMetrics in a context variable.
+SQLAlchemy cursor events (instrument_engine) and track_llm() add to it from
+whatever thread or greenlet does the work, since threadpool calls run with a
+copy of the request's context. When the response starts the totals go out as a
+Server-Timing header; when it ends they are observed into per-route histograms
+served by /metrics in the Prometheus text format.
+
+Metrics are kept per worker process; scrape every worker, or run one per pod.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+
+
+class RequestMetrics:
+    __slots__ = ("sql_count", "sql_seconds", "llm_calls", "llm_seconds")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+def current_request_metrics() -> Optional[RequestMetrics]:
+    return _current.get()
+
+
+# ---------- Prometheus text format ----------
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[Tuple[Tuple[str, str], ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(labels)} {_format_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[Tuple[str, str], ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip((*self.buckets, float("inf")), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _format_number(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels((*labels, ('le', le)))} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_number(total[0])}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time from request start to the last response byte.", _SECONDS)
+REQUEST_SQL_QUERIES = Histogram(
+    "http_request_sql_queries", "SQL statements executed per request.", (0, 1, 2, 5, 10, 20, 50, 100, 250))
+REQUEST_SQL_SECONDS = Histogram(
+    "http_request_sql_seconds", "Time spent executing SQL per request.", _SECONDS)
+REQUEST_LLM_SECONDS = Histogram(
+    "http_request_llm_seconds", "Time spent generating reports with the LLM per request.", _SECONDS)
+RESPONSE_BYTES = Histogram(
+    "http_response_size_bytes", "Response body size.",
+    (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304))
+SQL_QUERIES_TOTAL = Counter(
+    "db_queries_total", "SQL statements executed, including background jobs.")
+SQL_SECONDS_TOTAL = Counter(
+    "db_query_seconds_total", "Time spent executing SQL, including background jobs.")
+LLM_REPORT_SECONDS = Histogram(
+    "llm_report_seconds", "Time to generate one student report, including background jobs.", _SECONDS)
+
+_REGISTRY = (REQUEST_SECONDS, REQUEST_SQL_QUERIES, REQUEST_SQL_SECONDS, REQUEST_LLM_SECONDS,
+             RESPONSE_BYTES, SQL_QUERIES_TOTAL, SQL_SECONDS_TOTAL, LLM_REPORT_SECONDS)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in _REGISTRY for line in metric.render()) + "\n"
+
+
+# ---------- SQL ----------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+    SQL_QUERIES_TOTAL.inc()
+    SQL_SECONDS_TOTAL.inc(elapsed)
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.sql_count += 1
+        metrics.sql_seconds += elapsed
+
+
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("metrics_query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine):
+    """Counts and times every statement sent through engine (a sync Engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+# ---------- LLM ----------
+
+@contextmanager
+def track_llm() -> Iterator[None]:
+    """Times a report generation against the current request, if any."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        LLM_REPORT_SECONDS.observe(elapsed)
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.llm_calls += 1
+            metrics.llm_seconds += elapsed
+
+
+# ---------- ASGI middleware ----------
+
+def server_timing(metrics: RequestMetrics, total_seconds: float) -> str:
+    parts = [f'db;dur={metrics.sql_seconds * 1000:.1f};desc="{metrics.sql_count} queries"']
+    if metrics.llm_calls:
+        parts.append(f"llm;dur={metrics.llm_seconds * 1000:.1f}")
+    parts.append(f"total;dur={total_seconds * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """
+    Records per-request metrics and adds a Server-Timing header. The header is
+    written when the response starts, so for streamed responses it covers the
+    work done before the first byte; the histograms cover the whole stream.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(metrics, time.perf_counter() - started).encode()))
+                headers.append((b"timing-allow-origin", b"*"))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            _current.reset(token)
+            # Label by route template, not raw path, so ids do not explode the series count
+            route = getattr(scope.get("route"), "path", "unmatched")
+            labels = {"method": scope["method"], "route": route}
+            REQUEST_SECONDS.observe(time.perf_counter() - started, status=str(status), **labels)
+            REQUEST_SQL_QUERIES.observe(metrics.sql_count, **labels)
+            REQUEST_SQL_SECONDS.observe(metrics.sql_seconds, **labels)
+            REQUEST_LLM_SECONDS.observe(metrics.llm_seconds, **labels)
+            RESPONSE_BYTES.observe(size, **labels)
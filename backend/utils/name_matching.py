@@ -0,0 +1,156 @@
+# backend/utils/name_matching.py
+
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Tuple, Any
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+import models
+
+# Fuzzy matches below this trigram similarity are treated as no match.
+FUZZY_THRESHOLD = 0.75
+# Candidates scored in full per fuzzy lookup, after trigram pre-filtering.
+FUZZY_CANDIDATES = 20
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_name(name: str) -> str:
+    """
+    Case, whitespace and punctuation insensitive key for a name. Token order is
+    kept: "Ali Musa" and "Musa Ali" are different students.
+    """
+    text = _PUNCTUATION.sub(" ", str(name or "").lower()).strip()
+    return " ".join(_SPACES.split(text)) if text else ""
+
+
+def _trigrams(key: str):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class StudentNameIndex:
+    """
+    Maps uploaded student names to user ids with dict lookups.
+
+    Exact matches compare normalized names (see normalize_name) against both
+    username and full_name. Anything else falls back to trigram similarity over
+    a bounded candidate set and reports the similarity as its confidence.
+    A name that is the same for several students is ambiguous and never linked.
+    """
+
+    def __init__(self, students: Iterable[Tuple[int, str, Optional[str]]]):
+        # key -> user id, or None when the key belongs to more than one student
+        self.exact: Dict[str, Optional[int]] = {}
+        self.trigram_index = defaultdict(set)
+
+        for user_id, username, full_name in students:
+            for name in (username, full_name):
+                key = normalize_name(name)
+                if key:
+                    self.exact[key] = user_id if self.exact.get(key, user_id) == user_id else None
+
+        for key in self.exact:
+            for gram in _trigrams(key):
+                self.trigram_index[gram].add(key)
+
+    def __len__(self):
+        return len(self.exact)
+
+    def resolve(self, name: str) -> Tuple[Optional[int], float, str]:
+        """Returns (user_id, confidence, method) where method is exact, fuzzy, ambiguous or none."""
+        key = normalize_name(name)
+        if key in self.exact:
+            return self._linked(key, 1.0, "exact")
+        return self._fuzzy(key)
+
+    def _linked(self, key: str, confidence: float, method: str) -> Tuple[Optional[int], float, str]:
+        user_id = self.exact[key]
+        if user_id is None:
+            return None, confidence, "ambiguous"
+        return user_id, confidence, method
+
+    def _fuzzy(self, key: str) -> Tuple[Optional[int], float, str]:
+        grams = _trigrams(key) if key else set()
+        if not grams:
+            return None, 0.0, "none"
+
+        # Trigrams shared by a large share of the school (" ab", "son") say little
+        # and dominate the cost, so candidates are gathered from the rarer ones.
+        common = max(FUZZY_CANDIDATES, len(self.exact) // 20)
+        postings = [self.trigram_index.get(gram, ()) for gram in grams]
+        rare = [p for p in postings if len(p) <= common] or postings
+        shared = defaultdict(int)
+        for posting in rare:
+            for candidate in posting:
+                shared[candidate] += 1
+
+        best_key, best_score = None, 0.0
+        top = sorted(shared.items(), key=lambda item: item[1], reverse=True)[:FUZZY_CANDIDATES]
+        for candidate, _ in top:
+            # Dice coefficient over trigram sets
+            candidate_grams = _trigrams(candidate)
+            score = 2 * len(grams & candidate_grams) / (len(grams) + len(candidate_grams))
+            if score > best_score:
+                best_key, best_score = candidate, score
+
+        if best_key is None or best_score < FUZZY_THRESHOLD:
+            return None, round(best_score, 3), "none"
+        return self._linked(best_key, round(best_score, 3), "fuzzy")
+
+
+_cached_index: Optional[StudentNameIndex] = None
+_cached_signature = None
+_lock = threading.Lock()
+
+
+def invalidate_name_index():
+    """Drops the cached index; call after creating, renaming or deactivating students."""
+    global _cached_index, _cached_signature
+    with _lock:
+        _cached_index = None
+        _cached_signature = None
+
+
+def get_name_index(db: Session) -> StudentNameIndex:
+    """
+    Returns the cached index of active students, rebuilding it when invalidated
+    or when the students table has changed (e.g. users added by another worker).
+    """
+    global _cached_index, _cached_signature
+
+    active_students = (
+        models.User.role == "student",
+        models.User.is_active == True,
+    )
+    signature = tuple(
+        db.query(func.count(models.User.id), func.max(models.User.id))
+        .filter(*active_students)
+        .one()
+    )
+
+    with _lock:
+        if _cached_index is not None and _cached_signature == signature:
+            return _cached_index
+
+    students = (
+        db.query(models.User.id, models.User.username, models.User.full_name)
+        .filter(*active_students)
+        .all()
+    )
+    index = StudentNameIndex(students)
+
+    with _lock:
+        _cached_index, _cached_signature = index, signature
+    return index
+
+
+def match_student_names(index: StudentNameIndex, names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Resolves every distinct name against an active-student index (see get_name_index)."""
+    matches = {}
+    for name in set(names):
+        user_id, confidence, method = index.resolve(name)
+        matches[name] = {"student_id": user_id, "confidence": confidence, "method": method}
+    return matches
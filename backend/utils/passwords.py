@@ -0,0 +1,80 @@
+# backend/utils/passwords.py
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterator, List
+import bcrypt
+
+# bcrypt work factor for new hashes (each +1 doubles the cost). Existing hashes
+# with a different cost are upgraded on the next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Processes used to hash passwords for bulk registration. bcrypt is CPU-bound by
+# design, so one per core.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+
+# Threads for hashing in request handlers (bcrypt releases the GIL). Bounded so
+# a login burst queues here instead of taking every threadpool slot.
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+_auth_executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+# password hashing
+def get_password_hash(password: str) -> str:
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+
+# password verification
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(
+        plain_password.encode("utf-8"),
+        hashed_password.encode("utf-8")
+    )
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with a different work factor than BCRYPT_ROUNDS."""
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_auth_executor, get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(
+        _auth_executor, verify_password, plain_password, hashed_password
+    )
+
+
+def _hash_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn rather than fork: the API process runs threads (jobs, LLM calls)
+            # and forking a threaded process can deadlock the child.
+            _pool = ProcessPoolExecutor(
+                max_workers=HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def iter_password_hashes(passwords: List[str]) -> Iterator[str]:
+    """Hashes passwords across the process pool, yielding hashes in input order as they finish."""
+    if HASH_WORKERS <= 1 or len(passwords) < 2:
+        yield from map(get_password_hash, passwords)
+        return
+    chunksize = max(1, len(passwords) // (HASH_WORKERS * 8))
+    yield from _hash_pool().map(get_password_hash, passwords, chunksize=chunksize)
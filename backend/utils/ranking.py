@@ -0,0 +1,322 @@
+# backend/utils/ranking.py
+
+from typing import Dict, Iterable, List, Tuple, Any
+from sqlalchemy import Numeric, cast, func, and_, or_
+from sqlalchemy.orm import Session
+import models
+from utils.stats_engine import RANK_DECIMALS, factorize, group_stats
+
+
+def ordinal(n):
+    return "%d%s" % (
+        n,
+        "tsnrhtdd"[(n // 10 % 10 != 1) * (n % 10 < 4) * n % 10::4]
+    ) if n else ""
+
+
+def _class_term_filter(keys: List[Tuple[str, str]], model=models.StudentResult):
+    """
+    Matches any (student_class, term) in keys. The IN lists on their own are what
+    let SQLite search the (student_class, term, ...) indexes; with only the OR of
+    pairs it scans the whole index for GROUP BY order instead.
+    """
+    return and_(
+        model.student_class.in_(sorted({student_class for student_class, _ in keys})),
+        model.term.in_(sorted({term for _, term in keys})),
+        or_(*[
+            and_(model.student_class == student_class, model.term == term)
+            for student_class, term in keys
+        ]),
+    )
+
+
+def compute_class_term_stats(db: Session, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """
+    Computes ranking and subject statistics for every (student_class, term) in keys.
+
+    Runs two aggregate queries no matter how many students or subjects a class has:
+    one GROUP BY student with a RANK() window for positions, and one GROUP BY subject
+    for min/max/median (percentile_cont on PostgreSQL, utils.stats_engine elsewhere).
+
+    Returns {(student_class, term): {
+        "session": str,
+        "max_subject_count": int,
+        "totals": {student_id: total},
+        "averages": {student_id: avg},
+        "positions": {student_id: position},
+        "subject_stats": {subject: {"min", "max", "median"}},
+    }}
+    """
+    keys = list(dict.fromkeys(keys))
+    stats = {
+        key: {"session": None, "max_subject_count": 1, "totals": {}, "averages": {}, "positions": {}, "subject_stats": {}}
+        for key in keys
+    }
+    if not keys:
+        return stats
+
+    R = models.StudentResult
+    key_filter = _class_term_filter(keys)
+
+    # --- Per-student totals and positions ---
+    # Rank by total rather than average: every student in a class/term is divided
+    # by the same max subject count, so the order is the same.
+    # Unmatched rows (student_id NULL) are kept for max_subject_count but ranked apart.
+    # The rank key is the total rounded to RANK_DECIMALS, so summation noise
+    # (410.70000000000005 vs 410.7) does not split a tie. PostgreSQL only rounds
+    # numerics to a given number of places, hence the cast.
+    total = func.sum(R.percentage)
+    position = func.rank().over(
+        partition_by=(R.student_class, R.term, R.student_id.is_(None)),
+        order_by=func.round(cast(total, Numeric), RANK_DECIMALS).desc(),
+    )
+    student_rows = (
+        db.query(
+            R.student_class,
+            R.term,
+            R.student_id,
+            total.label("total"),
+            func.count(func.distinct(R.subject)).label("subject_count"),
+            position.label("position"),
+            func.max(R.session).label("session"),
+        )
+        .filter(key_filter)
+        .group_by(R.student_class, R.term, R.student_id)
+        .all()
+    )
+
+    max_counts = {}
+    for student_class, term, _, _, subject_count, _, session in student_rows:
+        key = (student_class, term)
+        max_counts[key] = max(max_counts.get(key, 0), subject_count)
+        stats[key]["session"] = stats[key]["session"] or session
+    for key, count in max_counts.items():
+        stats[key]["max_subject_count"] = count
+
+    for student_class, term, sid, total_score, _, rank, _ in student_rows:
+        if sid is None:
+            continue
+        entry = stats[(student_class, term)]
+        entry["totals"][sid] = total_score
+        entry["averages"][sid] = total_score / entry["max_subject_count"]  # Divide by max, not student's count
+        entry["positions"][sid] = rank
+
+    # --- Per-subject min / max / median ---
+    if db.bind.dialect.name == "postgresql":
+        subject_rows = (
+            db.query(
+                R.student_class,
+                R.term,
+                R.subject,
+                func.min(R.percentage),
+                func.max(R.percentage),
+                func.percentile_cont(0.5).within_group(R.percentage),
+            )
+            .filter(key_filter, R.subject.isnot(None))
+            .group_by(R.student_class, R.term, R.subject)
+            .all()
+        )
+        for student_class, term, subject, low, high, median in subject_rows:
+            stats[(student_class, term)]["subject_stats"][subject] = {
+                "min": low,
+                "max": high,
+                "median": median,
+            }
+    else:
+        # SQLite has no percentile_cont; pull the scores once and summarize them in one vectorized pass.
+        score_rows = (
+            db.query(R.student_class, R.term, R.subject, R.percentage)
+            .filter(key_filter, R.subject.isnot(None), R.percentage.isnot(None))
+            .all()
+        )
+        groups, codes = factorize((student_class, term, subject) for student_class, term, subject, _ in score_rows)
+        summary = group_stats(codes, [row[3] for row in score_rows], len(groups), quantiles=(0.5,))
+        for code, (student_class, term, subject) in enumerate(groups):
+            stats[(student_class, term)]["subject_stats"][subject] = {
+                "min": float(summary["min"][code]),
+                "max": float(summary["max"][code]),
+                "median": float(summary["quantiles"][0.5][code]),
+            }
+
+    return stats
+
+
+def rebuild_class_term_stats(db: Session, keys: Iterable[Tuple[str, str]]):
+    """
+    Recomputes the materialized ClassTermStats / StudentTermSummary rows for keys.
+    Existing rows for those class/terms are replaced. The caller commits.
+    """
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return {}
+
+    stats = compute_class_term_stats(db, keys)
+
+    for model in (models.ClassTermStats, models.StudentTermSummary):
+        db.query(model).filter(_class_term_filter(keys, model)).delete(synchronize_session=False)
+
+    subject_rows = []
+    summary_rows = []
+    for (student_class, term), entry in stats.items():
+        for subject, subject_stats in entry["subject_stats"].items():
+            subject_rows.append({
+                "student_class": student_class,
+                "term": term,
+                "session": entry["session"],
+                "subject": subject,
+                "min_score": subject_stats["min"],
+                "max_score": subject_stats["max"],
+                "median_score": subject_stats["median"],
+                "total_subjects": entry["max_subject_count"],
+                "total_students": len(entry["averages"]),
+            })
+        for sid, avg in entry["averages"].items():
+            summary_rows.append({
+                "student_id": sid,
+                "student_class": student_class,
+                "term": term,
+                "session": entry["session"],
+                "total_score": entry["totals"][sid],
+                "average_score": avg,
+                "position": entry["positions"][sid],
+            })
+
+    db.bulk_insert_mappings(models.ClassTermStats, subject_rows)
+    db.bulk_insert_mappings(models.StudentTermSummary, summary_rows)
+
+    return stats
+
+
+def get_student_term_stats(db: Session, student_id: int, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """
+    Reads one student's standing for each (student_class, term) from the materialized tables.
+
+    Class/terms that have not been materialized yet (e.g. results uploaded before the
+    tables existed) are rebuilt on the spot and committed, once; after that the cost
+    is two indexed lookups whatever the class size. A student with no summary row in
+    a built class/term (no results linked to them there) is reported unranked:
+    average and position None. Whoever links rows to a student rebuilds the class/terms
+    affected (see ingest and load_student_results), so reads never have to.
+
+    Returns {(student_class, term): {
+        "max_subject_count", "average", "position", "total_students",
+        "subject_stats": {subject: {"min", "max", "median"}},
+    }}
+    """
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return {}
+
+    S = models.StudentTermSummary
+    C = models.ClassTermStats
+
+    summaries = {
+        (s.student_class, s.term): s
+        for s in db.query(S).filter(S.student_id == student_id).all()
+    }
+
+    class_filter = _class_term_filter(keys, C)
+    subject_rows = db.query(C).filter(class_filter).all()
+
+    # Class/terms with no stats rows have never been materialized
+    built = {(row.student_class, row.term) for row in subject_rows}
+    stale = [key for key in keys if key not in built]
+    if stale:
+        rebuild_class_term_stats(db, stale)
+        db.commit()
+        summaries = {
+            (s.student_class, s.term): s
+            for s in db.query(S).filter(S.student_id == student_id).all()
+        }
+        subject_rows = db.query(C).filter(class_filter).all()
+
+    out = {
+        key: {
+            "max_subject_count": 1,
+            "average": summaries[key].average_score if key in summaries else None,
+            "position": summaries[key].position if key in summaries else None,
+            "total_students": 0,
+            "subject_stats": {},
+        }
+        for key in keys
+    }
+    for row in subject_rows:
+        entry = out[(row.student_class, row.term)]
+        entry["max_subject_count"] = row.total_subjects
+        entry["total_students"] = row.total_students
+        entry["subject_stats"][row.subject] = {
+            "min": row.min_score,
+            "max": row.max_score,
+            "median": row.median_score,
+        }
+
+    return out
+
+
+def get_class_term_stats(
+    db: Session,
+    keys: Iterable[Tuple[str, str]],
+    expected: Dict[Tuple[str, str], Iterable[int]] = None,
+) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """
+    Reads every student's standing for each (student_class, term) from the materialized
+    tables: two queries however many students. As in get_student_term_stats, class/terms
+    that have not been materialized yet, or that miss a student listed for them in
+    expected (e.g. rows only just linked), are rebuilt on the spot and committed.
+
+    Returns {(student_class, term): {
+        "max_subject_count", "total_students",
+        "students": {student_id: {"total", "average", "position"}},
+        "subject_stats": {subject: {"min", "max", "median"}},
+    }}
+    """
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return {}
+
+    S = models.StudentTermSummary
+    C = models.ClassTermStats
+
+    def read():
+        return (
+            db.query(S.student_class, S.term, S.student_id, S.total_score, S.average_score, S.position)
+            .filter(_class_term_filter(keys, S))
+            .all(),
+            db.query(C).filter(_class_term_filter(keys, C)).all(),
+        )
+
+    summary_rows, subject_rows = read()
+    built = {(row.student_class, row.term) for row in subject_rows}
+    ranked = {}
+    for student_class, term, sid, *_ in summary_rows:
+        ranked.setdefault((student_class, term), set()).add(sid)
+    stale = [
+        key for key in keys
+        if key not in built or not set((expected or {}).get(key, ())) <= ranked.get(key, set())
+    ]
+    if stale:
+        rebuild_class_term_stats(db, stale)
+        db.commit()
+        summary_rows, subject_rows = read()
+
+    out = {
+        key: {"max_subject_count": 1, "total_students": 0, "students": {}, "subject_stats": {}}
+        for key in keys
+    }
+    for student_class, term, sid, total_score, average, position in summary_rows:
+        out[(student_class, term)]["students"][sid] = {
+            "total": total_score,
+            "average": average,
+            "position": position,
+        }
+    for row in subject_rows:
+        entry = out[(row.student_class, row.term)]
+        entry["max_subject_count"] = row.total_subjects
+        entry["total_students"] = row.total_students
+        entry["subject_stats"][row.subject] = {
+            "min": row.min_score,
+            "max": row.max_score,
+            "median": row.median_score,
+        }
+
+    return out
@@ -0,0 +1,183 @@
+# backend/utils/report_cache.py
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from database import SessionLocal
+import models
+from utils.groq_agent import PROMPT_VERSION, build_student_report, stream_student_report
+from utils.report_providers import REPORT_LATENCY_BUDGET, fallback_provider, get_report_provider
+
+# Reports kept in memory per worker in front of the report_cache table.
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "1024"))
+
+_HASHED_FIELDS = ("term", "session", "subject", "percentage", "total_subjects")
+
+
+class LRUCache:
+    """Thread-safe size-bounded LRU map with hit/miss counters."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard_where(self, predicate):
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+            }
+
+
+_memory = LRUCache(REPORT_CACHE_SIZE)
+_db_counts = {"hits": 0, "misses": 0}
+
+
+def report_input_hash(results: List[Dict[str, Any]]) -> str:
+    """Stable hash of everything the report is generated from, plus prompt version and provider."""
+    rows = sorted(
+        [str(r.get(field)) for field in _HASHED_FIELDS]
+        for r in results
+    )
+    payload = json.dumps({"rows": rows, "prompt_version": PROMPT_VERSION,
+                          "model": get_report_provider().name})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_report(db: Session, student_id: int, input_hash: str) -> Optional[str]:
+    key = (student_id, input_hash)
+    report = _memory.get(key)
+    if report is not None:
+        return report
+
+    row = (
+        db.query(models.ReportCache.report)
+        .filter(models.ReportCache.student_id == student_id,
+                models.ReportCache.input_hash == input_hash)
+        .first()
+    )
+    if row is None:
+        _db_counts["misses"] += 1
+        return None
+
+    _db_counts["hits"] += 1
+    _memory.put(key, row.report)
+    return row.report
+
+
+def store_report(db: Session, student_id: int, input_hash: str, report: str):
+    _memory.put((student_id, input_hash), report)
+    try:
+        db.add(models.ReportCache(
+            student_id=student_id,
+            input_hash=input_hash,
+            prompt_version=PROMPT_VERSION,
+            model=get_report_provider().name,
+            report=report,
+            created_at=datetime.utcnow(),
+        ))
+        db.commit()
+    except IntegrityError:
+        # Another request stored the same report first
+        db.rollback()
+
+
+def cached_student_report(db: Session, student_id: int, results: List[Dict[str, Any]], llm_client=None) -> str:
+    """
+    Returns the academic analysis for a student's results, generating it only when
+    the scores (or prompt/model version) have changed since it was last stored.
+    Incomplete reports (some section failed or was written by the fallback within
+    REPORT_LATENCY_BUDGET) are returned but not cached.
+    """
+    input_hash = report_input_hash(results)
+    report = get_cached_report(db, student_id, input_hash)
+    if report is not None:
+        return report
+
+    report, complete = build_student_report(results, llm_client, fallback=fallback_provider(),
+                                            budget=REPORT_LATENCY_BUDGET)
+    if complete:
+        store_report(db, student_id, input_hash, report)
+    return report
+
+
+def stream_and_cache_report(student_id: int, results: List[Dict[str, Any]], llm_client=None) -> Iterator[str]:
+    """
+    Streams a freshly generated report and stores it once it has finished, if complete.
+    Uses its own session since it outlives the request that started it. Sections the
+    provider has not started within REPORT_LATENCY_BUDGET come from the fallback.
+    """
+    input_hash = report_input_hash(results)
+    stream = stream_student_report(results, llm_client, fallback=fallback_provider(),
+                                   budget=REPORT_LATENCY_BUDGET)
+    parts = []
+    while True:
+        try:
+            piece = next(stream)
+        except StopIteration as stop:
+            complete = stop.value
+            break
+        parts.append(piece)
+        yield piece
+
+    if complete:
+        db = SessionLocal()
+        try:
+            store_report(db, student_id, input_hash, "".join(parts))
+        finally:
+            db.close()
+
+
+def invalidate_reports(db: Session, student_ids: Iterable[int]):
+    """Drops stored reports for these students. The caller commits."""
+    student_ids = {sid for sid in student_ids if sid is not None}
+    if not student_ids:
+        return
+    db.query(models.ReportCache).filter(
+        models.ReportCache.student_id.in_(student_ids)
+    ).delete(synchronize_session=False)
+    _memory.discard_where(lambda key: key[0] in student_ids)
+
+
+def cache_stats() -> Dict[str, Any]:
+    return {"memory": _memory.stats(), "database": dict(_db_counts)}
@@ -0,0 +1,191 @@
+# backend/utils/report_cards.py
+"""
+Renders report cards from the card dicts built by utils/report_export.py: a
+student's scores, class standing and academic analysis for each term, as HTML or,
+when reportlab is installed, PDF; plus the CSV summary of a whole export.
+
+Nothing here touches the database, so process-pool workers only import this module.
+"""
+
+import csv
+import html
+import io
+import re
+from typing import Any, Dict, Iterable, List, Tuple
+
+FORMATS = ("html", "pdf")
+
+_SECTION_HEADER = re.compile(r"^={10,}\n(.*?)\n={10,}\n", re.M)
+
+
+def pdf_available() -> bool:
+    try:
+        import reportlab  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", text or "").strip("_") or "unnamed"
+
+
+def card_filename(card: Dict[str, Any], fmt: str) -> str:
+    """Path inside the archive, one folder per class, e.g. JSS_1/STU00012_Aisha_Bello.html."""
+    return f"{_slug(card['student_class'])}/{_slug(card['username'])}_{_slug(card['name'])}.{fmt}"
+
+
+def _pct(value) -> str:
+    return "" if value is None else f"{value:g}%"
+
+
+def _standing(term: Dict[str, Any]) -> str:
+    position = (
+        f"{term['position_label']} of {term['total_students']}" if term["position"] else "not ranked"
+    )
+    average = "" if term["average"] is None else f"{term['average']:.1f}%"
+    return (
+        f"Average {average}, position {position}, "
+        f"{term['subjects_taken']} of {term['total_subjects']} subjects"
+    )
+
+
+def analysis_sections(report: str) -> List[Tuple[str, List[str]]]:
+    """(title, paragraphs) for each section of an academic analysis (see groq_agent._section)."""
+    parts = _SECTION_HEADER.split(report)
+    sections = []
+    if parts[0].strip():
+        sections.append(("", parts[0]))
+    sections.extend(zip(parts[1::2], parts[2::2]))
+    return [
+        (title.strip(), [p.strip() for p in body.split("\n\n") if p.strip()])
+        for title, body in sections
+    ]
+
+
+# ---------- HTML ----------
+
+_CSS = """
+body { font-family: Georgia, serif; color: #222; max-width: 800px; margin: 2em auto; padding: 0 1em; }
+h1 { margin-bottom: 0.2em; }
+.meta { color: #555; margin-top: 0; }
+table { border-collapse: collapse; width: 100%; margin: 0.5em 0 1.5em; }
+th, td { border: 1px solid #bbb; padding: 4px 8px; text-align: left; }
+td.num, th.num { text-align: right; }
+th { background: #f0f0f0; }
+.standing { font-weight: bold; }
+@media print { body { margin: 0; } section { page-break-inside: avoid; } }
+""".strip()
+
+
+def render_html(card: Dict[str, Any]) -> str:
+    e = html.escape
+    out = [
+        "<!DOCTYPE html>",
+        '<html lang="en"><head><meta charset="utf-8">',
+        f"<title>Report card - {e(card['name'])}</title>",
+        f"<style>{_CSS}</style></head><body>",
+        f"<h1>{e(card['name'])}</h1>",
+        f'<p class="meta">{e(card["student_class"])} &middot; {e(card["session"] or "")} &middot; '
+        f"{e(card['username'])}</p>",
+    ]
+    for term in card["terms"]:
+        out.append("<section>")
+        out.append(f"<h2>{e(term['term'])} ({e(term['session'] or '')})</h2>")
+        out.append(f'<p class="standing">{e(_standing(term))}</p>')
+        out.append('<table><tr><th>Subject</th><th class="num">Score</th><th class="num">Class lowest</th>'
+                   '<th class="num">Class median</th><th class="num">Class highest</th></tr>')
+        for s in term["subjects"]:
+            out.append(
+                f"<tr><td>{e(s['subject'])}</td><td class=\"num\">{_pct(s['percentage'])}</td>"
+                f"<td class=\"num\">{_pct(s['min'])}</td><td class=\"num\">{_pct(s['median'])}</td>"
+                f"<td class=\"num\">{_pct(s['max'])}</td></tr>"
+            )
+        out.append("</table></section>")
+
+    if card["analysis"]:
+        out.append("<section><h2>Academic analysis</h2>")
+        for title, paragraphs in analysis_sections(card["analysis"]):
+            if title:
+                out.append(f"<h3>{e(title)}</h3>")
+            out.extend(f"<p>{e(p)}</p>" for p in paragraphs)
+        out.append("</section>")
+
+    out.append("</body></html>")
+    return "\n".join(out)
+
+
+# ---------- PDF ----------
+
+def render_pdf(card: Dict[str, Any]) -> bytes:
+    """Needs reportlab (pip install reportlab); check pdf_available() first."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    def e(text) -> str:
+        return html.escape(str(text or ""), quote=False)
+
+    styles = getSampleStyleSheet()
+    story = [
+        Paragraph(e(card["name"]), styles["Title"]),
+        Paragraph(f"{e(card['student_class'])} &middot; {e(card['session'])} &middot; {e(card['username'])}",
+                  styles["Normal"]),
+    ]
+    for term in card["terms"]:
+        story.append(Paragraph(f"{e(term['term'])} ({e(term['session'])})", styles["Heading2"]))
+        story.append(Paragraph(f"<b>{e(_standing(term))}</b>", styles["Normal"]))
+        story.append(Spacer(1, 6))
+        rows = [["Subject", "Score", "Class lowest", "Class median", "Class highest"]]
+        rows.extend(
+            [s["subject"], _pct(s["percentage"]), _pct(s["min"]), _pct(s["median"]), _pct(s["max"])]
+            for s in term["subjects"]
+        )
+        table = Table(rows, repeatRows=1, hAlign="LEFT")
+        table.setStyle(TableStyle([
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+            ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+        ]))
+        story.append(table)
+
+    if card["analysis"]:
+        story.append(Paragraph("Academic analysis", styles["Heading2"]))
+        for title, paragraphs in analysis_sections(card["analysis"]):
+            if title:
+                story.append(Paragraph(e(title), styles["Heading3"]))
+            story.extend(Paragraph(e(p), styles["BodyText"]) for p in paragraphs)
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=A4, title=f"Report card - {card['name']}").build(story)
+    return buffer.getvalue()
+
+
+def render_card(card: Dict[str, Any], fmt: str) -> Tuple[str, bytes]:
+    """(archive path, file contents) for one card; the unit of work for the process pool."""
+    data = render_pdf(card) if fmt == "pdf" else render_html(card).encode("utf-8")
+    return card_filename(card, fmt), data
+
+
+# ---------- CSV summary ----------
+
+def summary_csv(cards: Iterable[Dict[str, Any]]) -> bytes:
+    """One row per student and term: standing, then a score column per subject."""
+    cards = list(cards)
+    subjects = sorted({s["subject"] for card in cards for term in card["terms"] for s in term["subjects"]})
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["username", "name", "class", "term", "session", "average", "total", "position",
+                     "total_students", "subjects_taken", "total_subjects", *subjects])
+    for card in cards:
+        for term in card["terms"]:
+            scores = {s["subject"]: s["percentage"] for s in term["subjects"]}
+            writer.writerow([
+                card["username"], card["name"], term["student_class"], term["term"], term["session"],
+                "" if term["average"] is None else round(term["average"], 2),
+                term["total"], term["position"], term["total_students"],
+                term["subjects_taken"], term["total_subjects"],
+                *(scores.get(subject, "") for subject in subjects),
+            ])
+    return out.getvalue().encode("utf-8")
@@ -0,0 +1,320 @@
+# backend/utils/report_export.py
+"""
+Bulk report-card export for a class, term or session, as a ZIP archive.
+
+load_report_cards reads everything in a few set-based queries, whatever the
+class size: the result rows with their students, the materialized class
+standings (utils/ranking.py) and the stored academic analyses. It never calls
+the LLM: analyses come from the report cache (see ?pregenerate on upload) or,
+with analysis="template", from the local template provider.
+
+report_cards_zip renders the cards across a process pool (EXPORT_WORKERS) and
+writes each archive entry as soon as its card is back, keeping at most a few
+cards per worker in flight, so memory stays flat however many students there are.
+Served by GET /results/export/report-cards, or from the command line:
+
+    python -m utils.report_export --class "JSS 1" --term "First Term" --out jss1.zip
+"""
+
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from sqlalchemy.orm import Session
+from database import SessionLocal
+import models
+from utils.groq_agent import build_student_report
+from utils.ranking import get_class_term_stats, ordinal
+from utils.report_cache import report_input_hash
+from utils.report_cards import FORMATS, pdf_available, render_card, summary_csv
+from utils.report_providers import get_report_provider
+
+# Processes rendering cards; 1 renders in the exporting thread instead
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", str(os.cpu_count() or 1)))
+# Cards queued per worker ahead of the one being written to the archive
+EXPORT_WINDOW = 4
+
+ANALYSIS_MODES = ("cached", "template", "none")
+
+_TERM_ORDER = {"First Term": 1, "Second Term": 2, "Third Term": 3}
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def load_report_cards(
+    db: Session,
+    student_class: str = None,
+    term: str = None,
+    session: str = None,
+    analysis: str = "cached",
+) -> List[Dict[str, Any]]:
+    """
+    One card per student with results matching the filters, ordered by class and name.
+    Rows not linked to a student account are left out.
+
+    Card: {"student_id", "username", "name", "student_class", "session", "analysis",
+           "terms": [{"term", "session", "student_class", "average", "total", "position",
+                      "position_label", "total_students", "subjects_taken", "total_subjects",
+                      "subjects": [{"subject", "percentage", "min", "max", "median"}]}]}
+    """
+    R = models.StudentResult
+    U = models.User
+    query = (
+        db.query(R.student_id, R.name, R.student_class, R.subject, R.percentage, R.term, R.session,
+                 U.username, U.full_name)
+        .join(U, U.id == R.student_id)
+    )
+    for column, value in (("student_class", student_class), ("term", term), ("session", session)):
+        if value is not None:
+            query = query.filter(getattr(R, column) == value)
+    rows = query.all()
+    if not rows:
+        return []
+
+    # student -> term -> rows; each term is ranked within the class it was sat in
+    students: Dict[int, Dict[str, list]] = {}
+    identity = {}
+    for row in rows:
+        students.setdefault(row.student_id, {}).setdefault(row.term, []).append(row)
+        identity.setdefault(row.student_id, row)
+
+    # The analysis covers all of a student's results, as on /myResults, so a
+    # filtered export still reads every term to find it in the report cache
+    filtered = any(value is not None for value in (student_class, term, session))
+    history = students
+    if analysis != "none" and filtered:
+        history = {}
+        for row in (
+            db.query(R.student_id, R.name, R.student_class, R.subject, R.percentage, R.term, R.session)
+            .filter(R.student_id.in_(list(students)))
+            .all()
+        ):
+            history.setdefault(row.student_id, {}).setdefault(row.term, []).append(row)
+
+    expected: Dict[Tuple[str, str], set] = {}
+    for by_term in (students, history):
+        for sid, terms in by_term.items():
+            for term_name, term_rows in terms.items():
+                expected.setdefault((term_rows[0].student_class, term_name), set()).add(sid)
+    stats = get_class_term_stats(db, expected.keys(), expected)
+
+    cards = []
+    hashed_results = {}
+    for sid, terms in students.items():
+        first = identity[sid]
+        card_terms = []
+        for term_name in sorted(terms, key=lambda t: _TERM_ORDER.get(t, 0)):
+            term_rows = sorted(terms[term_name], key=lambda r: r.subject or "")
+            key = (term_rows[0].student_class, term_name)
+            entry = stats[key]
+            standing = entry["students"].get(sid, {})
+            subject_stats = entry["subject_stats"]
+            card_terms.append({
+                "term": term_name,
+                "session": term_rows[0].session,
+                "student_class": key[0],
+                "average": standing.get("average"),
+                "total": standing.get("total"),
+                "position": standing.get("position"),
+                "position_label": ordinal(standing.get("position")),
+                "total_students": entry["total_students"],
+                "subjects_taken": len(term_rows),
+                "total_subjects": entry["max_subject_count"],
+                "subjects": [
+                    {
+                        "subject": r.subject,
+                        "percentage": r.percentage,
+                        "min": subject_stats.get(r.subject, {}).get("min"),
+                        "max": subject_stats.get(r.subject, {}).get("max"),
+                        "median": subject_stats.get(r.subject, {}).get("median"),
+                    }
+                    for r in term_rows
+                ],
+            })
+
+        # Same fields /myResults passes to the report, so the cache key matches
+        hashed_results[sid] = [
+            {"name": r.name, "term": r.term, "session": r.session, "subject": r.subject,
+             "percentage": r.percentage,
+             "total_subjects": stats[(term_rows[0].student_class, term_name)]["max_subject_count"]}
+            for term_name, term_rows in history.get(sid, {}).items()
+            for r in term_rows
+        ]
+        latest = card_terms[-1]
+        cards.append({
+            "student_id": sid,
+            "username": first.username,
+            "name": first.full_name or first.name or first.username,
+            "student_class": latest["student_class"],
+            "session": latest["session"],
+            "terms": card_terms,
+            "analysis": None,
+        })
+
+    if analysis != "none":
+        _attach_analyses(db, cards, hashed_results, write_missing=analysis == "template")
+
+    cards.sort(key=lambda card: (card["student_class"] or "", card["name"].lower(), card["student_id"]))
+    return cards
+
+
+def _attach_analyses(db: Session, cards: List[Dict[str, Any]], results: Dict[int, list], write_missing: bool):
+    hashes = {card["student_id"]: report_input_hash(results[card["student_id"]]) for card in cards}
+    RC = models.ReportCache
+    stored = {
+        (sid, input_hash): report
+        for sid, input_hash, report in db.query(RC.student_id, RC.input_hash, RC.report)
+        .filter(RC.student_id.in_(list(hashes)), RC.input_hash.in_(set(hashes.values())))
+        .all()
+    }
+
+    template = get_report_provider("template") if write_missing else None
+
+    for card in cards:
+        sid = card["student_id"]
+        card["analysis"] = stored.get((sid, hashes[sid]))
+        if card["analysis"] is None and template is not None:
+            card["analysis"] = build_student_report(results[sid], provider=template)[0]
+
+
+# ---------- Rendering and the archive ----------
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    # spawn, not fork: the API process has threads (and their locks) a fork would copy
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pools[workers]
+
+
+def shutdown_export_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+
+def render_cards(cards: Iterable[Dict[str, Any]], fmt: str, workers: int = None) -> Iterator[Tuple[str, bytes]]:
+    """(archive path, contents) for each card, in order, rendered workers at a time."""
+    workers = workers or EXPORT_WORKERS
+    if workers <= 1:
+        for card in cards:
+            yield render_card(card, fmt)
+        return
+
+    pool = _pool(workers)
+    pending = deque()
+    try:
+        for card in cards:
+            pending.append(pool.submit(render_card, card, fmt))
+            if len(pending) >= workers * EXPORT_WINDOW:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # The client may go away mid-download
+        for future in pending:
+            future.cancel()
+
+
+class _ArchiveBuffer:
+    """Write-only file for ZipFile that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def zip_stream(entries: Iterable[Tuple[str, bytes]]) -> Iterator[bytes]:
+    """
+    A ZIP archive of entries, yielded entry by entry. The output is never seeked,
+    so sizes go in data descriptors and nothing is kept once it has been yielded.
+    """
+    buffer = _ArchiveBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in entries:
+            # PDFs are compressed already
+            archive.writestr(name, data, compress_type=zipfile.ZIP_STORED if name.endswith(".pdf") else None)
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def report_cards_zip(cards: List[Dict[str, Any]], fmt: str = "html", workers: int = None) -> Iterator[bytes]:
+    """summary.csv followed by one card per student, as streamed ZIP bytes."""
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {', '.join(FORMATS)}")
+
+    def entries():
+        yield "summary.csv", summary_csv(cards)
+        yield from render_cards(cards, fmt, workers)
+
+    return zip_stream(entries())
+
+
+def export_filename(student_class: str = None, term: str = None, session: str = None) -> str:
+    parts = [p for p in (student_class, term, session) if p]
+    slug = "_".join("".join(c if c.isalnum() else "_" for c in p).strip("_") for p in parts)
+    return f"report_cards_{slug or 'all'}.zip"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export report cards for a class, term or session as a ZIP.")
+    parser.add_argument("--class", dest="student_class", help="class to export")
+    parser.add_argument("--term", help="term to export")
+    parser.add_argument("--session", help="session to export, e.g. 2024/2025")
+    parser.add_argument("--format", choices=FORMATS, default="html")
+    parser.add_argument("--analysis", choices=ANALYSIS_MODES, default="cached",
+                        help="stored analyses only, fill missing ones from the template provider, or none")
+    parser.add_argument("--workers", type=int, default=EXPORT_WORKERS, help="rendering processes")
+    parser.add_argument("--out", help="archive path (default: report_cards_<filters>.zip)")
+    args = parser.parse_args(argv)
+
+    if args.format == "pdf" and not pdf_available():
+        parser.error("PDF export needs reportlab (pip install reportlab)")
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        cards = load_report_cards(db, args.student_class, args.term, args.session, args.analysis)
+    finally:
+        db.close()
+    if not cards:
+        print("No results found")
+        return 1
+    loaded = time.perf_counter()
+
+    path = args.out or export_filename(args.student_class, args.term, args.session)
+    size = 0
+    try:
+        with open(path, "wb") as f:
+            for chunk in report_cards_zip(cards, args.format, args.workers):
+                f.write(chunk)
+                size += len(chunk)
+    finally:
+        shutdown_export_pools()
+
+    print(f"{len(cards)} report cards ({args.format}) -> {path}, {size / 1024:.0f} KiB; "
+          f"loaded in {loaded - started:.2f}s, rendered in {time.perf_counter() - loaded:.2f}s "
+          f"with {args.workers} worker(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
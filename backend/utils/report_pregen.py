@@ -0,0 +1,236 @@
+# backend/utils/report_pregen.py
+"""
+Generates and stores academic analyses ahead of time so the first /myResults view
+after an upload is a cache hit.
+
+Runs as a "report_pregen" background job (queued after an upload with
+?pregenerate=true) or from the command line:
+
+    python -m utils.report_pregen --class "JSS 1" --term "First Term" --dry-run
+"""
+
+import argparse
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, sessionmaker
+from database import SessionLocal, engine
+import models
+from utils.groq_agent import StubLLMClient, build_student_report, on_llm_request
+from utils.jobs import register_job_handler
+from utils.report_cache import get_cached_report, report_input_hash, store_report
+from utils.student_results import load_student_results
+
+logger = logging.getLogger(__name__)
+
+# Queue pre-generation after every upload unless the request says otherwise.
+PREGENERATE_REPORTS = os.getenv("PREGENERATE_REPORTS", "false").lower() in ("1", "true", "yes")
+
+# Students processed at once, and the provider quota in LLM requests per second
+# (Groq's free tier allows 30 per minute) with the burst allowed on top.
+PREGEN_CONCURRENCY = int(os.getenv("REPORT_PREGEN_CONCURRENCY", "4"))
+PREGEN_RATE = float(os.getenv("REPORT_PREGEN_RATE", "0.5"))
+PREGEN_BURST = int(os.getenv("REPORT_PREGEN_BURST", "5"))
+
+
+class _RollbackSession(Session):
+    """
+    Dry runs load students through the same code, which commits name links and
+    standings rebuilt on the spot: here commit only flushes, and closing the
+    session rolls it all back.
+    """
+
+    def commit(self):
+        self.flush()
+
+
+_DryRunSession = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=_RollbackSession)
+
+
+class TokenBucket:
+    """Blocking token-bucket rate limiter shared by the pre-generation threads."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 1):
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def students_for_class_terms(db: Session, keys: Iterable[Tuple[str, str]]) -> List[int]:
+    keys = list(keys)
+    if not keys:
+        return []
+    S = models.StudentTermSummary
+    rows = (
+        db.query(S.student_id)
+        .filter(or_(*[and_(S.student_class == c, S.term == t) for c, t in keys]))
+        .distinct()
+        .order_by(S.student_id)
+        .all()
+    )
+    return [sid for (sid,) in rows]
+
+
+def _pregenerate_one(student_id: int, before_request: Callable[[], None], llm_pool: ThreadPoolExecutor,
+                     dry_run: bool, llm_client) -> str:
+    db = (_DryRunSession if dry_run else SessionLocal)()
+    try:
+        user = db.query(models.User).filter(models.User.id == student_id).first()
+        student = load_student_results(db, user) if user else None
+        if dry_run:
+            # Drop anything written so far now rather than hold it through the LLM calls
+            db.rollback()
+        if not student:
+            return "skipped"
+
+        results = student["results"]
+        input_hash = report_input_hash(results)
+        if get_cached_report(db, student_id, input_hash) is not None:
+            return "cached"
+
+        with on_llm_request(before_request, llm_pool):
+            report, complete = build_student_report(results, llm_client)
+        if not complete:
+            return "failed"
+        if not dry_run:
+            store_report(db, student_id, input_hash, report)
+        return "generated"
+    finally:
+        db.close()
+
+
+def pregenerate_reports(
+    student_ids: Iterable[int],
+    concurrency: int = None,
+    rate: float = None,
+    burst: int = None,
+    dry_run: bool = False,
+    llm_client=None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Generates and stores reports for student_ids, concurrency students at a time,
+    with LLM requests limited to rate per second (llm_requests in the summary).
+
+    Students whose report is already stored for their current scores are skipped,
+    so a run that crashed can be repeated and picks up where it stopped.
+    dry_run answers every prompt with a StubLLMClient (unless llm_client is given)
+    and stores nothing. progress, if given, is called with (done, failed).
+    """
+    student_ids = list(dict.fromkeys(student_ids))
+    limiter = TokenBucket(rate or PREGEN_RATE, burst or PREGEN_BURST)
+    if dry_run and llm_client is None:
+        llm_client = StubLLMClient()
+
+    # Every completion request, counted and rate limited as it is sent (retries and
+    # per-section calls after a partial batched answer included). Providers that
+    # make no requests, like the template engine, never touch the limiter. The
+    # requests run on llm_pool, so those waiting for a token do not tie up the
+    # LLM pool interactive /myResults reports use.
+    llm_requests = [0]
+    llm_requests_lock = threading.Lock()
+
+    def before_request():
+        with llm_requests_lock:
+            llm_requests[0] += 1
+        limiter.acquire()
+
+    counts = {"generated": 0, "cached": 0, "skipped": 0, "failed": 0}
+    started = time.perf_counter()
+
+    workers = concurrency or PREGEN_CONCURRENCY
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-pregen-llm") as llm_pool, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-pregen") as pool:
+        futures = [
+            pool.submit(_pregenerate_one, sid, before_request, llm_pool, dry_run, llm_client)
+            for sid in student_ids
+        ]
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                counts[future.result()] += 1
+            except Exception:
+                logger.exception("Report pre-generation failed")
+                counts["failed"] += 1
+            if progress:
+                progress(done, counts["failed"])
+
+    return {
+        "total": len(student_ids),
+        **counts,
+        "llm_requests": llm_requests[0],
+        "dry_run": dry_run,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+@register_job_handler("report_pregen")
+def run_report_pregen_job(db: Session, job: models.BackgroundJob, progress):
+    params = job.params or {}
+    student_ids = params.get("student_ids") or students_for_class_terms(
+        db, [tuple(key) for key in params.get("class_terms", [])]
+    )
+    return pregenerate_reports(
+        student_ids,
+        concurrency=params.get("concurrency"),
+        rate=params.get("rate"),
+        dry_run=params.get("dry_run", False),
+        progress=progress,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate student academic analyses.")
+    parser.add_argument("--class", dest="student_class", help="class to generate for (default: all)")
+    parser.add_argument("--term", help="term to generate for (default: all)")
+    parser.add_argument("--concurrency", type=int, default=PREGEN_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=PREGEN_RATE, help="LLM requests per second")
+    parser.add_argument("--dry-run", action="store_true", help="use a stub LLM and store nothing")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        S = models.StudentTermSummary
+        keys = db.query(S.student_class, S.term).distinct()
+        if args.student_class:
+            keys = keys.filter(S.student_class == args.student_class)
+        if args.term:
+            keys = keys.filter(S.term == args.term)
+        student_ids = students_for_class_terms(db, keys.all())
+    finally:
+        db.close()
+
+    def report_progress(done, failed):
+        print(f"\r{done}/{len(student_ids)} students, {failed} failed", end="", flush=True)
+
+    summary = pregenerate_reports(
+        student_ids,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        dry_run=args.dry_run,
+        progress=report_progress,
+    )
+    print()
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# backend/utils/report_providers.py
+"""
+Backends that write the sections of a student's academic analysis.
+
+groq_agent builds the sections (prompt plus the facts behind it) and assembles
+the report; a provider only writes each section's body:
+
+- groq      the Groq chat model (default)
+- template  a deterministic local writer working from the computed statistics:
+            same paragraph structure (standing, strengths at 70% and above,
+            weaknesses below 50%, recommendations, closing), microseconds per report
+- stub      canned text through the Groq code path, for tests and dry runs
+
+REPORT_PROVIDER picks the provider. Interactive requests give it
+REPORT_LATENCY_BUDGET seconds (0 disables); sections not started by then are
+written by the template engine, so a slow or failing provider cannot hold a
+page open. Those reports are not cached, and the next view tries again.
+"""
+
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from utils.groq_agent import MODEL, StubLLMClient, _batched_request, _complete, _stream_complete
+
+REPORT_PROVIDER = os.getenv("REPORT_PROVIDER", "groq").lower()
+REPORT_LATENCY_BUDGET = float(os.getenv("REPORT_LATENCY_BUDGET", "8"))
+
+STRONG_MARK = 70
+WEAK_MARK = 50
+
+
+class ReportProvider:
+    """Writes the body of one report section (see groq_agent._report_sections)."""
+
+    # Stored with cached reports and part of their cache key
+    name = "base"
+    # True when write() waits on the network, so callers run it on a thread with a deadline
+    remote = False
+    # True if write_batch/stream_batch can answer every section of a report in one request
+    batched = False
+
+    def write(self, section: Dict[str, Any]) -> str:
+        raise NotImplementedError
+
+    def stream(self, section: Dict[str, Any]) -> Iterator[str]:
+        yield self.write(section)
+
+    def write_batch(self, sections: List[Dict[str, Any]]) -> str:
+        """All sections in one answer, each after its marker line (see groq_agent._SectionSplitter)."""
+        raise NotImplementedError
+
+    def stream_batch(self, sections: List[Dict[str, Any]]) -> Iterator[str]:
+        yield self.write_batch(sections)
+
+
+class GroqProvider(ReportProvider):
+    name = MODEL
+    remote = True
+    batched = True
+
+    def __init__(self, llm_client=None):
+        # None means the module client, created on first use
+        self.llm_client = llm_client
+
+    def write(self, section: Dict[str, Any]) -> str:
+        return _complete(section["messages"], section["max_tokens"], self.llm_client)
+
+    def stream(self, section: Dict[str, Any]) -> Iterator[str]:
+        return _stream_complete(section["messages"], section["max_tokens"], self.llm_client)
+
+    def write_batch(self, sections: List[Dict[str, Any]]) -> str:
+        return _complete(*_batched_request(sections), self.llm_client)
+
+    def stream_batch(self, sections: List[Dict[str, Any]]) -> Iterator[str]:
+        return _stream_complete(*_batched_request(sections), self.llm_client)
+
+
+class StubProvider(GroqProvider):
+    """Canned text through the Groq request path, without a network call."""
+    name = "stub"
+
+    def __init__(self, text: str = None, delay: float = 0.0):
+        super().__init__(StubLLMClient(delay=delay) if text is None else StubLLMClient(text, delay))
+
+
+def _pct(value: float) -> str:
+    return f"{value:g}%"
+
+
+def _join(items: List[str]) -> str:
+    if len(items) <= 1:
+        return "".join(items)
+    return f"{', '.join(items[:-1])} and {items[-1]}"
+
+
+def _scored(pairs: List[Tuple[str, float]]) -> str:
+    return _join([f"{subject} ({_pct(score)})" for subject, score in pairs])
+
+
+# (lower bound of the average, standing, closing sentence)
+_STANDING = [
+    (75, "an excellent term",
+     "This is a term to be proud of; keep the same habits and aim to stay this consistent next term."),
+    (60, "a good term",
+     "With steady effort on the weaker subjects, the next term can be even better."),
+    (50, "a fair term",
+     "There is real potential here, and a focused plan for the coming weeks can lift every subject."),
+    (float("-inf"), "a difficult term",
+     "One difficult term does not define a student; with support and regular practice, improvement is well within reach."),
+]
+
+_ADVICE = [
+    "For {subject}, a short daily revision session on the topics where marks were lost would help.",
+    "In {subject}, working through past questions and going over every mistake with the teacher would build confidence.",
+    "For {subject}, studying with a classmate who is strong in it and asking questions early in each topic would make a difference.",
+]
+
+
+class TemplateProvider(ReportProvider):
+    """Deterministic plain-text analysis from the numbers in section["facts"]."""
+    # Bump when the wording changes so cached template reports are rewritten
+    name = "template-1"
+
+    def write(self, section: Dict[str, Any]) -> str:
+        facts = section["facts"]
+        if facts["kind"] == "comparison":
+            return self._comparison(facts)
+        return self._term(facts)
+
+    def _term(self, facts: Dict[str, Any]) -> str:
+        student = facts["student"] or "The student"
+        average = facts["average"]
+        scores = facts["scores"]
+        session = f" of the {facts['session']} session" if facts["session"] else ""
+        standing, closing = next((s, c) for bound, s, c in _STANDING if average >= bound)
+
+        paragraphs = [
+            f"{student} had {standing} in the {facts['term']}{session}, with an average score of "
+            f"{average:.1f}% across {len(scores)} subjects. Scores ranged from {_pct(facts['lowest'])} "
+            f"to {_pct(facts['highest'])}."
+        ]
+
+        by_score = sorted(scores, key=lambda pair: (-pair[1], pair[0]))
+        strong = [pair for pair in by_score if pair[1] >= STRONG_MARK]
+        if strong:
+            paragraphs.append(
+                f"The strongest {'result was' if len(strong) == 1 else 'results were'} in {_scored(strong)}, "
+                f"showing a solid grasp of the material and study habits worth keeping."
+            )
+        elif by_score:
+            paragraphs.append(
+                f"No subject reached {STRONG_MARK}% this term. The best results, in {_scored(by_score[:2])}, "
+                f"are the natural place to build clear strengths."
+            )
+
+        weak = sorted((pair for pair in scores if pair[1] < WEAK_MARK), key=lambda pair: (pair[1], pair[0]))
+        if weak:
+            paragraphs.append(
+                f"{_scored(weak)} {'is' if len(weak) == 1 else 'are'} below {WEAK_MARK}% and "
+                f"{'needs' if len(weak) == 1 else 'need'} attention before the gaps grow."
+            )
+        else:
+            paragraphs.append(f"Every subject is at or above {WEAK_MARK}%, so no subject is in immediate difficulty.")
+
+        focus = weak[:3] or sorted(scores, key=lambda pair: (pair[1], pair[0]))[:2]
+        if focus:
+            paragraphs.append(" ".join(
+                _ADVICE[i % len(_ADVICE)].format(subject=subject) for i, (subject, _) in enumerate(focus)
+            ))
+
+        paragraphs.append(closing)
+        return "\n\n".join(paragraphs)
+
+    def _comparison(self, facts: Dict[str, Any]) -> str:
+        student = facts["student"] or "the student"
+        terms = facts["terms"]
+        first, last = terms[0], terms[-1]
+        change = last["average"] - first["average"]
+        if change > 2:
+            trend = f"an improvement of {change:.1f} points"
+            trajectory = ("This upward trajectory shows that the effort being made is paying off, and it is a "
+                          "strong base for the terms ahead.")
+        elif change < -2:
+            trend = f"a decline of {-change:.1f} points"
+            trajectory = ("This downward trajectory calls for attention now, while there is time to recover; "
+                          "identifying what changed between terms is the first step.")
+        else:
+            trend = "a broadly consistent level"
+            trajectory = ("This consistency shows reliable work habits; the next step is to push the weaker "
+                          "subjects up so the average can rise.")
+
+        best = max(terms, key=lambda t: t["average"])
+        worst = min(terms, key=lambda t: t["average"])
+        peak = max(terms, key=lambda t: t["highest"])
+
+        return "\n\n".join([
+            f"Across {len(terms)} terms, the average of {student} moved from {first['average']:.1f}% in the "
+            f"{first['term']} to {last['average']:.1f}% in the {last['term']}, {trend}.",
+            f"The best term was the {best['term']} with an average of {best['average']:.1f}%, and the most "
+            f"difficult was the {worst['term']} at {worst['average']:.1f}%. The highest single score, "
+            f"{_pct(peak['highest'])}, came in the {peak['term']}.",
+            trajectory,
+            "Every term is a fresh opportunity, and with determination the best results are still to come.",
+        ])
+
+
+_PROVIDERS = {"groq": GroqProvider, "template": TemplateProvider, "stub": StubProvider}
+_instances: Dict[str, ReportProvider] = {}
+_instances_lock = threading.Lock()
+
+
+def get_report_provider(name: str = None) -> ReportProvider:
+    """The provider called name (default REPORT_PROVIDER), one shared instance each."""
+    name = (name or REPORT_PROVIDER).lower()
+    if name not in _PROVIDERS:
+        raise ValueError(f"Unknown report provider {name!r}; use one of {', '.join(_PROVIDERS)}.")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = _PROVIDERS[name]()
+        return _instances[name]
+
+
+def fallback_provider(provider: ReportProvider = None) -> Optional[ReportProvider]:
+    """The template engine as a latency-budget fallback, unless provider is already local."""
+    provider = provider or get_report_provider()
+    if not REPORT_LATENCY_BUDGET or not provider.remote:
+        return None
+    return get_report_provider("template")
@@ -0,0 +1,218 @@
+# backend/utils/stats_engine.py
+"""
+Vectorized score statistics over NumPy arrays.
+
+Everything works on flat per-row arrays (one entry per result row) plus integer
+group codes, so a whole class/term is summarized in a handful of array passes
+instead of per-subject and per-student Python loops.
+"""
+
+from typing import Any, Dict, Hashable, Iterable, List, Sequence, Tuple
+import numpy as np
+
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+
+# Totals are rounded to this many decimals before ranking so float summation
+# noise does not split ties.
+RANK_DECIMALS = 6
+
+
+def factorize(values: Iterable[Hashable]) -> Tuple[List[Hashable], np.ndarray]:
+    """Returns (uniques in first-seen order, integer code per value). None is a value like any other."""
+    lookup: Dict[Hashable, int] = {}
+    codes = np.fromiter(
+        (lookup.setdefault(value, len(lookup)) for value in values),
+        dtype=np.int64,
+    )
+    return list(lookup), codes
+
+
+def group_stats(codes: np.ndarray, values: np.ndarray, n_groups: int = None,
+                quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, Any]:
+    """
+    Per-group count, sum, mean, population std, min, max and quantiles (linear
+    interpolation, as numpy.quantile and PostgreSQL percentile_cont).
+    Arrays are indexed by group code; groups with no values get NaN statistics.
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    if n_groups is None:
+        n_groups = int(codes.max()) + 1 if codes.size else 0
+
+    count = np.bincount(codes, minlength=n_groups)
+    total = np.bincount(codes, weights=values, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        variance = np.bincount(codes, weights=values * values, minlength=n_groups) / count - mean * mean
+    std = np.sqrt(np.clip(variance, 0, None))
+
+    # Sort by group, then value: each group is a contiguous ascending run
+    order = np.lexsort((values, codes))
+    ordered = values[order]
+    starts = np.concatenate(([0], np.cumsum(count)[:-1])) if n_groups else count
+    present = count > 0
+    last = starts + np.maximum(count - 1, 0)
+
+    def at(positions):
+        out = np.full(n_groups, np.nan)
+        out[present] = ordered[positions[present]]
+        return out
+
+    result = {
+        "count": count,
+        "sum": total,
+        "mean": mean,
+        "std": std,
+        "min": at(starts),
+        "max": at(last),
+        "quantiles": {},
+    }
+    for q in quantiles:
+        position = starts + q * (count - 1).clip(min=0)
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, last)
+        fraction = position - low
+        result["quantiles"][q] = at(low) + (at(high) - at(low)) * fraction
+    return result
+
+
+def z_scores(codes: np.ndarray, values: np.ndarray, stats: Dict[str, Any]) -> np.ndarray:
+    """Per-row (value - group mean) / group std; 0 where the group has no spread."""
+    values = np.asarray(values, dtype=np.float64)
+    mean = stats["mean"][codes]
+    std = stats["std"][codes]
+    out = np.zeros_like(values)
+    np.divide(values - mean, std, out=out, where=std > 0)
+    return out
+
+
+def percentile_ranks(codes: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Per-row percentile rank within its group: the share of the group scoring
+    below the value plus half of those scoring the same, times 100.
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    n = codes.size
+    if not n:
+        return np.zeros(0)
+
+    order = np.lexsort((values, codes))
+    sorted_codes = codes[order]
+    sorted_values = values[order]
+    index = np.arange(n)
+
+    new_group = np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]
+    new_value = new_group | np.r_[True, sorted_values[1:] != sorted_values[:-1]]
+    group_start = np.maximum.accumulate(np.where(new_group, index, 0))
+    run_start = np.maximum.accumulate(np.where(new_value, index, 0))
+    # Last index of each run of equal values, propagated backwards
+    run_end_marker = np.r_[new_value[1:], True]
+    run_end = np.minimum.accumulate(np.where(run_end_marker, index, n)[::-1])[::-1]
+
+    group_size = np.bincount(codes)[sorted_codes]
+    below = run_start - group_start
+    equal = run_end - run_start + 1
+
+    out = np.empty(n)
+    out[order] = (below + 0.5 * equal) / group_size * 100
+    return out
+
+
+def competition_rank(values: np.ndarray, descending: bool = True) -> np.ndarray:
+    """1-based "1224" ranking, like SQL RANK(): ties share a rank and leave a gap after."""
+    keys = np.round(np.asarray(values, dtype=np.float64), RANK_DECIMALS)
+    if descending:
+        keys = -keys
+    return np.searchsorted(np.sort(keys), keys, side="left") + 1
+
+
+def dense_rank(values: np.ndarray, descending: bool = True) -> np.ndarray:
+    """1-based "1223" ranking, like SQL DENSE_RANK(): ties share a rank with no gap."""
+    keys = np.round(np.asarray(values, dtype=np.float64), RANK_DECIMALS)
+    if descending:
+        keys = -keys
+    return np.unique(keys, return_inverse=True)[1].reshape(-1) + 1
+
+
+def class_term_statistics(student_ids: Sequence[Hashable], subjects: Sequence[Hashable],
+                          scores: Sequence[float],
+                          quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, Any]:
+    """
+    Summarizes one class/term from its result rows (three parallel sequences).
+
+    Students are ranked on their total divided by the largest number of subjects
+    any student took, as in the results API. Rows with a None student id count
+    towards subject statistics and the subject count but are not ranked.
+
+    Returns {
+        "subjects": {subject: {"count", "mean", "std", "min", "max", "median", "quantiles"}},
+        "max_subject_count": int,
+        "students": {student_id: {"total", "average", "subjects_taken",
+                                  "position", "dense_position", "percentile_rank", "z_score"}},
+        "row_z_scores": array, "row_percentile_ranks": array,  # per input row, within subject
+    }
+    """
+    values = np.asarray(scores, dtype=np.float64)
+    quantiles = tuple(sorted(set(quantiles) | {0.5}))
+    subject_names, subject_codes = factorize(subjects)
+    student_keys, student_codes = factorize(student_ids)
+
+    per_subject = group_stats(subject_codes, values, len(subject_names), quantiles)
+
+    n_students = len(student_keys)
+    totals = np.bincount(student_codes, weights=values, minlength=n_students)
+    pairs = np.unique(student_codes * max(len(subject_names), 1) + subject_codes)
+    subjects_taken = np.bincount(pairs // max(len(subject_names), 1), minlength=n_students)
+    max_subject_count = int(subjects_taken.max()) if n_students else 1
+    averages = totals / max_subject_count
+
+    ranked = np.array([key is not None for key in student_keys], dtype=bool)
+    positions = np.zeros(n_students, dtype=np.int64)
+    dense_positions = np.zeros(n_students, dtype=np.int64)
+    standing = np.zeros(n_students)
+    student_z = np.zeros(n_students)
+    if ranked.any():
+        # Ranked students form one group for the percentile ranks and z-scores of their averages
+        class_codes = np.zeros(int(ranked.sum()), dtype=np.int64)
+        positions[ranked] = competition_rank(totals[ranked])
+        dense_positions[ranked] = dense_rank(totals[ranked])
+        standing[ranked] = percentile_ranks(class_codes, averages[ranked])
+        student_z[ranked] = z_scores(class_codes, averages[ranked],
+                                     group_stats(class_codes, averages[ranked], 1, quantiles=()))
+
+    subject_summary = {}
+    for code, subject in enumerate(subject_names):
+        subject_quantiles = {q: float(per_subject["quantiles"][q][code]) for q in quantiles}
+        subject_summary[subject] = {
+            "count": int(per_subject["count"][code]),
+            "mean": float(per_subject["mean"][code]),
+            "std": float(per_subject["std"][code]),
+            "min": float(per_subject["min"][code]),
+            "max": float(per_subject["max"][code]),
+            "median": subject_quantiles[0.5],
+            "quantiles": subject_quantiles,
+        }
+
+    students = {}
+    for code, student_id in enumerate(student_keys):
+        if student_id is None:
+            continue
+        students[student_id] = {
+            "total": float(totals[code]),
+            "average": float(averages[code]),
+            "subjects_taken": int(subjects_taken[code]),
+            "position": int(positions[code]),
+            "dense_position": int(dense_positions[code]),
+            "percentile_rank": float(standing[code]),
+            "z_score": float(student_z[code]),
+        }
+
+    return {
+        "subjects": subject_summary,
+        "max_subject_count": max_subject_count,
+        "students": students,
+        "row_z_scores": z_scores(subject_codes, values, per_subject),
+        "row_percentile_ranks": percentile_ranks(subject_codes, values),
+    }
+
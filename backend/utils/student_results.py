@@ -0,0 +1,102 @@
+# backend/utils/student_results.py
+
+from typing import Any, Dict, Optional
+from sqlalchemy.orm import Session
+import models
+from utils.ranking import get_student_term_stats, ordinal, rebuild_class_term_stats
+
+
+def load_student_results(db: Session, user: models.User) -> Optional[Dict[str, Any]]:
+    """
+    Builds a student's scores with class position and per-subject class stats for
+    every term, as returned by /results/myResults (without the academic analysis).
+
+    Returns {"results", "term_positions", "latest_term"}, or None if the student has
+    no results. Rows matched only by name are linked to the student on the way.
+    """
+    # Fetch all results for this student
+    results = db.query(models.StudentResult).filter(models.StudentResult.student_id == user.id).all()
+
+    # Name fallback
+    if not results:
+        results = db.query(models.StudentResult).filter(
+            models.StudentResult.name.ilike(f"%{user.username}%")
+        ).all()
+        if not results and user.full_name:
+            results = db.query(models.StudentResult).filter(
+                models.StudentResult.name.ilike(f"%{user.full_name}%")
+            ).all()
+        linked = set()
+        for r in results:
+            if r.student_id is None:
+                r.student_id = user.id
+                linked.add((r.student_class, r.term))
+        if linked:
+            # The newly linked rows change the standings of those class/terms
+            db.flush()
+            rebuild_class_term_stats(db, linked)
+            db.commit()
+
+    if not results:
+        return None
+
+    # Group results per term for position
+    term_positions = {}
+    results_data = []
+
+    # Determine latest term for default selection
+    term_order = {"First Term": 1, "Second Term": 2, "Third Term": 3}
+    available_terms = list(set([r.term for r in results]))
+    latest_term = max(available_terms, key=lambda t: term_order.get(t, 0))
+
+    # Each term is ranked within the class the student sat it in
+    term_results_map = {}
+    for r in results:
+        term_results_map.setdefault(r.term, []).append(r)
+    class_keys = {term: rows[0].student_class for term, rows in term_results_map.items()}
+    class_stats = get_student_term_stats(db, user.id, [(c, t) for t, c in class_keys.items()])
+
+    for term in available_terms:
+        # all student results in this term
+        term_results = term_results_map.get(term)
+
+        if not term_results:
+            continue
+
+        student_class = class_keys[term]
+        stats = class_stats[(student_class, term)]
+        max_subject_count = stats["max_subject_count"]
+        class_subject_stats = stats["subject_stats"]
+
+        student_avg = stats["average"]
+        position = stats["position"]
+
+        term_positions[term] = {
+            "position": position,
+            "position_label": ordinal(position),
+            "average_score": student_avg,
+            "subjects_taken": len(term_results),
+            "total_subjects": max_subject_count,
+            "total_students": stats["total_students"]
+        }
+
+        for r in term_results:
+            results_data.append({
+                "name": r.name,
+                "student_class": r.student_class,
+                "subject": r.subject,
+                "percentage": r.percentage,
+                "term": r.term,
+                "session": r.session,
+                "total_subjects": max_subject_count,
+                "subjects_taken": len(term_results),
+                "min_score_in_class": class_subject_stats.get(r.subject, {}).get("min", 0),
+                "max_score_in_class": class_subject_stats.get(r.subject, {}).get("max", 0),
+                "median_score_in_class": class_subject_stats.get(r.subject, {}).get("median", 0)
+            })
+
+    return {
+        "results": results_data,
+        "term_positions": term_positions,
+        "latest_term": latest_term,
+    }
@@ -1,12 +1,35 @@
 import streamlit as st
 import requests
 import pandas as pd
+import time
 
 # ------------------ PAGE CONFIG ------------------
 st.set_page_config(page_title="School Result Management System", layout="wide")
 
 API_URL = "http://127.0.0.1:8000"
 
+
+def auth_headers():
+    """Authorization header with the session token from /auth/login, once logged in."""
+    user = st.session_state.get("user")
+    if user and user.get("access_token"):
+        return {"Authorization": f"Bearer {user['access_token']}"}
+    return {}
+
+
+def fetch_all_results(**filters):
+    """Reads /results/all page by page (following X-Next-Cursor) into one list."""
+    rows, params = [], {k: v for k, v in filters.items() if v}
+    while True:
+        resp = requests.get(f"{API_URL}/results/all", params=params, headers=auth_headers())
+        if resp.status_code != 200:
+            return resp.status_code, rows
+        rows.extend(resp.json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            return 200, rows
+        params["cursor"] = cursor
+
 # ------------------ SESSION STATE ------------------
 if "user" not in st.session_state:
     st.session_state["user"] = None
@@ -81,6 +104,7 @@ elif st.session_state["user"] is None and st.session_state["page"] == "login":
                 st.session_state["user"] = {
                     "username": user_data.get("username", username),
                     "role": user_data.get("role", "student"),
+                    "access_token": user_data.get("access_token"),
                 }
                 st.success(
                     f"✅ Welcome {st.session_state['user']['username']}! "
@@ -122,98 +146,96 @@ else:
     if choice == "Dashboard" and role == "admin":
         st.subheader("📊 Admin Dashboard")
 
-        resp = requests.get(f"{API_URL}/results/all")
-        if resp.status_code != 200:
-            st.error("No results found or unable to fetch data.")
-        else:
-            df = pd.DataFrame(resp.json())
+        # Only the summary rows for the current selection are fetched; the
+        # aggregates are computed by the API.
+        resp = requests.get(f"{API_URL}/results/stats/options", headers=auth_headers())
+        options = pd.DataFrame(resp.json() if resp.status_code == 200 else [])
 
-            if df.empty:
-                st.warning("No result records found.")
-            else:
-                # ✅ Term order mapping for consistent sorting
-                term_order = {
-                    "First Term": 1,
-                    "1st Term": 1,
-                    "Second Term": 2,
-                    "2nd Term": 2,
-                    "Third Term": 3,
-                    "3rd Term": 3,
-                }
-
-                # Add default values if columns are missing
-                if "term" not in df.columns:
-                    df["term"] = "Unknown Term"
-                if "session" not in df.columns:
-                    df["session"] = "Unknown Session"
-
-                # Sort the data
-                df["term_order"] = df["term"].map(term_order).fillna(99)
-                df = df.sort_values(by=["session", "term_order"], ascending=[False, True])
-
-                # Filtering options
-            session_value = df["session"].iloc[0] if not df.empty else "Unknown Session"            
-            classes = sorted(df["student_class"].unique())
+        if options.empty:
+            st.warning("No result records found.")
+        else:
+            # ✅ Term order mapping for consistent sorting
+            term_order = {
+                "First Term": 1,
+                "1st Term": 1,
+                "Second Term": 2,
+                "2nd Term": 2,
+                "Third Term": 3,
+                "3rd Term": 3,
+            }
+
+            sessions = sorted(options["session"].unique(), reverse=True)
+            selected_session = st.radio("Select Session:", sessions, horizontal=True)
+            options = options[options["session"] == selected_session]
+
+            classes = sorted(options["student_class"].unique())
             selected_class = st.radio("Select Class:", classes, horizontal=True)
 
-
-            terms = (
-                df.loc[df["student_class"] == selected_class, "term"]
-                .dropna()
-                .unique()
-                .tolist()
+            terms = sorted(
+                options.loc[options["student_class"] == selected_class, "term"].unique(),
+                key=lambda t: term_order.get(t, 99),
             )
             selected_term = st.radio("Select Term:", terms, horizontal=True)
 
-            subjects = (
-                df.loc[
-                    (df["student_class"] == selected_class) &
-                    (df["term"] == selected_term),
+            subjects = sorted(
+                options.loc[
+                    (options["student_class"] == selected_class) &
+                    (options["term"] == selected_term),
                     "subject"
-                ]
-                .dropna()
-                .unique()
-                .tolist()
+                ].unique()
             )
             selected_subject = st.radio("Select Subject:", subjects, horizontal=True)
 
-            # ✅ Apply filters
-            filtered_df = df[
-                (df["student_class"] == selected_class)
-                & (df["term"] == selected_term)
-                & (df["subject"] == selected_subject)
-            ]
+            filters = {
+                "session": selected_session,
+                "term": selected_term,
+                "student_class": selected_class,
+                "subject": selected_subject,
+            }
 
             # --- DISPLAY RESULTS ---
-            st.markdown(f"### 🗂 {selected_class} — {selected_term} ({session_value})")
-            st.dataframe(
-                filtered_df[["session", "term", "student_class", "subject", "name", "percentage"]]
-            )
+            st.markdown(f"### 🗂 {selected_class} — {selected_term} ({selected_session})")
+            _, rows = fetch_all_results(**filters)
+            filtered_df = pd.DataFrame(rows)
+            if not filtered_df.empty:
+                st.dataframe(
+                    filtered_df[["session", "term", "student_class", "subject", "name", "percentage"]]
+                )
 
-            # ✅ Summary — Average per Class per Term
-            avg_scores = (
-                filtered_df.groupby(["session", "term", "subject", "student_class"])["percentage"]
-                .median()
-                .reset_index()
-                .rename(columns={"percentage": "Average (%)"})
+            # ✅ Summary — Median, mean, range and pass rate
+            summary = pd.DataFrame(
+                requests.get(f"{API_URL}/results/stats/subjects", params=filters, headers=auth_headers()).json()
             )
-
             st.write("### 📈 Average Score per Class per Term")
-            st.dataframe(avg_scores)
+            if not summary.empty:
+                summary["pass_rate"] = (summary["pass_rate"] * 100).round(1)
+                st.dataframe(
+                    summary.rename(columns={
+                        "median": "Average (%)",
+                        "mean": "Mean (%)",
+                        "pass_rate": "Pass rate (%)",
+                    })[["session", "term", "subject", "student_class", "Average (%)", "Mean (%)",
+                        "min", "max", "Pass rate (%)"]]
+                )
 
-            # ✅ Top Scorers per Subject
-            top_scores = (
-                filtered_df.loc[
-                    filtered_df.groupby(["session", "term", "student_class", "subject"])["percentage"].idxmax()
-                ]
-                .sort_values(["session", "term", "student_class", "subject"])
-                .reset_index(drop=True)
+            # ✅ Score distribution
+            histogram = pd.DataFrame(
+                requests.get(f"{API_URL}/results/stats/histogram", params=filters, headers=auth_headers()).json()
             )
+            if not histogram.empty:
+                st.write("### 📊 Score Distribution")
+                histogram["range"] = histogram["bin_start"].astype(str) + "–" + histogram["bin_end"].astype(str)
+                st.bar_chart(histogram.set_index("range")["count"])
 
-            st.write("### 🏆 Highest Scorer per Subject per Class")
-            st.dataframe(
-                top_scores[["session", "term", "student_class", "subject", "name", "percentage"]]
+            # ✅ Top Scorers per Subject
+            top_scores = pd.DataFrame(
+                requests.get(f"{API_URL}/results/stats/top", params=filters, headers=auth_headers()).json()
             )
+            st.write("### 🏆 Highest Scorer per Subject per Class")
+            if not top_scores.empty:
+                st.dataframe(
+                    top_scores[["session", "term", "student_class", "subject", "name", "percentage"]]
+                )
     # ==================================================
     # 🔸 Upload Results (Admin Only)
     # ==================================================
@@ -226,7 +248,7 @@ else:
         if uploaded_file:
             files = {"file": (uploaded_file.name, uploaded_file.getvalue(), uploaded_file.type)}
             try:
-                res = requests.post(f"{API_URL}/results/upload", files=files, timeout=20)
+                res = requests.post(f"{API_URL}/results/upload", files=files, headers=auth_headers(), timeout=20)
             except requests.exceptions.RequestException as e:
                 st.error(f"Upload error: {e}")
             else:
@@ -235,14 +257,38 @@ else:
                 except ValueError:
                     st.error("Invalid response from server.")
                 else:
-                    if res.status_code == 200:
+                    if res.status_code in [200, 202]:
                         term = msg.get("term", "Unknown Term")
                         session = msg.get("session", "Unknown Session")
-                        st.markdown(
-                            f"### 🗓️ **{term} — {session}**\n"
-                            f"✅ {msg.get('message', 'Upload successful!')}"
-                        )
-                        st.success(f"Total Records Added: {msg.get('records_added', 0)}")
+                        st.markdown(f"### 🗓️ **{term} — {session}**")
+
+                        # Upload runs as a background job; poll until it finishes
+                        job = {"status": msg.get("status", "queued")}
+                        progress = st.empty()
+                        while job.get("status") in ["queued", "running"]:
+                            time.sleep(1)
+                            try:
+                                job = requests.get(f"{API_URL}{msg['status_url']}", headers=auth_headers(), timeout=10).json()
+                            except (requests.exceptions.RequestException, ValueError) as e:
+                                st.error(f"Could not check upload progress: {e}")
+                                break
+                            progress.info(
+                                f"⏳ {job.get('status', '').capitalize()} — "
+                                f"{job.get('rows_done', 0)} rows processed, "
+                                f"{job.get('rows_rejected', 0)} rejected"
+                            )
+
+                        if job.get("status") == "succeeded":
+                            result = job.get("result") or {}
+                            progress.empty()
+                            st.markdown(f"✅ {result.get('message', 'Upload successful!')}")
+                            st.success(f"Total Records Added: {result.get('records_added', 0)}")
+                            rejected = (result.get("rejected_rows") or {}).get("rows") or []
+                            if rejected:
+                                st.warning(f"{result['rejected_rows']['count']} rows were rejected.")
+                                st.dataframe(pd.DataFrame(rejected))
+                        elif job.get("status") == "failed":
+                            st.error(job.get("error") or "Upload failed.")
                     else:
                         st.error(msg.get("detail", "Upload failed."))
 
@@ -263,6 +309,7 @@ else:
             res = requests.get(
                 f"{API_URL}/results/myResults",
                 params={"username": user["username"]},
+                headers=auth_headers(),
                 timeout=10,
             )
         except requests.exceptions.RequestException as e:
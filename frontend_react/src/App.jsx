@@ -37,7 +37,7 @@ export default function App() {
         <Route path="/login" element={<Login setUser={setUser} />} />
         {user && (
           <>
-            <Route path="/change-password" element={<ChangePassword user={user} />} />
+            <Route path="/change-password" element={<ChangePassword user={user} setUser={setUser} />} />
           </>
         )}
         <Route path="/signup" element={<Signup />} />
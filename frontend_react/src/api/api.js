@@ -7,23 +7,47 @@ export const api = axios.create({
   timeout: 60000,
 });
 
+// Send the session token from /auth/login with every request
+api.interceptors.request.use((config) => {
+  let user = null;
+  try {
+    user = JSON.parse(localStorage.getItem("user"));
+  } catch {
+    user = null;
+  }
+  if (user?.access_token) {
+    config.headers.Authorization = `Bearer ${user.access_token}`;
+  }
+  return config;
+});
+
 // ---------- AUTH ----------
 export const login = (username, password) =>
   api.post("/auth/login", { username, password });
 
-export const changePassword = (user_id, oldPassword, newPassword) => {
-  return axios.post(`${API_URL}/change-password`, {
-    user_id,
-    old_password: oldPassword,
-    new_password: newPassword,
+// Returns a new access_token; tokens issued before the change stop working
+export const changePassword = (oldPassword, newPassword) =>
+  api.post("/auth/change-password", null, {
+    params: { old_password: oldPassword, new_password: newPassword },
   });
-};
 
 export const register = (data) =>
   api.post("/auth/register", data);
 
 // ---------- RESULTS ----------
-export const getAllResults = () => api.get("/results/all");
+// Results are paginated by id; follow X-Next-Cursor until it is absent.
+// filters: { session, term, student_class, subject, student_id }
+export const getAllResults = async (filters = {}) => {
+  const data = [];
+  let params = { ...filters };
+  for (;;) {
+    const res = await api.get("/results/all", { params });
+    data.push(...res.data);
+    const cursor = res.headers["x-next-cursor"];
+    if (!cursor) return { ...res, data };
+    params = { ...filters, cursor };
+  }
+};
 
 export const uploadResults = (file) => {
   const formData = new FormData();
@@ -33,10 +57,15 @@ export const uploadResults = (file) => {
   });
 };
 
+export const getJob = (jobId) => api.get(`/results/jobs/${jobId}`);
+
 // MUST include class_name because backend ranking uses (term + class)
 export const getMyResults = (username, term, student_class) =>
   api.get(`/results/myResults`, { params: { username, term, student_class } });
 
+// Academic analysis streamed over Server-Sent Events (use with EventSource)
+export const myResultsAnalysisUrl = (analysisPath) => `${API_URL}${analysisPath}`;
+
 // Optional student report (still must include term + class if you use it)
 export const getStudentReport = (username, term) =>
   api.get(`/results/myResults`, { params: { username, term } });
@@ -2,7 +2,7 @@
 import React, { useState } from "react";
 import { changePassword } from "../api/api";
 
-export default function ChangePassword({ user }) {
+export default function ChangePassword({ user, setUser }) {
   const [oldPassword, setOldPassword] = useState("");
   const [newPassword, setNewPassword] = useState("");
   const [confirmPassword, setConfirmPassword] = useState("");
@@ -22,7 +22,12 @@ export default function ChangePassword({ user }) {
 
     setLoading(true);
     try {
-      const res = await changePassword(user.id, oldPassword, newPassword);
+      const res = await changePassword(oldPassword, newPassword);
+      if (res.data.access_token) {
+        const updated = { ...user, access_token: res.data.access_token };
+        setUser(updated);
+        localStorage.setItem("user", JSON.stringify(updated));
+      }
       setMessage(res.data.message || "Password changed successfully.");
       setOldPassword("");
       setNewPassword("");
@@ -23,6 +23,7 @@ export default function Login({ setUser }) {
         username: payload.username,
         role: payload.role,
         full_name: payload.full_name || payload.username,
+        access_token: payload.access_token,
       };
 
       setUser(userData);
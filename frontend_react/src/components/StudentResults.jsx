@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import { getMyResults } from "../api/api";
+import { getMyResults, myResultsAnalysisUrl } from "../api/api";
 import Table from "react-bootstrap/Table";
 import Spinner from "react-bootstrap/Spinner";
 import Alert from "react-bootstrap/Alert";
@@ -21,6 +21,7 @@ export default function StudentResults({ user }) {
 
   useEffect(() => {
     if (!user) return;
+    let analysisStream = null;
 
     const fetchResults = async () => {
       try {
@@ -33,6 +34,17 @@ export default function StudentResults({ user }) {
         const fetched = data.results || [];
         setResults(fetched);
         setAcademicAnalysis(data.academic_analysis || "");
+
+        // Scores arrive first; stream the analysis in if it is not ready yet
+        if (!data.academic_analysis && data.analysis_url) {
+          analysisStream = new EventSource(myResultsAnalysisUrl(data.analysis_url));
+          analysisStream.onmessage = (event) => {
+            const { token } = JSON.parse(event.data);
+            setAcademicAnalysis((prev) => prev + token);
+          };
+          analysisStream.addEventListener("done", () => analysisStream.close());
+          analysisStream.addEventListener("error", () => analysisStream.close());
+        }
         setStudentName(data.student_name || user.full_name || "");
 
         setTermPositions(data.term_positions || {});
@@ -49,6 +61,7 @@ export default function StudentResults({ user }) {
     };
 
     fetchResults();
+    return () => analysisStream && analysisStream.close();
   }, [user]);
 
   // Filter results by term/session
@@ -1,5 +1,5 @@
 import { useState } from "react";
-import { uploadResults } from "../api/api";
+import { uploadResults, getJob } from "../api/api";
 import AdminMenu from "./AdminMenu.jsx";
 
 export default function UploadResults() {
@@ -11,8 +11,21 @@ export default function UploadResults() {
     if (!file) return setMessage("Please select a file to upload.");
     try {
       const res = await uploadResults(file);
-      const msg = res.data;
-      setMessage(`✅ ${msg.message || "Upload successful!"}`);
+      let job = res.data;
+      setMessage(`⏳ ${job.message || "Upload queued."}`);
+
+      // Upload runs as a background job; poll until it finishes
+      while (job.status === "queued" || job.status === "running") {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        job = (await getJob(job.job_id)).data;
+        setMessage(`⏳ ${job.status}: ${job.rows_done} rows processed, ${job.rows_rejected} rejected`);
+      }
+
+      if (job.status === "succeeded") {
+        setMessage(`✅ ${job.result?.message || "Upload successful!"}`);
+      } else {
+        setMessage(`❌ ${job.error || "Upload failed."}`);
+      }
     } catch {
       setMessage("❌ Upload failed. Check server connection.");
     }